@@ -0,0 +1,103 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+"""
+Executors for side effects that must wait for the database commit.
+
+Views write the leave, its audit log, notification records and the webhook
+outbox in one atomic block and hand external I/O (email, inline webhook
+delivery) to `run_on_commit`. The callable is passed to the configured
+executor only after the transaction commits, so nothing is sent for a
+rolled-back request and no mail server round trip happens while row locks
+are held. Transactional executors (the job queue) are the exception: they
+write their Job row inside the transaction, so it commits or rolls back
+with the data and a crash right after the commit can't lose it.
+
+SIDE_EFFECT_EXECUTOR selects the executor:
+    'inline'   run in the request thread right after the commit (default)
+    'thread'   run on a shared thread pool so the response isn't held up
+    'queue'    write a Job row for `manage.py runworker` (see jobs/queue.py)
+    a dotted path to a class with a `submit(func, *args, **kwargs)` method
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def _run(func, args, kwargs):
+    """Run a side effect, logging (not raising) failures: the data is already committed."""
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Side effect %s failed', getattr(func, '__qualname__', func))
+
+
+class InlineExecutor:
+    """Run side effects immediately in the calling thread."""
+
+    def submit(self, func, *args, **kwargs):
+        _run(func, args, kwargs)
+
+
+class ThreadExecutor:
+    """Run side effects on a process-wide thread pool."""
+
+    def __init__(self, max_workers=None):
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_workers or settings.SIDE_EFFECT_WORKERS,
+            thread_name_prefix='side-effects',
+        )
+
+    def _work(self, func, args, kwargs):
+        try:
+            _run(func, args, kwargs)
+        finally:
+            # Pool threads outlive requests; don't leak their DB connections
+            close_old_connections()
+
+    def submit(self, func, *args, **kwargs):
+        return self.pool.submit(self._work, func, args, kwargs)
+
+
+EXECUTORS = {
+    'inline': InlineExecutor,
+    'thread': ThreadExecutor,
+    'queue': 'jobs.queue.QueueExecutor',
+}
+
+_executor = None
+_executor_key = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the executor named by SIDE_EFFECT_EXECUTOR, created once per process."""
+    global _executor, _executor_key
+    key = settings.SIDE_EFFECT_EXECUTOR
+    with _lock:
+        if _executor is None or _executor_key != key:
+            executor_class = EXECUTORS.get(key, key)
+            if isinstance(executor_class, str):
+                executor_class = import_string(executor_class)
+            _executor = executor_class()
+            _executor_key = key
+        return _executor
+
+
+def run_on_commit(func, *args, **kwargs):
+    """
+    Submit `func(*args, **kwargs)` to the executor once the current transaction commits.
+
+    Outside a transaction it is submitted right away. Executors with
+    `transactional = True` are called immediately, in the current transaction.
+    Arguments should be plain data (not model instances) so queue-backed
+    executors can serialize them.
+    """
+    executor = get_executor()
+    if getattr(executor, 'transactional', False):
+        executor.submit(func, *args, **kwargs)
+    else:
+        transaction.on_commit(lambda: executor.submit(func, *args, **kwargs))
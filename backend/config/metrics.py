@@ -0,0 +1,238 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from django.db import connection
+
+"""
+Per-request timing instrumentation.
+
+RequestMetricsMiddleware measures each request's wall time, the number and
+duration of its SQL queries (through a database execute wrapper, so it works
+with DEBUG off) and the time spent in sections marked with `timed()`, such as
+notifications and webhooks. The figures are sent back as a `Server-Timing`
+header and folded into per-route histograms served by MetricsView.
+
+Histograms live in process memory, so each worker reports its own traffic
+since it started (or since the last reset).
+"""
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestTimings:
+    """Counters collected while a single request is being handled."""
+
+    __slots__ = ('queries', 'db_ms', 'sections', '_active')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.sections = {}
+        self._active = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper: time every query on the connection."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+
+
+class timed:
+    """
+    Add the time spent in a block (or decorated function) to the current request.
+
+    Usable as `with timed('notify'):` or `@timed('webhook')`. Outside a request,
+    or when the section is already being timed further up the stack, it does
+    nothing.
+    """
+
+    def __init__(self, section):
+        self.section = section
+        self._token = None
+
+    def __enter__(self):
+        timings = _current.get()
+        if timings is None or self.section in timings._active:
+            self._token = None
+            return self
+        timings._active.add(self.section)
+        self._token = (timings, time.perf_counter())
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._token is not None:
+            timings, started = self._token
+            timings.sections[self.section] = (
+                timings.sections.get(self.section, 0.0) + (time.perf_counter() - started) * 1000
+            )
+            timings._active.discard(self.section)
+        return False
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.section):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum and max."""
+
+    __slots__ = ('bounds', 'counts', 'total', 'count', 'max')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (max for the open bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        labels = [f'le_{bound}' for bound in self.bounds] + ['inf']
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'max': round(self.max, 3),
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class RouteMetrics:
+    __slots__ = ('duration', 'queries', 'db', 'sections', 'statuses')
+
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db = Histogram(DURATION_BUCKETS)
+        self.sections = {}
+        self.statuses = {}
+
+
+class MetricsRegistry:
+    """Thread-safe per-route aggregates for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self.started_at = time.time()
+
+    def record(self, route, status_code, duration_ms, timings):
+        with self._lock:
+            metrics = self._routes.get(route)
+            if metrics is None:
+                metrics = self._routes[route] = RouteMetrics()
+            metrics.duration.observe(duration_ms)
+            metrics.queries.observe(timings.queries)
+            metrics.db.observe(timings.db_ms)
+            for section, elapsed in timings.sections.items():
+                histogram = metrics.sections.get(section)
+                if histogram is None:
+                    histogram = metrics.sections[section] = Histogram(DURATION_BUCKETS)
+                histogram.observe(elapsed)
+            metrics.statuses[status_code] = metrics.statuses.get(status_code, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'since': self.started_at,
+                'routes': {
+                    route: {
+                        'requests': metrics.duration.count,
+                        'status_codes': {str(code): count for code, count in sorted(metrics.statuses.items())},
+                        'duration_ms': metrics.duration.snapshot(),
+                        'queries': metrics.queries.snapshot(),
+                        'db_ms': metrics.db.snapshot(),
+                        'sections_ms': {
+                            section: histogram.snapshot()
+                            for section, histogram in sorted(metrics.sections.items())
+                        },
+                    }
+                    for route, metrics in sorted(self._routes.items())
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self.started_at = time.time()
+
+
+registry = MetricsRegistry()
+
+
+def route_name(request):
+    """Aggregate by method and URL pattern name, not by concrete path."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return f'{request.method} <unmatched>'
+    return f'{request.method} {match.view_name or match.route}'
+
+
+def server_timing(duration_ms, timings):
+    parts = [
+        f'total;dur={duration_ms:.1f}',
+        f'db;dur={timings.db_ms:.1f};desc="{timings.queries} queries"',
+    ]
+    parts.extend(f'{section};dur={elapsed:.1f}' for section, elapsed in timings.sections.items())
+    return ', '.join(parts)
+
+
+class RequestMetricsMiddleware:
+    """Record wall time, SQL and timed sections for every request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        registry.record(route_name(request), response.status_code, duration_ms, timings)
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(duration_ms, timings)
+        return response
@@ -61,10 +61,12 @@ INSTALLED_APPS = [
     'users',
     'leaves',
     'notifications',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # CORS first
+    'config.metrics.RequestMetricsMiddleware',  # Timing, SQL counts, Server-Timing header
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Whitenoise for static files
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -117,6 +119,31 @@ else:
     }
 
 
+# Cache
+# Local-memory by default; point CACHE_BACKEND/CACHE_LOCATION at Redis or
+# Memcached when running several processes so invalidation is shared.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='lms-default'),
+    }
+}
+
+# Show employees with no manager assigned to every manager (onboarding fallback).
+# Turn off once reporting lines are set up so managers only see their own team.
+UNASSIGNED_EMPLOYEES_FALLBACK = config('UNASSIGNED_EMPLOYEES_FALLBACK', default=True, cast=bool)
+
+# Upper bound on how stale a manager's cached dashboard counters can get
+MANAGER_STATS_CACHE_TIMEOUT = config('MANAGER_STATS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Upper bound on how long a cached unread-notification counter can drift
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = config('NOTIFICATION_UNREAD_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Per-request timing middleware (config/metrics.py)
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+REQUEST_METRICS_SERVER_TIMING = config('REQUEST_METRICS_SERVER_TIMING', default=True, cast=bool)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -205,6 +232,36 @@ else:
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@leavemanagementsystem.com')
 EMAIL_SUBJECT_PREFIX = '[LMS] '
 
+# Where email and other post-commit side effects run: 'inline', 'thread', 'queue'
+# (the Job table, run by `manage.py runworker`) or a dotted path to an executor
+# class (see config/executors.py)
+SIDE_EFFECT_EXECUTOR = config('SIDE_EFFECT_EXECUTOR', default='inline')
+SIDE_EFFECT_WORKERS = config('SIDE_EFFECT_WORKERS', default=4, cast=int)
+
+# Background jobs (see `manage.py runworker`)
+JOB_WORKERS = config('JOB_WORKERS', default=4, cast=int)
+# Seconds after which a PROCESSING claim is considered abandoned
+JOB_CLAIM_TIMEOUT = config('JOB_CLAIM_TIMEOUT', default=600, cast=int)
+# Retries use exponential backoff; jobs are marked FAILED after the last attempt
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=5, cast=int)
+JOB_RETRY_BASE_DELAY = config('JOB_RETRY_BASE_DELAY', default=30, cast=int)
+JOB_RETRY_MAX_DELAY = config('JOB_RETRY_MAX_DELAY', default=60 * 60, cast=int)
+
+# Webhook delivery (see `manage.py deliver_webhooks`)
+WEBHOOK_TIMEOUT = config('WEBHOOK_TIMEOUT', default=10, cast=int)
+WEBHOOK_BATCH_SIZE = config('WEBHOOK_BATCH_SIZE', default=50, cast=int)
+WEBHOOK_WORKERS = config('WEBHOOK_WORKERS', default=8, cast=int)
+# Max concurrent requests (and pooled keep-alive connections) per target host
+WEBHOOK_PER_HOST_LIMIT = config('WEBHOOK_PER_HOST_LIMIT', default=4, cast=int)
+# Send right after the leave transaction commits instead of waiting for the worker
+WEBHOOK_INLINE_DELIVERY = config('WEBHOOK_INLINE_DELIVERY', default=False, cast=bool)
+# Seconds after which a PROCESSING claim is considered abandoned
+WEBHOOK_CLAIM_TIMEOUT = config('WEBHOOK_CLAIM_TIMEOUT', default=300, cast=int)
+# Retries use exponential backoff; deliveries are dead-lettered after the last attempt
+WEBHOOK_MAX_ATTEMPTS = config('WEBHOOK_MAX_ATTEMPTS', default=8, cast=int)
+WEBHOOK_RETRY_BASE_DELAY = config('WEBHOOK_RETRY_BASE_DELAY', default=30, cast=int)
+WEBHOOK_RETRY_MAX_DELAY = config('WEBHOOK_RETRY_MAX_DELAY', default=6 * 60 * 60, cast=int)
+
 # Production Security Settings
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -16,9 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from .views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('users.urls')),
     path('api/', include('leaves.urls')),
+    path('api/', include('notifications.urls')),
+    path('api/internal/metrics/', MetricsView.as_view(), name='request-metrics'),
 ]
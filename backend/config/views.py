@@ -0,0 +1,18 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .metrics import registry
+
+class MetricsView(APIView):
+    """
+    Internal per-route request metrics for this worker process.
+    GET returns the histograms; DELETE resets them. Staff users only.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(registry.snapshot())
+
+    def delete(self, request):
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,18 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'queue', 'status', 'attempts', 'run_at', 'claimed_by', 'finished_at']
+    list_filter = ['status', 'queue', 'created_at']
+    search_fields = ['task', 'last_error']
+    readonly_fields = ['task', 'args', 'kwargs', 'queue', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at', 'claimed_at', 'claimed_by', 'finished_at', 'last_error']
+    actions = ['requeue_jobs']
+
+    @admin.action(description='Requeue selected jobs')
+    def requeue_jobs(self, request, queryset):
+        updated = queryset.exclude(status='PROCESSING').update(
+            status='PENDING', attempts=0, run_at=timezone.now(), claimed_at=None, claimed_by=''
+        )
+        self.message_user(request, f'{updated} jobs requeued.')
@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from jobs.queue import claim_jobs, run_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs from the Job table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', default='default',
+            help='Name of the queue to take jobs from',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOB_WORKERS,
+            help='Number of jobs run at the same time',
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Run jobs in a process pool instead of a thread pool (for CPU-bound jobs)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Number of jobs to claim per batch (default: the concurrency)',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help='Seconds to sleep when the queue is empty',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the queue and exit instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        batch_size = options['batch_size'] or concurrency
+
+        if options['processes']:
+            # Children must open their own DB connections, not inherit ours
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=concurrency, initializer=django.setup)
+        else:
+            pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='runworker')
+
+        try:
+            while True:
+                jobs = claim_jobs(batch_size, queue=options['queue'])
+                if jobs:
+                    succeeded = run_jobs(jobs, pool=pool)
+                    self.stdout.write(f'Ran {succeeded}/{len(jobs)} jobs')
+                    continue
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping job worker')
+        finally:
+            pool.shutdown(wait=True)
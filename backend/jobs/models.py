@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils import timezone
+
+class Job(models.Model):
+    """
+    A unit of background work: a dotted path to a function plus JSON arguments.
+
+    Rows are written as PENDING (in the caller's transaction, if any) and run by
+    `manage.py runworker`. Failures go back to PENDING with a later `run_at`
+    (exponential backoff); after `max_attempts` the row moves to the terminal
+    FAILED state and can be requeued from the admin.
+    """
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=50, default='default')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when a worker claims the row; used to recover claims from crashed workers
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=100, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['queue', 'status', 'run_at'], name='job_due_idx'),
+            # Default ordering (admin job log)
+            models.Index(fields=['-created_at'], name='job_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
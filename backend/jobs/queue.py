@@ -0,0 +1,169 @@
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job
+
+"""
+Database-backed job queue.
+
+`enqueue()` writes a Job row naming a module-level function by dotted path,
+with JSON-serializable arguments. `manage.py runworker` claims due jobs in
+batches and runs them on a thread or process pool, so slow work (SMTP, HTTP,
+ledger rebuilds) can run outside the web workers without an external broker.
+
+Claims follow the webhook outbox: on PostgreSQL the due rows are locked with
+SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers take disjoint batches;
+on SQLite, which has no row locks, the conditional UPDATE ... WHERE
+status='PENDING' still guarantees each job is claimed by one worker only.
+"""
+
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def task_path(func):
+    """Dotted path for a module-level function."""
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(task, args=(), kwargs=None, queue='default', run_at=None, max_attempts=None):
+    """
+    Queue `task` (a function or its dotted path) to run in a worker.
+
+    The row is written in the caller's transaction, so the job only becomes
+    visible to workers if that transaction commits.
+    """
+    if callable(task):
+        task = task_path(task)
+    # Fail now, not in the worker, if the task can't be imported
+    import_string(task)
+    return Job.objects.create(
+        task=task,
+        args=list(args),
+        kwargs=kwargs or {},
+        queue=queue,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def claim_jobs(batch_size=10, queue='default', worker=WORKER_ID):
+    """
+    Claim up to `batch_size` due PENDING jobs from `queue` for the calling worker.
+
+    Claims older than JOB_CLAIM_TIMEOUT (left behind by a crashed worker) are
+    released back to PENDING first. The lookup walks the (queue, status,
+    run_at) index, so its cost depends on the batch size rather than on how
+    many jobs are queued.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.JOB_CLAIM_TIMEOUT)
+
+    with transaction.atomic():
+        Job.objects.filter(
+            queue=queue, status='PROCESSING', claimed_at__lt=stale_before
+        ).update(status='PENDING', claimed_at=None, claimed_by='')
+
+        due = Job.objects.filter(queue=queue, status='PENDING', run_at__lte=now).order_by('run_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:batch_size])
+
+        Job.objects.filter(id__in=ids, status='PENDING').update(
+            status='PROCESSING', claimed_at=now, claimed_by=worker
+        )
+
+    return list(
+        Job.objects.filter(id__in=ids, status='PROCESSING', claimed_at=now, claimed_by=worker)
+        .order_by('run_at', 'id')
+    )
+
+
+def execute(task, args, kwargs):
+    """
+    Import and call one task, returning None or the formatted error.
+
+    Module-level so process pools can pickle it; exceptions are turned into
+    text here because not every exception survives the trip between processes.
+    """
+    try:
+        import_string(task)(*args, **kwargs)
+    except Exception:
+        return traceback.format_exc(limit=20)
+    finally:
+        # Pool threads and processes outlive jobs; don't leak their DB connections
+        close_old_connections()
+    return None
+
+
+def retry_delay(attempts):
+    """Exponential backoff capped at JOB_RETRY_MAX_DELAY, plus up to 10% jitter."""
+    delay = min(
+        settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.JOB_RETRY_MAX_DELAY
+    )
+    return delay + random.uniform(0, delay * 0.1)
+
+
+def run_jobs(jobs, pool=None):
+    """
+    Run claimed jobs, on `pool` (a concurrent.futures executor) if given, and
+    record each outcome in one bulk update from the calling thread.
+
+    Returns the number of jobs that succeeded.
+    """
+    if not jobs:
+        return 0
+
+    if pool is None:
+        errors = [execute(job.task, job.args, job.kwargs) for job in jobs]
+    else:
+        futures = [pool.submit(execute, job.task, job.args, job.kwargs) for job in jobs]
+        errors = []
+        for future in futures:
+            try:
+                errors.append(future.result())
+            except Exception:
+                # The pool itself failed (e.g. a worker process died)
+                errors.append(traceback.format_exc(limit=20))
+
+    now = timezone.now()
+    for job, error in zip(jobs, errors):
+        job.attempts += 1
+        job.claimed_at = None
+        job.claimed_by = ''
+        job.last_error = error or ''
+        if error is None:
+            job.status = 'DONE'
+            job.finished_at = now
+        elif job.attempts >= job.max_attempts:
+            job.status = 'FAILED'
+            job.finished_at = now
+        else:
+            job.status = 'PENDING'
+            job.run_at = now + timedelta(seconds=retry_delay(job.attempts))
+
+    Job.objects.bulk_update(jobs, [
+        'status', 'attempts', 'run_at', 'claimed_at', 'claimed_by', 'finished_at', 'last_error',
+    ])
+    return sum(1 for error in errors if error is None)
+
+
+class QueueExecutor:
+    """
+    Side-effect executor (see config/executors.py) that hands work to runworker.
+
+    Select it with SIDE_EFFECT_EXECUTOR='queue'. The function must be defined at
+    module level and its arguments must be JSON-serializable.
+    """
+
+    # run_on_commit enqueues in the caller's transaction instead of after it
+    transactional = True
+
+    def submit(self, func, *args, **kwargs):
+        return enqueue(func, args, kwargs)
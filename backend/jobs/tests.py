@@ -0,0 +1,166 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from leaves.models import LeaveType, LeaveRequest, LeaveBalance
+from notifications.utils import send_emails, send_leave_status_changed_notification
+from config.executors import get_executor, run_on_commit
+from .models import Job
+from .queue import QueueExecutor, claim_jobs, enqueue, run_jobs
+from datetime import date, timedelta
+from io import StringIO
+
+User = get_user_model()
+
+CALLS = []
+
+
+def record_call(value, label=''):
+    CALLS.append((value, label))
+
+
+def fail():
+    raise ValueError('boom')
+
+
+class TestEnqueue(TestCase):
+    """Test jobs are stored by dotted path with JSON arguments."""
+
+    def test_enqueue_function(self):
+        """Test a function is stored by its dotted path."""
+        job = enqueue(record_call, args=(1,), kwargs={'label': 'x'})
+
+        self.assertEqual(job.task, 'jobs.tests.record_call')
+        self.assertEqual(job.args, [1])
+        self.assertEqual(job.kwargs, {'label': 'x'})
+        self.assertEqual(job.status, 'PENDING')
+
+    def test_unknown_task_rejected(self):
+        """Test a task that can't be imported fails at enqueue time."""
+        with self.assertRaises(ImportError):
+            enqueue('jobs.tests.missing')
+        self.assertFalse(Job.objects.exists())
+
+
+class TestClaimJobs(TestCase):
+    """Test claiming due jobs."""
+
+    def test_claims_due_jobs_once(self):
+        """Test due jobs are claimed by one worker and not handed out again."""
+        due = [enqueue(record_call, args=(i,)) for i in range(3)]
+        enqueue(record_call, args=(9,), run_at=timezone.now() + timedelta(hours=1))
+        enqueue(record_call, args=(8,), queue='reports')
+
+        claimed = claim_jobs(10, worker='a')
+
+        self.assertEqual([job.id for job in claimed], [job.id for job in due])
+        self.assertTrue(all(job.status == 'PROCESSING' and job.claimed_by == 'a' for job in claimed))
+        self.assertEqual(claim_jobs(10, worker='b'), [])
+
+    @override_settings(JOB_CLAIM_TIMEOUT=60)
+    def test_stale_claims_released(self):
+        """Test jobs left PROCESSING by a crashed worker are claimed again."""
+        job = enqueue(record_call, args=(1,))
+        Job.objects.filter(pk=job.pk).update(
+            status='PROCESSING', claimed_at=timezone.now() - timedelta(minutes=5), claimed_by='dead'
+        )
+
+        self.assertEqual([j.id for j in claim_jobs(10, worker='b')], [job.id])
+
+
+class TestRunJobs(TestCase):
+    """Test outcomes, retries and the runworker command."""
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_success(self):
+        """Test a successful job runs with its arguments and is marked DONE."""
+        enqueue(record_call, args=(1,), kwargs={'label': 'x'})
+
+        self.assertEqual(run_jobs(claim_jobs()), 1)
+
+        self.assertEqual(CALLS, [(1, 'x')])
+        job = Job.objects.get()
+        self.assertEqual(job.status, 'DONE')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failure_retries_then_fails(self):
+        """Test failures back off and the job is marked FAILED after its last attempt."""
+        enqueue(fail, max_attempts=2)
+
+        run_jobs(claim_jobs())
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), ('PENDING', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('ValueError: boom', job.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        run_jobs(claim_jobs())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+
+    def test_runworker_drains_queue(self):
+        """Test runworker runs every queued job on its thread pool and exits with --once."""
+        for i in range(5):
+            enqueue(send_emails, args=([[f'Subject {i}', 'Body', 'from@test.com', [f'user{i}@test.com']]],))
+
+        out = StringIO()
+        call_command('runworker', '--once', '--concurrency', '2', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(Job.objects.filter(status='DONE').count(), 5)
+        self.assertIn('Ran 2/2 jobs', out.getvalue())
+
+    def test_rebuild_command_enqueue(self):
+        """Test ledger rebuilds can be handed to the worker."""
+        employee = User.objects.create_user(username='employee', password='test123', role='EMPLOYEE')
+        leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        LeaveRequest.objects.create(
+            user=employee, leave_type=leave_type, reason='Test', status='APPROVED',
+            start_date=date(2030, 1, 7), end_date=date(2030, 1, 8),
+        )
+
+        call_command('rebuild_leave_balances', '--enqueue', '--year', '2030', stdout=StringIO())
+        self.assertFalse(LeaveBalance.objects.exists())
+
+        run_jobs(claim_jobs())
+        self.assertEqual(LeaveBalance.objects.get(year=2030).used_days, 2)
+
+
+@override_settings(SIDE_EFFECT_EXECUTOR='queue')
+class TestQueueExecutor(TestCase):
+    """Test post-commit side effects can be queued for the worker."""
+
+    def test_status_email_queued(self):
+        """Test the status email is queued in the caller's transaction."""
+        employee = User.objects.create_user(username='employee', email='employee@test.com', role='EMPLOYEE')
+        manager = User.objects.create_user(username='manager', role='MANAGER')
+        leave = LeaveRequest.objects.create(
+            user=employee, leave_type=LeaveType.objects.create(name='Sick Leave', days_allowed=10),
+            start_date=date(2030, 1, 7), end_date=date(2030, 1, 8), reason='Test', status='APPROVED',
+        )
+        self.assertIsInstance(get_executor(), QueueExecutor)
+
+        # The on-commit callbacks are not run: the job must already be stored
+        with self.captureOnCommitCallbacks():
+            send_leave_status_changed_notification(leave, 'approve', manager)
+
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get()
+        self.assertEqual(job.task, 'notifications.utils.send_emails')
+
+        run_jobs(claim_jobs())
+        self.assertEqual([message.to for message in mail.outbox], [['employee@test.com']])
+
+    def test_rolled_back_job_discarded(self):
+        """Test a job queued in a transaction that rolls back is never stored."""
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                run_on_commit(record_call, 1)
+                self.assertEqual(Job.objects.count(), 1)
+                fail()
+
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,86 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from .models import DailyAbsence, LeaveRequest
+
+"""
+Maintenance and reads of the DailyAbsence occupancy table.
+
+Approving a leave adds one row per day it covers; moving it out of APPROVED
+removes them. `team_calendar` turns a date range into per-day counts and names
+with a single range query on the (date, user) index.
+"""
+
+def _days(leave):
+    return (leave.start_date + timedelta(days=offset) for offset in range((leave.end_date - leave.start_date).days + 1))
+
+
+def record_absence_days(leaves):
+    """Add the days of newly approved leaves (one INSERT for the batch)."""
+    DailyAbsence.objects.bulk_create([
+        DailyAbsence(leave_id=leave.id, user_id=leave.user_id, date=day)
+        for leave in leaves
+        for day in _days(leave)
+    ], ignore_conflicts=True)
+
+
+def clear_absence_days(leaves):
+    DailyAbsence.objects.filter(leave_id__in=[leave.id for leave in leaves]).delete()
+
+
+def apply_absence_change(leave, previous_status, new_status):
+    """Keep the calendar in step with an approve/reject transition."""
+    if new_status == 'APPROVED' and previous_status != 'APPROVED':
+        record_absence_days([leave])
+    elif previous_status == 'APPROVED' and new_status != 'APPROVED':
+        clear_absence_days([leave])
+
+
+def rebuild_absence_days(batch_size=2000):
+    """Recreate the table from approved leaves. Returns the number of rows written."""
+    count = 0
+    with transaction.atomic():
+        DailyAbsence.objects.all().delete()
+        batch = []
+        approved = LeaveRequest.objects.filter(status='APPROVED').only('id', 'user_id', 'start_date', 'end_date')
+        for leave in approved.iterator(chunk_size=batch_size):
+            batch.extend(DailyAbsence(leave_id=leave.id, user_id=leave.user_id, date=day) for day in _days(leave))
+            if len(batch) >= batch_size:
+                DailyAbsence.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        DailyAbsence.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def team_calendar(users, date_from, date_to):
+    """
+    Per-day absences for `users` (a CustomUser queryset) between two dates.
+    
+    Returns a list with one entry per day in the range, including days when
+    nobody is out.
+    """
+    rows = (
+        DailyAbsence.objects.filter(date__gte=date_from, date__lte=date_to, user__in=users)
+        .order_by('date', 'user__username')
+        .values_list(
+            'date', 'user_id', 'user__username', 'user__first_name', 'user__last_name',
+            'leave_id', 'leave__leave_type__name',
+        )
+    )
+    people = defaultdict(list)
+    for day, user_id, username, first_name, last_name, leave_id, leave_type in rows:
+        people[day].append({
+            'user_id': user_id,
+            'name': f'{first_name} {last_name}'.strip() or username,
+            'leave_id': leave_id,
+            'leave_type': leave_type,
+        })
+    
+    calendar = []
+    day = date_from
+    while day <= date_to:
+        calendar.append({'date': day, 'count': len(people[day]), 'people': people[day]})
+        day += timedelta(days=1)
+    return calendar
@@ -0,0 +1,151 @@
+from collections import defaultdict
+from datetime import date
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+from .models import LeaveBalance, LeaveRequest, LeaveType, leave_duration
+
+"""
+Maintenance of the LeaveBalance ledger.
+
+`record_leave_usage` applies a single approval (or its reversal) incrementally,
+`record_bulk_leave_usage` does the same for a batch in a fixed number of
+queries, and `rebuild_balances` recomputes the ledger from LeaveRequest in bulk.
+"""
+
+def days_by_year(start_date, end_date):
+    """Split an inclusive date range into {year: days}, for leaves spanning New Year."""
+    days = {}
+    for year in range(start_date.year, end_date.year + 1):
+        first = max(start_date, date(year, 1, 1))
+        last = min(end_date, date(year, 12, 31))
+        days[year] = (last - first).days + 1
+    return days
+
+
+def record_leave_usage(leave, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) an approved leave's days from the ledger.
+    
+    Uses an F() update so concurrent approvals for the same balance row don't
+    overwrite each other.
+    """
+    for year, days in days_by_year(leave.start_date, leave.end_date).items():
+        balance, _ = LeaveBalance.objects.get_or_create(
+            user_id=leave.user_id,
+            leave_type_id=leave.leave_type_id,
+            year=year,
+            defaults={'allowed_days': leave.leave_type.days_allowed},
+        )
+        LeaveBalance.objects.filter(pk=balance.pk).update(
+            used_days=F('used_days') + sign * days
+        )
+
+
+def record_bulk_leave_usage(leaves, sign=1):
+    """
+    Add (or remove) the days of many approved leaves in three queries.
+    
+    Missing balance rows are inserted in one statement, the affected rows are
+    read back, and all increments are applied by one UPDATE with a CASE per row.
+    `leaves` must have leave_type loaded.
+    """
+    deltas = defaultdict(int)
+    allowed = {}
+    for leave in leaves:
+        allowed[leave.leave_type_id] = leave.leave_type.days_allowed
+        for year, days in days_by_year(leave.start_date, leave.end_date).items():
+            deltas[(leave.user_id, leave.leave_type_id, year)] += sign * days
+    if not deltas:
+        return
+    
+    LeaveBalance.objects.bulk_create([
+        LeaveBalance(user_id=user_id, leave_type_id=leave_type_id, year=year,
+                     allowed_days=allowed[leave_type_id])
+        for user_id, leave_type_id, year in deltas
+    ], ignore_conflicts=True)
+    
+    keys = Q()
+    for user_id, leave_type_id, year in deltas:
+        keys |= Q(user_id=user_id, leave_type_id=leave_type_id, year=year)
+    rows = LeaveBalance.objects.filter(keys).values_list('id', 'user_id', 'leave_type_id', 'year')
+    
+    LeaveBalance.objects.filter(id__in=[row[0] for row in rows]).update(
+        used_days=F('used_days') + Case(
+            *[When(id=row[0], then=Value(deltas[row[1:]])) for row in rows],
+            default=Value(0),
+        )
+    )
+
+
+def apply_status_change(leave, previous_status, new_status):
+    """Keep the ledger in step with an approve/reject transition."""
+    if new_status == 'APPROVED' and previous_status != 'APPROVED':
+        record_leave_usage(leave, 1)
+    elif previous_status == 'APPROVED' and new_status != 'APPROVED':
+        record_leave_usage(leave, -1)
+
+
+def rebuild_balances(year=None, batch_size=1000):
+    """
+    Recompute LeaveBalance rows from approved LeaveRequests.
+    
+    Leaves that fall within one calendar year (nearly all of them) are summed in
+    the database, grouped by (user, leave type, year). The few that cross New
+    Year are split in Python. Existing rows for the year (or all years) are
+    replaced in one transaction. Rows for past years keep their recorded
+    allowance; the rest get the leave type's current `days_allowed`. Returns
+    the number of balances written.
+    """
+    approved = LeaveRequest.objects.filter(status='APPROVED')
+    if year is not None:
+        approved = approved.filter(start_date__year__lte=year, end_date__year__gte=year)
+    
+    single_year = Q(start_date__year=ExtractYear('end_date'))
+    totals = defaultdict(int)
+    
+    rows = (
+        approved.filter(single_year)
+        .annotate(year=ExtractYear('start_date'))
+        .values('user_id', 'leave_type_id', 'year')
+        .annotate(duration=Sum(leave_duration()), leaves=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        totals[(row['user_id'], row['leave_type_id'], row['year'])] += row['duration'].days + row['leaves']
+    
+    spanning = approved.exclude(single_year).only('user_id', 'leave_type_id', 'start_date', 'end_date')
+    for leave in spanning.iterator():
+        for leave_year, days in days_by_year(leave.start_date, leave.end_date).items():
+            totals[(leave.user_id, leave.leave_type_id, leave_year)] += days
+    
+    if year is not None:
+        totals = {key: days for key, days in totals.items() if key[2] == year}
+    
+    allowed = dict(LeaveType.objects.values_list('id', 'days_allowed'))
+    
+    with transaction.atomic():
+        existing = LeaveBalance.objects.all()
+        if year is not None:
+            existing = existing.filter(year=year)
+        recorded = {
+            (user_id, leave_type_id, balance_year): allowed_days
+            for user_id, leave_type_id, balance_year, allowed_days in existing.filter(
+                year__lt=timezone.now().year
+            ).values_list('user_id', 'leave_type_id', 'year', 'allowed_days')
+        }
+        balances = [
+            LeaveBalance(
+                user_id=user_id,
+                leave_type_id=leave_type_id,
+                year=balance_year,
+                allowed_days=recorded.get((user_id, leave_type_id, balance_year), allowed[leave_type_id]),
+                used_days=days,
+            )
+            for (user_id, leave_type_id, balance_year), days in totals.items()
+        ]
+        existing.delete()
+        LeaveBalance.objects.bulk_create(balances, batch_size=batch_size)
+    
+    return len(balances)
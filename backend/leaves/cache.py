@@ -0,0 +1,83 @@
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import LeaveRequest
+
+"""
+Cached dashboard counters for ManagerStatsView.
+
+Each manager's counters live in the cache (see CACHES in settings) under a key
+that includes the current date, so "approved today" rolls over by itself.
+Leaves of a manager's direct reports invalidate only that manager's entry;
+leaves of unassigned employees count for every manager, so they bump a shared
+generation number that is part of every key instead of deleting keys one by one.
+"""
+
+GENERATION_KEY = 'manager-stats:generation'
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def _stats_key(manager_id, generation=None):
+    if generation is None:
+        generation = _generation()
+    today = timezone.localdate().isoformat()
+    return f'manager-stats:{generation}:{manager_id}:{today}'
+
+
+def compute_manager_stats(manager):
+    """Aggregate the counters from the database, scoped to the manager's team."""
+    # Range filter on updated_at (instead of __date) so the index can be used
+    start_of_day = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    return LeaveRequest.objects.for_manager(manager).aggregate(
+        pending=Count('id', filter=Q(status='PENDING')),
+        approved_today=Count('id', filter=Q(
+            status='APPROVED',
+            updated_at__gte=start_of_day,
+            updated_at__lt=start_of_day + timedelta(days=1),
+        )),
+        rejected_total=Count('id', filter=Q(status='REJECTED'))
+    )
+
+
+def get_manager_stats(manager):
+    """Return the manager's counters, computing them only on a cache miss."""
+    key = _stats_key(manager.id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_manager_stats(manager)
+        cache.set(key, stats, settings.MANAGER_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_all_manager_stats():
+    """Invalidate every manager's counters by moving to a new key generation."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, timeout=None)
+
+
+def invalidate_manager_stats(leave):
+    """Drop cached counters affected by a change to `leave`."""
+    manager_id = leave.user.manager_id
+    if manager_id is None:
+        # Unassigned employees are visible to every manager
+        invalidate_all_manager_stats()
+    else:
+        cache.delete(_stats_key(manager_id))
+
+
+def invalidate_manager_stats_for(leaves):
+    """Drop cached counters affected by a batch of leaves (with `user` loaded)."""
+    manager_ids = {leave.user.manager_id for leave in leaves}
+    if None in manager_ids:
+        # The new generation invalidates every manager at once
+        invalidate_all_manager_stats()
+    elif manager_ids:
+        generation = _generation()
+        cache.delete_many([_stats_key(manager_id, generation) for manager_id in manager_ids])
@@ -0,0 +1,60 @@
+from collections import defaultdict
+from .models import LeaveRequest
+
+"""
+Overlap checks used when approving leaves in bulk.
+
+A single approval checks for an overlapping approved leave with one indexed
+probe (see LeaveRequestQuerySet.overlapping). For a batch, all approved leaves
+of the affected users within the batch's date span are read in one query and
+the candidates are checked in memory, including against each other.
+
+Both run in the transaction that applies the approval, after
+`lock_blocking_leaves` has locked the users' approved and pending leaves, so a
+concurrent approval of an overlapping leave either commits first and is seen
+by the check, or waits until this one commits.
+"""
+
+def lock_blocking_leaves(user_ids):
+    """
+    Lock the approved and pending leaves of `user_ids` until the transaction ends.
+    
+    Must be called inside transaction.atomic(). Rows are locked in id order so
+    concurrent batches can't deadlock. On SQLite, which has no row locks, the
+    database-wide write lock serializes the transactions instead.
+    """
+    list(
+        LeaveRequest.objects.filter(user_id__in=user_ids).blocking()
+        .select_for_update().order_by('id').values_list('id', flat=True)
+    )
+
+
+def approval_conflicts(candidates):
+    """
+    Find candidates that can't be approved because they overlap an approved leave.
+    
+    `candidates` is a list of (id, user_id, start_date, end_date) in the order
+    they would be approved; a candidate also conflicts with an earlier candidate
+    from the same batch. Returns {candidate_id: conflicting_leave_id}.
+    """
+    if not candidates:
+        return {}
+    
+    approved = (
+        LeaveRequest.objects.filter(user_id__in={c[1] for c in candidates}, status='APPROVED')
+        .overlapping(min(c[2] for c in candidates), max(c[3] for c in candidates))
+        .values_list('id', 'user_id', 'start_date', 'end_date')
+    )
+    taken = defaultdict(list)
+    for leave_id, user_id, start_date, end_date in approved:
+        taken[user_id].append((start_date, end_date, leave_id))
+    
+    conflicts = {}
+    for leave_id, user_id, start_date, end_date in candidates:
+        for taken_start, taken_end, taken_id in taken[user_id]:
+            if taken_id != leave_id and taken_start <= end_date and taken_end >= start_date:
+                conflicts[leave_id] = taken_id
+                break
+        else:
+            taken[user_id].append((start_date, end_date, leave_id))
+    return conflicts
@@ -0,0 +1,91 @@
+import csv
+import json
+from datetime import date, datetime
+
+"""
+Streaming CSV / JSON-lines exports for HR.
+
+Rows are read with `values_list(...).iterator(chunk_size=...)`, which avoids
+building model instances and (on PostgreSQL) uses a server-side cursor, and
+are written out as they arrive. Output is flushed in blocks of roughly
+FLUSH_BYTES so the response is a steady stream of modest chunks; memory use
+does not depend on the number of rows exported.
+"""
+
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+LEAVE_COLUMNS = (
+    ('id', 'id'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('email', 'user__email'),
+    ('leave_type', 'leave_type__name'),
+    ('start_date', 'start_date'),
+    ('end_date', 'end_date'),
+    ('status', 'status'),
+    ('reason', 'reason'),
+    ('manager_comment', 'manager_comment'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+
+AUDIT_LOG_COLUMNS = (
+    ('id', 'id'),
+    ('leave_id', 'leave_id'),
+    ('action', 'action'),
+    ('previous_status', 'previous_status'),
+    ('new_status', 'new_status'),
+    ('action_by', 'action_by__username'),
+    ('comment', 'comment'),
+    ('timestamp', 'timestamp'),
+)
+
+
+class _Buffer:
+    """File-like object collecting what csv.writer writes."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, value):
+        self.parts.append(value)
+        self.size += len(value)
+
+    def drain(self):
+        data = ''.join(self.parts).encode('utf-8')
+        self.parts = []
+        self.size = 0
+        return data
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def stream_rows(queryset, columns, fmt='csv', chunk_size=CHUNK_SIZE):
+    """Yield the encoded export of `queryset`, one block of rows at a time."""
+    names = [name for name, _ in columns]
+    rows = queryset.values_list(*[lookup for _, lookup in columns]).iterator(chunk_size=chunk_size)
+    buffer = _Buffer()
+
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        for row in rows:
+            writer.writerow([_plain(value) for value in row])
+            if buffer.size >= FLUSH_BYTES:
+                yield buffer.drain()
+    else:
+        for row in rows:
+            buffer.write(json.dumps(dict(zip(names, map(_plain, row)))) + '\n')
+            if buffer.size >= FLUSH_BYTES:
+                yield buffer.drain()
+
+    if buffer.size:
+        yield buffer.drain()
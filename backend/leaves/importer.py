@@ -0,0 +1,277 @@
+import codecs
+import csv
+import json
+from datetime import date, datetime
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, Q, Value, When
+from django.db.models.functions import Lower
+from django.utils import timezone
+from .absences import record_absence_days
+from .balances import record_bulk_leave_usage
+from .cache import invalidate_all_manager_stats
+from .models import LeaveAuditLog, LeaveRequest, LeaveType
+
+"""
+Bulk import of leave history from CSV or JSON-lines files.
+
+Rows are read lazily from the stream, validated in chunks, and written with
+one bulk INSERT per chunk for LeaveRequest and LeaveAuditLog, so memory stays
+flat however large the file is. Users and leave types are resolved through
+lookup caches that cost one query per chunk for users not seen before.
+
+Imports don't send emails or webhooks; approved rows are added to the
+LeaveBalance ledger and the DailyAbsence calendar per chunk, and the manager
+dashboard caches are invalidated once at the end.
+
+Columns (CSV header or JSON keys):
+    username or email   the employee
+    leave_type          leave type name (or leave_type_id)
+    start_date          YYYY-MM-DD
+    end_date            YYYY-MM-DD
+    reason              optional
+    status              PENDING, APPROVED or REJECTED (default PENDING)
+    manager_comment     optional
+    created_at          optional ISO 8601 timestamp of the original request
+"""
+
+User = get_user_model()
+
+FORMATS = ('csv', 'ndjson')
+STATUSES = {choice for choice, _ in LeaveRequest.STATUS_CHOICES}
+
+# Errors kept in the report; further errors are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def _text(row, key):
+    value = row.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def detect_format(filename='', content_type=''):
+    """Guess the file format from its name or content type (CSV by default)."""
+    name = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    return 'csv'
+
+
+def iter_rows(stream, fmt='csv'):
+    """
+    Yield (line_number, row_dict) from a binary or text stream, one row at a time.
+
+    A JSON line that isn't an object is yielded as a string so the importer can
+    report it against its line number.
+    """
+    if not isinstance(stream.read(0), str):
+        stream = codecs.getreader('utf-8-sig')(stream)
+
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = 'invalid JSON'
+        yield line_number, row if isinstance(row, dict) else str(row)
+
+
+def set_timestamps(model, field_names, values):
+    """
+    Overwrite auto_now/auto_now_add fields with per-row datetimes.
+
+    `values` is a list of (pk, datetime), written with one
+    `UPDATE ... SET f = CASE id WHEN ...` per batch of rows. The fields are
+    corrected after the insert rather than switched off for it: field metadata
+    is shared by every thread in the process, and other requests keep saving
+    these models while an import runs.
+    """
+    if not values:
+        return
+    max_params = connection.features.max_query_params or 30000
+    batch_size = max(1, max_params // (2 * len(field_names) + 1))
+    for offset in range(0, len(values), batch_size):
+        batch = values[offset:offset + batch_size]
+        value = Case(*[When(pk=pk, then=Value(at)) for pk, at in batch], output_field=DateTimeField())
+        model.objects.filter(pk__in=[pk for pk, _ in batch]).update(**{name: value for name in field_names})
+
+
+class LeaveImporter:
+    """
+    Validate and insert leave rows in chunks.
+
+    `actor` is recorded as `action_by` on the audit rows. With `dry_run` rows are
+    validated (including user and leave type lookups) but nothing is written.
+    """
+
+    def __init__(self, chunk_size=1000, actor=None, dry_run=False):
+        self.chunk_size = chunk_size
+        self.actor = actor
+        self.dry_run = dry_run
+        self.leave_types = {}
+        self.users = {}
+        self.report = {'rows': 0, 'imported': 0, 'failed': 0, 'errors': []}
+
+        for leave_type in LeaveType.objects.all():
+            self.leave_types[str(leave_type.id)] = leave_type
+            self.leave_types.setdefault(leave_type.name.strip().lower(), leave_type)
+
+    def run(self, rows):
+        """Import an iterable of (line_number, row) pairs and return the report."""
+        chunk = []
+        for line_number, row in rows:
+            chunk.append((line_number, row))
+            if len(chunk) >= self.chunk_size:
+                self._process(chunk)
+                chunk = []
+        if chunk:
+            self._process(chunk)
+
+        if self.report['imported']:
+            invalidate_all_manager_stats()
+        return self.report
+
+    def _error(self, line_number, message):
+        self.report['failed'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'line': line_number, 'error': message})
+
+    def _resolve_users(self, rows):
+        """Load users referenced by this chunk that aren't cached yet (one query)."""
+        usernames = set()
+        emails = set()
+        for _, row in rows:
+            if not isinstance(row, dict):
+                continue
+            username = _text(row, 'username')
+            email = _text(row, 'email').lower()
+            if username and f'u:{username}' not in self.users:
+                usernames.add(username)
+            elif not username and email and f'e:{email}' not in self.users:
+                emails.add(email)
+        if not usernames and not emails:
+            return
+
+        for username in usernames:
+            self.users[f'u:{username}'] = None
+        for email in emails:
+            self.users[f'e:{email}'] = None
+        found = User.objects.annotate(email_lower=Lower('email')).filter(
+            Q(username__in=usernames) | Q(email_lower__in=emails)
+        )
+        for user_id, username, email in found.values_list('id', 'username', 'email'):
+            if username in usernames:
+                self.users[f'u:{username}'] = user_id
+            key = f'e:{email.lower()}'
+            if email.lower() in emails and self.users.get(key) is None:
+                self.users[key] = user_id
+
+    def _parse(self, row):
+        """Turn a raw row into LeaveRequest field values, or raise ValueError."""
+        if not isinstance(row, dict):
+            raise ValueError(f'Expected an object, got {row}')
+
+        username = _text(row, 'username')
+        email = _text(row, 'email').lower()
+        if username:
+            user_id = self.users.get(f'u:{username}')
+        elif email:
+            user_id = self.users.get(f'e:{email}')
+        else:
+            raise ValueError('username or email is required')
+        if user_id is None:
+            raise ValueError(f'Unknown user {username or email}')
+
+        type_key = (_text(row, 'leave_type_id') or _text(row, 'leave_type')).lower()
+        leave_type = self.leave_types.get(type_key)
+        if leave_type is None:
+            raise ValueError(f'Unknown leave type {type_key!r}')
+
+        try:
+            start_date = date.fromisoformat(_text(row, 'start_date'))
+            end_date = date.fromisoformat(_text(row, 'end_date'))
+        except ValueError:
+            raise ValueError('start_date and end_date must be YYYY-MM-DD')
+        if end_date < start_date:
+            raise ValueError('end_date is before start_date')
+
+        status = (_text(row, 'status') or 'PENDING').upper()
+        if status not in STATUSES:
+            raise ValueError(f'Invalid status {status!r}')
+
+        created_at = None
+        if _text(row, 'created_at'):
+            try:
+                created_at = datetime.fromisoformat(_text(row, 'created_at'))
+            except ValueError:
+                raise ValueError('created_at must be an ISO 8601 timestamp')
+            if timezone.is_naive(created_at):
+                created_at = timezone.make_aware(created_at)
+
+        return {
+            'user_id': user_id,
+            'leave_type': leave_type,
+            'start_date': start_date,
+            'end_date': end_date,
+            'reason': _text(row, 'reason'),
+            'status': status,
+            'manager_comment': _text(row, 'manager_comment') or None,
+        }, created_at
+
+    def _process(self, chunk):
+        self.report['rows'] += len(chunk)
+        self._resolve_users(chunk)
+
+        leaves = []
+        created = []
+        for line_number, row in chunk:
+            try:
+                fields, created_at = self._parse(row)
+            except ValueError as e:
+                self._error(line_number, str(e))
+                continue
+            leaves.append(LeaveRequest(**fields))
+            created.append(created_at)
+
+        if not leaves or self.dry_run:
+            self.report['imported'] += len(leaves)
+            return
+
+        with transaction.atomic():
+            leaves = LeaveRequest.objects.bulk_create(leaves)
+            logs = LeaveAuditLog.objects.bulk_create([
+                LeaveAuditLog(
+                    leave=leave,
+                    action_by=self.actor,
+                    action='IMPORTED',
+                    new_status=leave.status,
+                    comment='Imported from file',
+                )
+                for leave in leaves
+            ])
+
+            # auto_now_add stamped the import time; restore original timestamps where given
+            backdated = [
+                (leave, log, created_at)
+                for leave, log, created_at in zip(leaves, logs, created)
+                if created_at is not None
+            ]
+            set_timestamps(LeaveRequest, ['created_at', 'updated_at'], [(leave.id, at) for leave, _, at in backdated])
+            set_timestamps(LeaveAuditLog, ['timestamp'], [(log.id, at) for _, log, at in backdated])
+            for leave, log, created_at in backdated:
+                leave.created_at = leave.updated_at = log.timestamp = created_at
+
+            approved = [leave for leave in leaves if leave.status == 'APPROVED']
+            record_bulk_leave_usage(approved)
+            record_absence_days(approved)
+
+        self.report['imported'] += len(leaves)
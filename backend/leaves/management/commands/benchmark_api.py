@@ -0,0 +1,186 @@
+import json
+import platform
+import statistics
+import time
+from datetime import date, timedelta
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from leaves.models import LeaveRequest, LeaveType
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Raised to undo the writes made by a benchmarked request."""
+
+
+class Command(BaseCommand):
+    help = 'Drive the leave and user API endpoints in-process and report latency, query counts and throughput as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per endpoint')
+        parser.add_argument(
+            '--include-writes', action='store_true',
+            help='Also benchmark create/approve/register; each request is rolled back',
+        )
+        parser.add_argument(
+            '--password', default='password123',
+            help='Password of the benchmarked employee, used for the token endpoint',
+        )
+        parser.add_argument('--endpoint', action='append', help='Only run these endpoints (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1')
+
+        employee = User.objects.filter(role='EMPLOYEE', manager__isnull=False, leaves__isnull=False).first()
+        hr = User.objects.filter(role='HR').first()
+        if employee is None or hr is None:
+            raise CommandError('No data to benchmark; run seed_data first.')
+        manager = employee.manager
+
+        clients = {
+            'anonymous': self._client(None),
+            'employee': self._client(employee),
+            'manager': self._client(manager),
+            'hr': self._client(hr),
+        }
+        leave = LeaveRequest.objects.filter(user=employee).order_by('-created_at').first()
+        pending = LeaveRequest.objects.for_manager(manager).filter(status='PENDING').first()
+        leave_type = LeaveType.objects.first()
+        year = date.today().year
+
+        endpoints = {
+            'auth_token': ('anonymous', 'post', '/api/auth/token/',
+                           {'username': employee.username, 'password': options['password']}),
+            'auth_me': ('employee', 'get', '/api/auth/me/', None),
+            'leaves_list_employee': ('employee', 'get', '/api/leaves/', None),
+            'leaves_list_manager': ('manager', 'get', '/api/leaves/', None),
+            'leaves_list_hr': ('hr', 'get', '/api/leaves/', None),
+            'leave_detail': ('employee', 'get', f'/api/leaves/{leave.id}/', None),
+            'leave_audit': ('employee', 'get', f'/api/leaves/{leave.id}/audit/', None),
+            'leave_types': ('employee', 'get', '/api/leave-types/', None),
+            'employee_stats': ('employee', 'get', '/api/employee-stats/', None),
+            'leave_balances': ('employee', 'get', f'/api/leave-balances/?year={year}', None),
+            'manager_queue': ('manager', 'get', '/api/manager-queue/', None),
+            'manager_stats': ('manager', 'get', '/api/manager-stats/', None),
+            'hr_summary': ('hr', 'get', '/api/hr-summary/', None),
+        }
+        if options['include_writes']:
+            start = date.today() + timedelta(days=400)
+            endpoints['leave_create'] = ('employee', 'post', '/api/leaves/', {
+                'leave_type_id': leave_type.id,
+                'start_date': start.isoformat(),
+                'end_date': (start + timedelta(days=1)).isoformat(),
+                'reason': 'Benchmark',
+            })
+            if pending is not None:
+                endpoints['leave_approve'] = ('manager', 'post', f'/api/leaves/{pending.id}/action/',
+                                              {'action': 'approve', 'comment': 'Benchmark'})
+            endpoints['auth_register'] = ('anonymous', 'post', '/api/auth/register/', {
+                'username': 'benchmark_register', 'email': 'benchmark_register@example.com',
+                'password': 'Benchmark-password-1', 'role': 'EMPLOYEE',
+            })
+
+        if options['endpoint']:
+            unknown = set(options['endpoint']) - set(endpoints)
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            endpoints = {name: spec for name, spec in endpoints.items() if name in options['endpoint']}
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'vendor': connection.vendor,
+                'requests_per_endpoint': options['requests'],
+                'dataset': {
+                    'users': User.objects.count(),
+                    'leave_requests': LeaveRequest.objects.count(),
+                },
+            },
+            'endpoints': {},
+        }
+
+        # Keep notification emails off the console while benchmarking writes
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            for name, (role, method, path, data) in endpoints.items():
+                report['endpoints'][name] = self._run(
+                    clients[role], method, path, data, options['requests'], options['warmup'],
+                    rollback=method == 'post' and name != 'auth_token',
+                )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _client(self, user):
+        client = APIClient(SERVER_NAME='localhost')
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def _request(self, client, method, path, data, rollback):
+        if not rollback:
+            return getattr(client, method)(path, data, format='json')
+        try:
+            with transaction.atomic():
+                response = getattr(client, method)(path, data, format='json')
+                raise Rollback
+        except Rollback:
+            return response
+
+    def _run(self, client, method, path, data, requests, warmup, rollback):
+        for _ in range(warmup):
+            self._request(client, method, path, data, rollback)
+
+        latencies = []
+        query_counts = []
+        query_times = []
+        statuses = {}
+        started = time.perf_counter()
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                request_started = time.perf_counter()
+                response = self._request(client, method, path, data, rollback)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            # SAVEPOINT/RELEASE statements from the rollback wrapper are not the endpoint's
+            executed = [q for q in queries.captured_queries if 'SAVEPOINT' not in q['sql']]
+            query_counts.append(len(executed))
+            query_times.append(sum(float(q['time']) for q in executed) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - started
+
+        return {
+            'method': method.upper(),
+            'path': path,
+            'requests': requests,
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+            'p50_ms': round(self._percentile(latencies, 50), 3),
+            'p99_ms': round(self._percentile(latencies, 99), 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+            'max_ms': round(max(latencies), 3),
+            'throughput_rps': round(requests / elapsed, 2) if elapsed else None,
+            'queries_per_request': round(statistics.fmean(query_counts), 2),
+            'max_queries': max(query_counts),
+            'db_time_ms': round(statistics.fmean(query_times), 3),
+        }
+
+    def _percentile(self, values, percentile):
+        """Nearest-rank percentile."""
+        ordered = sorted(values)
+        rank = max(1, -(-len(ordered) * percentile // 100))
+        return ordered[int(rank) - 1]
@@ -0,0 +1,107 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from leaves.cache import compute_manager_stats
+from leaves.models import LeaveRequest
+from leaves.seeding import seed_organization
+from notifications.models import Notification, WebhookDelivery
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Print query plans and timings for the hot LeaveRequest/Notification/WebhookDelivery queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed-rows', type=int, default=0,
+            help='Bulk-insert this many synthetic leave requests before benchmarking (e.g. 1000000)',
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Use EXPLAIN ANALYZE (PostgreSQL only)',
+        )
+        parser.add_argument('--json', action='store_true', help='Emit results as JSON')
+
+    def handle(self, *args, **options):
+        if options['seed_rows']:
+            self._seed(options['seed_rows'])
+
+        manager = User.objects.filter(role='MANAGER', reports__isnull=False).first()
+        employee = User.objects.filter(role='EMPLOYEE', leaves__isnull=False).first()
+        if manager is None or employee is None:
+            self.stderr.write('No data to benchmark; run with --seed-rows first.')
+            return
+
+        now = timezone.now()
+        queries = {
+            'manager_queue': lambda: LeaveRequest.objects.for_manager(manager)
+                .filter(status='PENDING').order_by('-created_at', '-id')[:50],
+            'employee_leaves': lambda: LeaveRequest.objects.filter(user=employee)
+                .order_by('-created_at', '-id')[:50],
+            'employee_pending': lambda: LeaveRequest.objects.filter(user=employee, status='PENDING')
+                .values_list('leave_type_id').order_by(),
+            'hr_summary_page': lambda: LeaveRequest.objects.order_by('-created_at', '-id')[:50],
+            'approved_today': lambda: LeaveRequest.objects.filter(
+                status='APPROVED', updated_at__gte=now - timedelta(days=1)
+            ).values_list('id', flat=True),
+            'notifications': lambda: Notification.objects.filter(user=employee)[:50],
+            'webhook_log': lambda: WebhookDelivery.objects.all()[:50],
+            'webhook_due': lambda: WebhookDelivery.objects.filter(
+                status='PENDING', next_attempt_at__lte=now
+            ).order_by('next_attempt_at')[:50],
+        }
+
+        explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+        results = {
+            'vendor': connection.vendor,
+            'leave_requests': LeaveRequest.objects.count(),
+            'queries': {},
+        }
+        for name, build in queries.items():
+            results['queries'][name] = {
+                'plan': build().explain(**explain_options),
+                'median_ms': self._time(build, options['repeat']),
+            }
+        results['queries']['manager_stats'] = {
+            'plan': None,
+            'median_ms': self._time(lambda: compute_manager_stats(manager), options['repeat'], evaluate=False),
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{results['vendor']}: {results['leave_requests']} leave requests\n")
+        for name, result in results['queries'].items():
+            self.stdout.write(self.style.SUCCESS(f"{name}: {result['median_ms']:.2f} ms"))
+            if result['plan']:
+                self.stdout.write(result['plan'] + '\n')
+
+    def _time(self, build, repeat, evaluate=True):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = build()
+            if evaluate:
+                list(result)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def _seed(self, rows):
+        """Seed a synthetic organization sized for roughly `rows` leave requests."""
+        self.stdout.write(f'Seeding {rows} leave requests...')
+        employees = max(1, rows // 20)
+        seed_organization(
+            managers=max(1, rows // 20000),
+            employees_per_manager=max(1, employees // max(1, rows // 20000)),
+            hr=0,
+            years=3,
+            leaves_per_employee_per_year=7,
+            prefix=f'bench_{time.time_ns()}',
+        )
@@ -0,0 +1,43 @@
+import json
+import sys
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from leaves.importer import FORMATS, LeaveImporter, detect_format, iter_rows
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Import leave history from a CSV or JSON-lines file without sending notifications or webhooks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument('--format', choices=FORMATS, help='File format (guessed from the extension by default)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows validated and inserted per batch')
+        parser.add_argument('--actor', help='Username recorded on the audit log rows')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing')
+
+    def handle(self, *args, **options):
+        actor = None
+        if options['actor']:
+            actor = User.objects.filter(username=options['actor']).first()
+            if actor is None:
+                raise CommandError(f"Unknown user {options['actor']}")
+
+        fmt = options['format'] or detect_format(options['path'])
+        importer = LeaveImporter(
+            chunk_size=options['chunk_size'], actor=actor, dry_run=options['dry_run']
+        )
+
+        if options['path'] == '-':
+            report = importer.run(iter_rows(sys.stdin.buffer, fmt))
+        else:
+            try:
+                with open(options['path'], 'rb') as f:
+                    report = importer.run(iter_rows(f, fmt))
+            except FileNotFoundError:
+                raise CommandError(f"No such file: {options['path']}")
+
+        self.stdout.write(json.dumps(report, indent=2))
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        style = self.style.SUCCESS if not report['failed'] else self.style.WARNING
+        self.stdout.write(style(f"{verb} {report['imported']} of {report['rows']} rows ({report['failed']} failed)"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from jobs.queue import enqueue
+from leaves.absences import rebuild_absence_days
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailyAbsence calendar table from approved leave requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT')
+        parser.add_argument('--enqueue', action='store_true', help='Queue the rebuild for `runworker` instead')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = enqueue(rebuild_absence_days, kwargs={'batch_size': options['batch_size']})
+            self.stdout.write(self.style.SUCCESS(f'Queued job {job.id}'))
+            return
+        count = rebuild_absence_days(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} absence days'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from jobs.queue import enqueue
+from leaves.balances import rebuild_balances
+
+class Command(BaseCommand):
+    help = 'Rebuild the LeaveBalance ledger from approved leave requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only rebuild balances for this year')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT')
+        parser.add_argument('--enqueue', action='store_true', help='Queue the rebuild for `runworker` instead')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = enqueue(rebuild_balances, kwargs={'year': options['year'], 'batch_size': options['batch_size']})
+            self.stdout.write(self.style.SUCCESS(f'Queued job {job.id}'))
+            return
+        count = rebuild_balances(year=options['year'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} leave balances'))
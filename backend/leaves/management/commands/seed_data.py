@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from leaves.absences import rebuild_absence_days
+from leaves.balances import rebuild_balances
+from leaves.seeding import seed_organization
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic organization with years of leave history using bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--managers', type=int, default=10, help='Number of managers')
+        parser.add_argument('--employees-per-manager', type=int, default=20, help='Direct reports per manager')
+        parser.add_argument('--hr', type=int, default=2, help='Number of HR users')
+        parser.add_argument('--years', type=int, default=3, help='Years of leave history to generate')
+        parser.add_argument(
+            '--leaves-per-year', type=int, default=6,
+            help='Leave requests per employee per year',
+        )
+        parser.add_argument('--password', default='password123', help='Password for every seeded user')
+        parser.add_argument('--prefix', default='seed', help='Username prefix for seeded users')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT')
+        parser.add_argument('--random-seed', type=int, help='Seed for reproducible data')
+
+    def handle(self, *args, **options):
+        if options['managers'] < 1:
+            raise CommandError('--managers must be at least 1')
+
+        with transaction.atomic():
+            counts = seed_organization(
+                managers=options['managers'],
+                employees_per_manager=options['employees_per_manager'],
+                hr=options['hr'],
+                years=options['years'],
+                leaves_per_employee_per_year=options['leaves_per_year'],
+                password=options['password'],
+                prefix=options['prefix'],
+                batch_size=options['batch_size'],
+                random_seed=options['random_seed'],
+                log=self.stdout.write,
+            )
+            counts['leave_balances'] = rebuild_balances()
+            counts['absence_days'] = rebuild_absence_days()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded ' + ', '.join(f'{count} {name}' for name, count in counts.items())
+        ))
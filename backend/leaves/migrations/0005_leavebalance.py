@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:51
+
+import django.db.models.deletion
+from collections import defaultdict
+from datetime import date
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_leave_balances(apps, schema_editor):
+    """Fill the ledger from existing approved leaves (same totals as rebuild_balances)."""
+    LeaveRequest = apps.get_model('leaves', 'LeaveRequest')
+    LeaveType = apps.get_model('leaves', 'LeaveType')
+    LeaveBalance = apps.get_model('leaves', 'LeaveBalance')
+    totals = defaultdict(int)
+    approved = LeaveRequest.objects.filter(status='APPROVED').values_list(
+        'user_id', 'leave_type_id', 'start_date', 'end_date'
+    )
+    for user_id, leave_type_id, start_date, end_date in approved.iterator(chunk_size=2000):
+        # Split leaves spanning New Year between the years they cover
+        for year in range(start_date.year, end_date.year + 1):
+            first = max(start_date, date(year, 1, 1))
+            last = min(end_date, date(year, 12, 31))
+            totals[(user_id, leave_type_id, year)] += (last - first).days + 1
+    allowed = dict(LeaveType.objects.values_list('id', 'days_allowed'))
+    LeaveBalance.objects.bulk_create([
+        LeaveBalance(user_id=user_id, leave_type_id=leave_type_id, year=year,
+                     allowed_days=allowed[leave_type_id], used_days=days)
+        for (user_id, leave_type_id, year), days in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaves', '0004_leaverequest_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('allowed_days', models.IntegerField()),
+                ('used_days', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('leave_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='leaves.leavetype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'leave_type'], name='leavebalance_year_type_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'leave_type', 'year'), name='unique_leave_balance')],
+            },
+        ),
+        migrations.RunPython(populate_leave_balances, migrations.RunPython.noop),
+    ]
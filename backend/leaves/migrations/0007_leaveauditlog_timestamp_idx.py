@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaves', '0006_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaveauditlog',
+            index=models.Index(fields=['timestamp'], name='leaveauditlog_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:35
+
+import django.db.models.deletion
+from django.conf import settings
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def populate_absence_days(apps, schema_editor):
+    LeaveRequest = apps.get_model('leaves', 'LeaveRequest')
+    DailyAbsence = apps.get_model('leaves', 'DailyAbsence')
+    approved = LeaveRequest.objects.filter(status='APPROVED').values_list('id', 'user_id', 'start_date', 'end_date')
+    batch = []
+    for leave_id, user_id, start_date, end_date in approved.iterator(chunk_size=2000):
+        for offset in range((end_date - start_date).days + 1):
+            batch.append(DailyAbsence(leave_id=leave_id, user_id=user_id, date=start_date + timedelta(days=offset)))
+        if len(batch) >= 5000:
+            DailyAbsence.objects.bulk_create(batch)
+            batch = []
+    DailyAbsence.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leaves', '0008_leaverequest_user_dates_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAbsence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('leave', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='absence_days', to='leaves.leaverequest')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='absence_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'user'], name='absence_date_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('leave', 'date'), name='unique_absence_day')],
+            },
+        ),
+        migrations.RunPython(populate_absence_days, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class LeaveType(models.Model):
     """
@@ -14,6 +15,69 @@ class LeaveType(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.sync_balances()
+
+    def sync_balances(self):
+        """
+        Apply `days_allowed` to this year's (and later) LeaveBalance rows.
+        
+        Earlier years keep the allowance they ran under. Called on every save;
+        bulk `QuerySet.update(days_allowed=...)` bypasses it and must call this
+        explicitly.
+        """
+        self.balances.filter(year__gte=timezone.now().year).exclude(
+            allowed_days=self.days_allowed
+        ).update(allowed_days=self.days_allowed)
+
+def leave_duration():
+    """
+    `end_date - start_date` as a database expression.
+    
+    Day counts in this app are inclusive of both dates, so callers add one day
+    per leave (typically from a Count over the same rows).
+    """
+    return models.ExpressionWrapper(
+        models.F('end_date') - models.F('start_date'),
+        output_field=models.DurationField(),
+    )
+
+class LeaveRequestQuerySet(models.QuerySet):
+    def for_list(self):
+        """Load what LeaveRequestListSerializer renders in a single query."""
+        return self.select_related('user', 'leave_type')
+
+    def with_details(self):
+        """
+        Load everything LeaveRequestSerializer renders (user, leave type and
+        audit logs with their actors) in a fixed number of queries.
+        """
+        return self.select_related('user', 'leave_type').prefetch_related(
+            models.Prefetch(
+                'audit_logs',
+                queryset=LeaveAuditLog.objects.select_related('action_by'),
+            )
+        )
+
+    def overlapping(self, start_date, end_date):
+        """
+        Leaves sharing at least one day with [start_date, end_date].
+        
+        Combined with a user filter this is a range probe on the
+        (user, start_date, end_date) index.
+        """
+        return self.filter(start_date__lte=end_date, end_date__gte=start_date)
+
+    def blocking(self):
+        """Leaves that occupy their dates: approved or still pending."""
+        return self.filter(status__in=['PENDING', 'APPROVED'])
+
+    def for_manager(self, manager):
+        """Leaves of the users a manager is responsible for (see users.models.team_q)."""
+        from users.models import team_q
+        return self.filter(team_q(manager, prefix='user__'))
+
 class LeaveRequest(models.Model):
     """
     Represents a leave application submitted by an employee.
@@ -42,6 +106,22 @@ class LeaveRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LeaveRequestQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination (see leaves.pagination.LeaveCursorPagination)
+            models.Index(fields=['-created_at', '-id'], name='leave_created_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='leave_user_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='leave_status_created_idx'),
+            # Pending/approved counts per employee (EmployeeStatsView, balance rebuilds)
+            models.Index(fields=['user', 'status'], name='leave_user_status_idx'),
+            # "Approved today" range filter (ManagerStatsView)
+            models.Index(fields=['status', 'updated_at'], name='leave_status_updated_idx'),
+            # Overlap checks and "who is out" lookups
+            models.Index(fields=['user', 'start_date', 'end_date'], name='leave_user_dates_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.leave_type.name} ({self.status})"
 
@@ -65,5 +145,72 @@ class LeaveAuditLog(models.Model):
     comment = models.TextField(blank=True, null=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Date-range audit exports
+            models.Index(fields=['timestamp'], name='leaveauditlog_timestamp_idx'),
+        ]
+
     def __str__(self):
         return f"{self.action} on {self.leave} by {self.action_by}"
+
+class LeaveBalance(models.Model):
+    """
+    Materialized leave usage per user, leave type and calendar year.
+    
+    Updated incrementally when a leave is approved (or an approval is reversed)
+    so balance reads are a single-row lookup on (user, leave_type, year) rather
+    than a recomputation over the user's history. `rebuild_leave_balances`
+    reconciles the table from LeaveRequest in bulk.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='leave_balances')
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.CASCADE, related_name='balances')
+    year = models.PositiveSmallIntegerField()
+    
+    # Snapshot of LeaveType.days_allowed, so past years keep the policy they ran
+    # under; the current year follows edits to the leave type (sync_balances)
+    allowed_days = models.IntegerField()
+    used_days = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'leave_type', 'year'], name='unique_leave_balance'),
+        ]
+        indexes = [
+            # Company-wide HR queries ("everyone's Sick Leave for 2026")
+            models.Index(fields=['year', 'leave_type'], name='leavebalance_year_type_idx'),
+        ]
+
+    @property
+    def remaining_days(self):
+        return self.allowed_days - self.used_days
+
+    def __str__(self):
+        return f"{self.user} - {self.leave_type} {self.year}: {self.used_days}/{self.allowed_days}"
+
+class DailyAbsence(models.Model):
+    """
+    One row per employee per day they are out on an approved leave.
+    
+    Maintained when leaves are approved or rejected (see leaves.absences), so
+    the team calendar reads a date range with one indexed query instead of
+    expanding leave date ranges on every request. `rebuild_absence_calendar`
+    reconciles the table from LeaveRequest.
+    """
+    date = models.DateField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='absence_days')
+    leave = models.ForeignKey(LeaveRequest, on_delete=models.CASCADE, related_name='absence_days')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['leave', 'date'], name='unique_absence_day'),
+        ]
+        indexes = [
+            # Calendar range reads
+            models.Index(fields=['date', 'user'], name='absence_date_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} out on {self.date}"
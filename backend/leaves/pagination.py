@@ -0,0 +1,24 @@
+from rest_framework.pagination import CursorPagination
+
+class LeaveCursorPagination(CursorPagination):
+    """
+    Keyset pagination for leave lists, newest first.
+    
+    DRF keys the cursor on the first ordering field only: it holds a position
+    on `created_at`, and pages are fetched with a range filter on it using the
+    (created_at, id) indexes instead of a growing OFFSET, so every page costs
+    about the same however deep the client goes. Rows sharing the boundary
+    timestamp are stepped over with a small offset stored in the cursor;
+    `-id` only keeps their order stable.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+class LeaveBalanceCursorPagination(CursorPagination):
+    """Keyset pagination for the balance ledger, in insertion order."""
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -0,0 +1,150 @@
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from notifications.cache import notifications_created
+from notifications.models import Notification
+from notifications.rendering import SUBJECTS
+from .models import LeaveAuditLog, LeaveRequest, LeaveType
+
+"""
+Synthetic organization generator for load testing and benchmarks.
+
+Everything is written with bulk inserts in batches, and timestamps are
+backdated so the history looks like it accumulated over the requested years.
+"""
+
+User = get_user_model()
+
+LEAVE_TYPES = [('Sick Leave', 10), ('Casual Leave', 12), ('Earned Leave', 15)]
+
+
+@contextmanager
+def manual_timestamps(model, *field_names):
+    """
+    Let bulk_create keep explicit values for auto_now/auto_now_add fields.
+
+    This switches the flags on the Field objects shared by the whole process,
+    so it is only safe in single-threaded commands like seed_data, never in a
+    request path.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_organization(managers=10, employees_per_manager=20, hr=2, years=3,
+                      leaves_per_employee_per_year=6, password='password123',
+                      prefix='seed', batch_size=5000, random_seed=None, log=None):
+    """
+    Create users, leave types and `years` of leave history.
+
+    Users are named `<prefix>_manager_<n>`, `<prefix>_employee_<n>` and
+    `<prefix>_hr_<n>` and share one password (hashed once). Each leave gets a
+    CREATED audit row and a submission notification; non-pending leaves also get
+    an APPROVE/REJECT audit row. Returns a dict of row counts.
+    """
+    rng = random.Random(random_seed)
+    log = log or (lambda message: None)
+    password_hash = make_password(password)
+
+    leave_types = [
+        LeaveType.objects.get_or_create(name=name, defaults={'days_allowed': days})[0]
+        for name, days in LEAVE_TYPES
+    ]
+
+    manager_users = User.objects.bulk_create([
+        User(username=f'{prefix}_manager_{i}', email=f'{prefix}_manager_{i}@example.com',
+             password=password_hash, role='MANAGER')
+        for i in range(managers)
+    ], batch_size=batch_size)
+    User.objects.bulk_create([
+        User(username=f'{prefix}_hr_{i}', email=f'{prefix}_hr_{i}@example.com',
+             password=password_hash, role='HR')
+        for i in range(hr)
+    ], batch_size=batch_size)
+    employees = User.objects.bulk_create([
+        User(username=f'{prefix}_employee_{i}', email=f'{prefix}_employee_{i}@example.com',
+             password=password_hash, role='EMPLOYEE', manager=manager_users[i % managers] if managers else None)
+        for i in range(managers * employees_per_manager)
+    ], batch_size=batch_size)
+    log(f'Created {len(manager_users)} managers, {hr} HR users and {len(employees)} employees')
+
+    today = date.today()
+    history_days = years * 365
+    total_leaves = len(employees) * years * leaves_per_employee_per_year
+    counts = {'leave_requests': 0, 'audit_logs': 0, 'notifications': 0}
+
+    for offset in range(0, total_leaves, batch_size):
+        leaves = []
+        for _ in range(min(batch_size, total_leaves - offset)):
+            employee = rng.choice(employees)
+            start = today - timedelta(days=rng.randint(-30, history_days))
+            created_at = timezone.make_aware(
+                datetime.combine(start - timedelta(days=rng.randint(1, 30)), time(rng.randint(8, 18)))
+            )
+            # Anything starting in the future may still be pending
+            if start > today and rng.random() < 0.5:
+                status = 'PENDING'
+            else:
+                status = rng.choices(['APPROVED', 'REJECTED'], weights=[85, 15])[0]
+            leaves.append(LeaveRequest(
+                user=employee,
+                leave_type=rng.choice(leave_types),
+                start_date=start,
+                end_date=start + timedelta(days=rng.choice([0, 0, 1, 2, 4])),
+                reason='Synthetic leave',
+                status=status,
+                manager_comment='' if status == 'PENDING' else 'Synthetic decision',
+                created_at=created_at,
+                updated_at=created_at if status == 'PENDING' else created_at + timedelta(hours=rng.randint(1, 72)),
+            ))
+
+        with manual_timestamps(LeaveRequest, 'created_at', 'updated_at'):
+            leaves = LeaveRequest.objects.bulk_create(leaves)
+
+        audit_logs = []
+        notifications = []
+        for leave in leaves:
+            audit_logs.append(LeaveAuditLog(
+                leave=leave, action_by=leave.user, action='CREATED', new_status='PENDING',
+                comment='Leave request created', timestamp=leave.created_at,
+            ))
+            if leave.status != 'PENDING':
+                audit_logs.append(LeaveAuditLog(
+                    leave=leave, action_by=leave.user.manager,
+                    action='APPROVE' if leave.status == 'APPROVED' else 'REJECT',
+                    previous_status='PENDING', new_status=leave.status,
+                    comment=leave.manager_comment, timestamp=leave.updated_at,
+                ))
+            notifications.append(Notification(
+                user=leave.user, subject=SUBJECTS['leave_created_employee'], template='leave_created_employee',
+                context={
+                    'name': leave.user.username, 'leave_type': leave.leave_type.name,
+                    'start_date': str(leave.start_date), 'end_date': str(leave.end_date),
+                    'reason': leave.reason, 'status': 'PENDING',
+                },
+                is_read=leave.status != 'PENDING', created_at=leave.created_at,
+            ))
+
+        with manual_timestamps(LeaveAuditLog, 'timestamp'):
+            LeaveAuditLog.objects.bulk_create(audit_logs)
+        with manual_timestamps(Notification, 'created_at'):
+            Notification.objects.bulk_create(notifications)
+        notifications_created(notifications)
+
+        counts['leave_requests'] += len(leaves)
+        counts['audit_logs'] += len(audit_logs)
+        counts['notifications'] += len(notifications)
+        log(f"Inserted {counts['leave_requests']}/{total_leaves} leave requests")
+
+    counts['users'] = len(manager_users) + hr + len(employees)
+    return counts
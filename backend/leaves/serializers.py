@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import LeaveType, LeaveRequest, LeaveAuditLog
+from .models import LeaveType, LeaveRequest, LeaveAuditLog, LeaveBalance
 from users.serializers import UserSerializer
 
 class LeaveTypeSerializer(serializers.ModelSerializer):
@@ -25,3 +25,78 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
     class Meta:
         model = LeaveRequest
         fields = '__all__'
+        # Status only changes through the approve/reject endpoints
+        read_only_fields = ('status', 'manager_comment')
+
+    def validate(self, attrs):
+        """Reject reversed date ranges and overlaps with the user's pending/approved leaves."""
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date:
+            if end_date < start_date:
+                raise serializers.ValidationError({'end_date': 'End date cannot be before start date.'})
+            
+            user = self.instance.user if self.instance else self.context['request'].user
+            overlapping = LeaveRequest.objects.filter(user=user).blocking().overlapping(start_date, end_date)
+            if self.instance:
+                overlapping = overlapping.exclude(pk=self.instance.pk)
+            conflict = overlapping.order_by('start_date').first()
+            if conflict:
+                raise serializers.ValidationError(
+                    f'Overlaps leave #{conflict.id} ({conflict.start_date} to {conflict.end_date}, {conflict.status.lower()}).'
+                )
+        return attrs
+
+class LeaveRequestListSerializer(serializers.ModelSerializer):
+    """
+    Compact representation for list endpoints.
+    
+    Uses flat ids and display names instead of nested objects and leaves out
+    the audit trail, which is only served by the detail and audit endpoints.
+    """
+    user_name = serializers.SerializerMethodField()
+    user_email = serializers.EmailField(source='user.email', read_only=True)
+    leave_type_name = serializers.CharField(source='leave_type.name', read_only=True)
+    days = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LeaveRequest
+        fields = (
+            'id', 'user', 'user_name', 'user_email', 'leave_type', 'leave_type_name',
+            'start_date', 'end_date', 'days', 'reason', 'status', 'manager_comment',
+            'created_at', 'updated_at',
+        )
+        read_only_fields = fields
+
+    def get_user_name(self, obj):
+        return obj.user.get_full_name() or obj.user.username
+
+    def get_days(self, obj):
+        # Inclusive of both start and end date
+        return (obj.end_date - obj.start_date).days + 1
+
+class LeaveBalanceSerializer(serializers.ModelSerializer):
+    user_name = serializers.SerializerMethodField()
+    leave_type_name = serializers.CharField(source='leave_type.name', read_only=True)
+    remaining_days = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = LeaveBalance
+        fields = (
+            'id', 'user', 'user_name', 'leave_type', 'leave_type_name', 'year',
+            'allowed_days', 'used_days', 'remaining_days', 'updated_at',
+        )
+        read_only_fields = fields
+
+    def get_user_name(self, obj):
+        return obj.user.get_full_name() or obj.user.username
+
+class LeaveBulkActionSerializer(serializers.Serializer):
+    """Body of POST /api/leaves/bulk-action/."""
+    MAX_IDS = 500
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_IDS
+    )
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    comment = serializers.CharField(required=False, allow_blank=True, default='')
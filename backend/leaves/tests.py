@@ -1,10 +1,28 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import LeaveType, LeaveRequest, LeaveAuditLog
+from .models import LeaveType, LeaveRequest, LeaveAuditLog, LeaveBalance, DailyAbsence
+from .absences import record_absence_days, team_calendar
+from .balances import rebuild_balances, record_leave_usage
+from .cache import get_manager_stats
+from .conflicts import lock_blocking_leaves
 from notifications.models import Notification, Webhook, WebhookDelivery
+from users.models import managers_of
+from config.metrics import registry
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from datetime import date, timedelta
+from importlib import import_module
+from io import StringIO
+from unittest.mock import patch
+import json
+import os
+import tempfile
 
 User = get_user_model()
 
@@ -312,10 +330,1555 @@ class TestPermissions(TestCase):
         response = self.client.get('/api/leaves/')
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data['results']), 0)
     
     def test_unauthenticated_user_cannot_access(self):
         """Test unauthenticated users cannot access leaves."""
         response = self.client.get('/api/leaves/')
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestReportingHierarchy(TestCase):
+    """Test manager views and notifications are scoped to the reporting line."""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(
+            username='manager',
+            email='manager@test.com',
+            password='test123',
+            role='MANAGER'
+        )
+        self.other_manager = User.objects.create_user(
+            username='other_manager',
+            email='other_manager@test.com',
+            password='test123',
+            role='MANAGER'
+        )
+        self.employee = User.objects.create_user(
+            username='employee',
+            email='employee@test.com',
+            password='test123',
+            role='EMPLOYEE',
+            manager=self.manager
+        )
+        self.unassigned = User.objects.create_user(
+            username='unassigned',
+            email='unassigned@test.com',
+            password='test123',
+            role='EMPLOYEE'
+        )
+        self.leave_type = LeaveType.objects.create(
+            name='Sick Leave',
+            days_allowed=10
+        )
+        self.leave = LeaveRequest.objects.create(
+            user=self.employee,
+            leave_type=self.leave_type,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=2),
+            reason='Test',
+            status='PENDING'
+        )
+        self.unassigned_leave = LeaveRequest.objects.create(
+            user=self.unassigned,
+            leave_type=self.leave_type,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=2),
+            reason='Test',
+            status='PENDING'
+        )
+    
+    def test_only_own_manager_notified(self):
+        """Test a new leave notifies the employee's manager only."""
+        self.client.force_authenticate(user=self.employee)
+        
+        response = self.client.post('/api/leaves/', {
+            'leave_type_id': self.leave_type.id,
+            'start_date': str(date.today() + timedelta(days=10)),
+            'end_date': str(date.today() + timedelta(days=11)),
+            'reason': 'Test'
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Notification.objects.filter(user=self.manager).count(), 1)
+        self.assertEqual(Notification.objects.filter(user=self.other_manager).count(), 0)
+    
+    def test_queue_scoped_to_team(self):
+        """Test a manager's queue holds their reports plus unassigned employees."""
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.get('/api/manager-queue/')
+        self.assertEqual(
+            {leave['id'] for leave in response.data['results']},
+            {self.leave.id, self.unassigned_leave.id}
+        )
+        
+        self.client.force_authenticate(user=self.other_manager)
+        response = self.client.get('/api/manager-queue/')
+        self.assertEqual([leave['id'] for leave in response.data['results']], [self.unassigned_leave.id])
+    
+    def test_peers_not_in_fallback(self):
+        """Test unassigned managers and HR are not visible to other managers."""
+        hr_user = User.objects.create_user(username='hr', password='test123', role='HR')
+        peer_leaves = [
+            LeaveRequest.objects.create(
+                user=user, leave_type=self.leave_type, reason='Test', status='APPROVED',
+                start_date=date.today(), end_date=date.today() + timedelta(days=1),
+            )
+            for user in (self.other_manager, hr_user)
+        ]
+        record_absence_days(peer_leaves)
+        self.client.force_authenticate(user=self.manager)
+        
+        for leave in peer_leaves:
+            response = self.client.get(f'/api/leaves/{leave.id}/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        response = self.client.get('/api/team-calendar/', {
+            'from': str(date.today()), 'to': str(date.today()),
+        })
+        self.assertEqual(response.data['days'][0]['people'], [])
+    
+    def test_notified_managers_match_manager_scope(self):
+        """Test the managers notified of a leave are exactly those who can see it."""
+        hr_user = User.objects.create_user(username='hr', password='test123', role='HR')
+        users = [self.employee, self.unassigned, self.other_manager, hr_user]
+        for fallback in (True, False):
+            with self.settings(UNASSIGNED_EMPLOYEES_FALLBACK=fallback):
+                for user in users:
+                    leave = LeaveRequest.objects.create(
+                        user=user, leave_type=self.leave_type, reason='Test', status='PENDING',
+                        start_date=date.today(), end_date=date.today(),
+                    )
+                    scope = {
+                        manager.id for manager in (self.manager, self.other_manager)
+                        if LeaveRequest.objects.for_manager(manager).filter(pk=leave.pk).exists()
+                    }
+                    self.assertEqual(set(managers_of(user).values_list('id', flat=True)), scope)
+    
+    @override_settings(UNASSIGNED_EMPLOYEES_FALLBACK=False)
+    def test_fallback_disabled(self):
+        """Test unassigned employees are hidden and nobody is notified without the fallback."""
+        self.client.force_authenticate(user=self.other_manager)
+        response = self.client.get('/api/manager-queue/')
+        self.assertEqual(response.data['results'], [])
+        
+        self.client.force_authenticate(user=self.unassigned)
+        response = self.client.post('/api/leaves/', {
+            'leave_type_id': self.leave_type.id,
+            'start_date': str(date.today() + timedelta(days=10)),
+            'end_date': str(date.today() + timedelta(days=11)),
+            'reason': 'Test'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Notification.objects.filter(user__role='MANAGER').exists())
+    
+    def test_stats_scoped_to_team(self):
+        """Test manager stats only count the manager's team."""
+        self.client.force_authenticate(user=self.other_manager)
+        
+        response = self.client.get('/api/manager-stats/')
+        
+        self.assertEqual(response.data['pending'], 1)
+    
+    def test_other_manager_cannot_action_leave(self):
+        """Test a manager cannot act on another manager's report."""
+        self.client.force_authenticate(user=self.other_manager)
+        
+        response = self.client.post(
+            f'/api/leaves/{self.leave.id}/action/',
+            {'action': 'approve'},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.leave.refresh_from_db()
+        self.assertEqual(self.leave.status, 'PENDING')
+
+
+class TestListQueryCounts(TestCase):
+    """Test list endpoints load related data in a fixed number of queries."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.employee = User.objects.create_user(
+            username='employee',
+            email='employee@test.com',
+            password='test123',
+            role='EMPLOYEE'
+        )
+        self.manager = User.objects.create_user(
+            username='manager',
+            email='manager@test.com',
+            password='test123',
+            role='MANAGER'
+        )
+        self.hr = User.objects.create_user(
+            username='hr',
+            email='hr@test.com',
+            password='test123',
+            role='HR'
+        )
+        self.leave_type = LeaveType.objects.create(
+            name='Sick Leave',
+            days_allowed=10
+        )
+    
+    def _create_leaves(self, count):
+        for _ in range(count):
+            leave = LeaveRequest.objects.create(
+                user=self.employee,
+                leave_type=self.leave_type,
+                start_date=date.today(),
+                end_date=date.today() + timedelta(days=2),
+                reason='Test',
+                status='PENDING'
+            )
+            LeaveAuditLog.objects.create(
+                leave=leave, action_by=self.employee, action='CREATED', new_status='PENDING'
+            )
+            LeaveAuditLog.objects.create(
+                leave=leave, action_by=self.manager, action='COMMENT', new_status='PENDING'
+            )
+    
+    def _assert_constant_queries(self, user, url, expected):
+        self.client.force_authenticate(user=user)
+        
+        self._create_leaves(2)
+        with self.assertNumQueries(expected):
+            self.client.get(url)
+        
+        self._create_leaves(10)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        return response
+    
+    def test_leave_list_query_count(self):
+        """Test /api/leaves/ does not issue per-row queries."""
+        response = self._assert_constant_queries(self.employee, '/api/leaves/', 1)
+        self.assertEqual(len(response.data['results']), 12)
+    
+    def test_manager_queue_query_count(self):
+        """Test /api/manager-queue/ does not issue per-row queries."""
+        response = self._assert_constant_queries(self.manager, '/api/manager-queue/', 1)
+        self.assertEqual(len(response.data['results']), 12)
+    
+    def test_hr_summary_query_count(self):
+        """Test /api/hr-summary/ does not issue per-row queries."""
+        response = self._assert_constant_queries(self.hr, '/api/hr-summary/', 1)
+        self.assertEqual(len(response.data['results']), 12)
+    
+    def test_list_rows_are_compact(self):
+        """Test list rows carry flat fields and no audit trail."""
+        self._create_leaves(1)
+        self.client.force_authenticate(user=self.hr)
+        
+        row = self.client.get('/api/hr-summary/').data['results'][0]
+        
+        self.assertNotIn('audit_logs', row)
+        self.assertEqual(row['user'], self.employee.id)
+        self.assertEqual(row['user_name'], 'employee')
+        self.assertEqual(row['leave_type_name'], 'Sick Leave')
+        self.assertEqual(row['days'], 3)
+    
+    def test_retrieve_includes_audit_trail(self):
+        """Test the detail endpoint keeps the full audit trail."""
+        self._create_leaves(1)
+        leave = LeaveRequest.objects.get()
+        self.client.force_authenticate(user=self.employee)
+        
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/leaves/{leave.id}/')
+        
+        self.assertEqual(len(response.data['audit_logs']), 2)
+        self.assertEqual(response.data['audit_logs'][1]['action_by']['username'], 'manager')
+    
+    def test_audit_endpoint(self):
+        """Test /api/leaves/{id}/audit/ returns the trail in order."""
+        self._create_leaves(1)
+        leave = LeaveRequest.objects.get()
+        self.client.force_authenticate(user=self.manager)
+        
+        response = self.client.get(f'/api/leaves/{leave.id}/audit/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([log['action'] for log in response.data], ['CREATED', 'COMMENT'])
+
+
+class TestCursorPagination(TestCase):
+    """Test keyset pagination on the leave list endpoints."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.hr = User.objects.create_user(
+            username='hr',
+            email='hr@test.com',
+            password='test123',
+            role='HR'
+        )
+        self.employee = User.objects.create_user(
+            username='employee',
+            email='employee@test.com',
+            password='test123',
+            role='EMPLOYEE'
+        )
+        leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        # Identical created_at values exercise the id tie-breaker
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(
+                user=self.employee,
+                leave_type=leave_type,
+                start_date=date.today(),
+                end_date=date.today(),
+                reason=f'Leave {i}'
+            )
+            for i in range(7)
+        ])
+        LeaveRequest.objects.update(created_at=timezone.now())
+    
+    def test_pages_cover_every_row_once(self):
+        """Test walking the cursor returns each leave exactly once, newest first."""
+        self.client.force_authenticate(user=self.hr)
+        
+        seen = []
+        url = '/api/hr-summary/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen.extend(leave['id'] for leave in response.data['results'])
+            url = response.data['next']
+        
+        expected = list(LeaveRequest.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+    
+    def test_page_size_capped(self):
+        """Test clients cannot request unbounded pages."""
+        self.client.force_authenticate(user=self.employee)
+        
+        response = self.client.get('/api/leaves/?page_size=100000')
+        
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertIsNone(response.data['next'])
+
+
+class TestEmployeeStats(TestCase):
+    """Test the employee dashboard statistics."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.employee = User.objects.create_user(
+            username='employee',
+            email='employee@test.com',
+            password='test123',
+            role='EMPLOYEE'
+        )
+        self.sick = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        self.casual = LeaveType.objects.create(name='Casual Leave', days_allowed=12)
+    
+    def _leave(self, leave_type, days, leave_status):
+        start = date(date.today().year, 3, 2)
+        return LeaveRequest.objects.create(
+            user=self.employee,
+            leave_type=leave_type,
+            start_date=start,
+            end_date=start + timedelta(days=days - 1),
+            reason='Test',
+            status=leave_status
+        )
+    
+    def test_used_days_and_breakdown(self):
+        """Test allowance and usage come from the ledger, per leave type."""
+        self._leave(self.sick, 3, 'APPROVED')
+        self._leave(self.sick, 1, 'APPROVED')
+        self._leave(self.casual, 2, 'APPROVED')
+        self._leave(self.casual, 5, 'PENDING')
+        self._leave(self.sick, 4, 'REJECTED')
+        rebuild_balances()
+        self.client.force_authenticate(user=self.employee)
+        
+        # Balances, pending counts, leave types and recent activity
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/employee-stats/')
+        
+        self.assertEqual(response.data['total_allowance'], 22)
+        self.assertEqual(response.data['used_leaves'], 6)
+        self.assertEqual(response.data['available_balance'], 16)
+        self.assertEqual(response.data['pending_requests'], 1)
+        self.assertEqual(response.data['by_leave_type'], [
+            {
+                'leave_type_id': self.casual.id, 'leave_type': 'Casual Leave',
+                'allowed_days': 12, 'used_days': 2, 'remaining_days': 10, 'pending_requests': 1,
+            },
+            {
+                'leave_type_id': self.sick.id, 'leave_type': 'Sick Leave',
+                'allowed_days': 10, 'used_days': 4, 'remaining_days': 6, 'pending_requests': 0,
+            },
+        ])
+        self.assertEqual(len(response.data['recent_activity']), 5)
+    
+    def test_no_leaves(self):
+        """Test stats for an employee without any leave history."""
+        self.client.force_authenticate(user=self.employee)
+        
+        response = self.client.get('/api/employee-stats/')
+        
+        self.assertEqual(response.data['total_allowance'], 22)
+        self.assertEqual(response.data['used_leaves'], 0)
+        self.assertEqual(response.data['pending_requests'], 0)
+
+
+class TestLeaveBalanceLedger(TestCase):
+    """Test the LeaveBalance ledger is maintained and can be rebuilt."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.employee = User.objects.create_user(
+            username='employee',
+            email='employee@test.com',
+            password='test123',
+            role='EMPLOYEE'
+        )
+        self.manager = User.objects.create_user(
+            username='manager',
+            email='manager@test.com',
+            password='test123',
+            role='MANAGER'
+        )
+        self.hr = User.objects.create_user(
+            username='hr',
+            email='hr@test.com',
+            password='test123',
+            role='HR'
+        )
+        self.leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        self.year = date.today().year
+        self.leave = LeaveRequest.objects.create(
+            user=self.employee,
+            leave_type=self.leave_type,
+            start_date=date(self.year, 5, 4),
+            end_date=date(self.year, 5, 6),
+            reason='Test'
+        )
+    
+    def _action(self, action_type):
+        self.client.force_authenticate(user=self.manager)
+        return self.client.post(
+            f'/api/leaves/{self.leave.id}/action/', {'action': action_type}, format='json'
+        )
+    
+    def test_approval_updates_balance(self):
+        """Test approving adds the leave's days to this year's balance."""
+        self._action('approve')
+        
+        balance = LeaveBalance.objects.get(user=self.employee, leave_type=self.leave_type, year=self.year)
+        self.assertEqual(balance.used_days, 3)
+        self.assertEqual(balance.allowed_days, 10)
+        self.assertEqual(balance.remaining_days, 7)
+    
+    def test_reversed_approval_restores_balance(self):
+        """Test rejecting a previously approved leave gives the days back."""
+        self._action('approve')
+        self._action('reject')
+        
+        balance = LeaveBalance.objects.get(user=self.employee, year=self.year)
+        self.assertEqual(balance.used_days, 0)
+    
+    def test_leave_across_new_year_split(self):
+        """Test a leave spanning New Year counts against both years."""
+        self.leave.start_date = date(self.year, 12, 30)
+        self.leave.end_date = date(self.year + 1, 1, 2)
+        self.leave.save()
+        
+        self._action('approve')
+        
+        self.assertEqual(LeaveBalance.objects.get(year=self.year).used_days, 2)
+        self.assertEqual(LeaveBalance.objects.get(year=self.year + 1).used_days, 2)
+    
+    def test_rebuild_matches_incremental_updates(self):
+        """Test the reconciliation command reproduces the incrementally maintained ledger."""
+        self.leave.end_date = date(self.year + 1, 1, 2)
+        self.leave.start_date = date(self.year, 12, 28)
+        self.leave.save()
+        self._action('approve')
+        LeaveRequest.objects.create(
+            user=self.employee,
+            leave_type=self.leave_type,
+            start_date=date(self.year, 2, 2),
+            end_date=date(self.year, 2, 3),
+            reason='Test',
+            status='APPROVED'
+        )
+        record_leave_usage(LeaveRequest.objects.latest('id'))
+        incremental = set(LeaveBalance.objects.values_list('user', 'leave_type', 'year', 'used_days'))
+        
+        LeaveBalance.objects.update(used_days=0)
+        call_command('rebuild_leave_balances', stdout=StringIO())
+        
+        rebuilt = set(LeaveBalance.objects.values_list('user', 'leave_type', 'year', 'used_days'))
+        self.assertEqual(rebuilt, incremental)
+        self.assertEqual(rebuilt, {
+            (self.employee.id, self.leave_type.id, self.year, 6),
+            (self.employee.id, self.leave_type.id, self.year + 1, 2),
+        })
+    
+    def test_leave_type_edit_updates_current_year_only(self):
+        """Test a new allowance reaches everyone's current balance but not past years."""
+        self._action('approve')
+        record_leave_usage(LeaveRequest.objects.create(
+            user=self.employee, leave_type=self.leave_type, reason='Test', status='APPROVED',
+            start_date=date(self.year - 1, 3, 2), end_date=date(self.year - 1, 3, 3),
+        ))
+        other = User.objects.create_user(username='other', password='test123', role='EMPLOYEE')
+        self.client.force_authenticate(user=self.hr)
+        
+        response = self.client.patch(f'/api/leave-types/{self.leave_type.id}/', {'days_allowed': 15}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(LeaveBalance.objects.get(year=self.year).allowed_days, 15)
+        self.assertEqual(LeaveBalance.objects.get(year=self.year - 1).allowed_days, 10)
+        for user in (self.employee, other):
+            self.client.force_authenticate(user=user)
+            response = self.client.get('/api/employee-stats/')
+            self.assertEqual(response.data['by_leave_type'][0]['allowed_days'], 15)
+        
+        rebuild_balances()
+        self.assertEqual(LeaveBalance.objects.get(year=self.year).allowed_days, 15)
+        self.assertEqual(LeaveBalance.objects.get(year=self.year - 1).allowed_days, 10)
+    
+    def test_balance_filters_validated(self):
+        """Test non-numeric filters are a 400, not a server error."""
+        self.client.force_authenticate(user=self.hr)
+        for param in ('year', 'user', 'leave_type'):
+            response = self.client.get('/api/leave-balances/', {param: 'abc'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_migration_backfills_existing_approvals(self):
+        """Test the ledger migration counts leaves approved before it, so reversing them nets to zero."""
+        from django.apps import apps
+        migration = import_module('leaves.migrations.0005_leavebalance')
+        LeaveRequest.objects.filter(pk=self.leave.pk).update(status='APPROVED')
+        
+        migration.populate_leave_balances(apps, None)
+        
+        self.assertEqual(LeaveBalance.objects.get(user=self.employee, year=self.year).used_days, 3)
+        self._action('reject')
+        self.assertEqual(LeaveBalance.objects.get(user=self.employee, year=self.year).used_days, 0)
+    
+    def test_deleting_approved_leave_restores_balance(self):
+        """Test deleting an approved leave gives its days back."""
+        self._action('approve')
+        self.client.force_authenticate(user=self.employee)
+        
+        response = self.client.delete(f'/api/leaves/{self.leave.id}/')
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(LeaveBalance.objects.get(user=self.employee, year=self.year).used_days, 0)
+    
+    def test_editing_approved_leave_moves_days(self):
+        """Test changing an approved leave's dates updates the ledger and calendar."""
+        self._action('approve')
+        self.client.force_authenticate(user=self.employee)
+        
+        response = self.client.patch(f'/api/leaves/{self.leave.id}/', {
+            'start_date': date(self.year, 6, 1), 'end_date': date(self.year, 6, 5)
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(LeaveBalance.objects.get(user=self.employee, year=self.year).used_days, 5)
+        self.assertEqual(
+            sorted(DailyAbsence.objects.filter(leave=self.leave).values_list('date', flat=True)),
+            [date(self.year, 6, day) for day in range(1, 6)],
+        )
+    
+    def test_hr_lists_company_balances(self):
+        """Test HR can query balances for everyone while employees see their own."""
+        self._action('approve')
+        
+        self.client.force_authenticate(user=self.hr)
+        response = self.client.get(f'/api/leave-balances/?year={self.year}&leave_type={self.leave_type.id}')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['used_days'], 3)
+        
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.get('/api/leave-balances/')
+        self.assertEqual(response.data['results'], [])
+
+
+class TestManagerStatsCache(TestCase):
+    """Test manager dashboard counters are cached and invalidated on writes."""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(
+            username='manager',
+            email='manager@test.com',
+            password='test123',
+            role='MANAGER'
+        )
+        self.other_manager = User.objects.create_user(
+            username='other_manager',
+            email='other_manager@test.com',
+            password='test123',
+            role='MANAGER'
+        )
+        self.employee = User.objects.create_user(
+            username='employee',
+            email='employee@test.com',
+            password='test123',
+            role='EMPLOYEE',
+            manager=self.manager
+        )
+        self.unassigned = User.objects.create_user(
+            username='unassigned',
+            email='unassigned@test.com',
+            password='test123',
+            role='EMPLOYEE'
+        )
+        self.leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+    
+    def _stats(self, manager):
+        self.client.force_authenticate(user=manager)
+        return self.client.get('/api/manager-stats/').data
+    
+    def _create_leave(self, employee):
+        self.client.force_authenticate(user=employee)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/leaves/', {
+                'leave_type_id': self.leave_type.id,
+                'start_date': str(date.today()),
+                'end_date': str(date.today()),
+                'reason': 'Test'
+            }, format='json')
+        return response.data['id']
+    
+    def test_repeated_polls_hit_cache(self):
+        """Test only the first poll queries the database."""
+        self._stats(self.manager)
+        
+        with self.assertNumQueries(0):
+            stats = self._stats(self.manager)
+        self.assertEqual(stats['pending'], 0)
+    
+    def test_new_leave_invalidates_own_manager(self):
+        """Test a report's new leave refreshes their manager's counters only."""
+        self._stats(self.manager)
+        self._stats(self.other_manager)
+        
+        self._create_leave(self.employee)
+        
+        self.assertEqual(self._stats(self.manager)['pending'], 1)
+        with self.assertNumQueries(0):
+            self._stats(self.other_manager)
+    
+    def test_unassigned_leave_invalidates_every_manager(self):
+        """Test leaves of unassigned employees refresh all managers' counters."""
+        self._stats(self.manager)
+        self._stats(self.other_manager)
+        
+        self._create_leave(self.unassigned)
+        
+        self.assertEqual(self._stats(self.manager)['pending'], 1)
+        self.assertEqual(self._stats(self.other_manager)['pending'], 1)
+    
+    def test_action_invalidates(self):
+        """Test approving moves the leave from pending to approved today."""
+        leave_id = self._create_leave(self.employee)
+        self.assertEqual(self._stats(self.manager)['pending'], 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/leaves/{leave_id}/action/', {'action': 'approve'}, format='json')
+        
+        stats = self._stats(self.manager)
+        self.assertEqual(stats['pending'], 0)
+        self.assertEqual(stats['approved_today'], 1)
+    
+    def test_delete_and_edit_invalidate(self):
+        """Test editing or deleting a pending leave refreshes its manager's counters."""
+        leave_id = self._create_leave(self.employee)
+        self.assertEqual(self._stats(self.manager)['pending'], 1)
+        
+        self.client.force_authenticate(user=self.employee)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/leaves/{leave_id}/', {'reason': 'Edited'}, format='json')
+        with self.assertNumQueries(1):
+            self._stats(self.manager)
+        
+        self.client.force_authenticate(user=self.employee)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/leaves/{leave_id}/')
+        self.assertEqual(self._stats(self.manager)['pending'], 0)
+
+
+class TestSeedAndBenchmarkCommands(TestCase):
+    """Test the synthetic data generator and the API benchmark command."""
+    
+    def _seed(self, **options):
+        call_command(
+            'seed_data', managers=2, employees_per_manager=3, hr=1, years=2,
+            leaves_per_year=4, random_seed=1, stdout=StringIO(), **options
+        )
+    
+    def test_seed_data_creates_organization(self):
+        """Test seeding creates users, history and a matching balance ledger."""
+        self._seed()
+        
+        seeded = User.objects.filter(username__startswith='seed_')
+        self.assertEqual(seeded.filter(role='MANAGER').count(), 2)
+        self.assertEqual(seeded.filter(role='HR').count(), 1)
+        employees = seeded.filter(role='EMPLOYEE')
+        self.assertEqual(employees.count(), 6)
+        self.assertFalse(employees.filter(manager__isnull=True).exists())
+        
+        self.assertEqual(LeaveRequest.objects.count(), 6 * 2 * 4)
+        self.assertEqual(Notification.objects.count(), LeaveRequest.objects.count())
+        decided = LeaveRequest.objects.exclude(status='PENDING').count()
+        self.assertEqual(LeaveAuditLog.objects.count(), LeaveRequest.objects.count() + decided)
+        
+        balances = {(b.user_id, b.leave_type_id, b.year): b.used_days for b in LeaveBalance.objects.all()}
+        rebuild_balances()
+        self.assertEqual(
+            balances,
+            {(b.user_id, b.leave_type_id, b.year): b.used_days for b in LeaveBalance.objects.all()},
+        )
+    
+    def test_seed_data_backdates_history(self):
+        """Test seeded timestamps are spread over the past instead of set to now."""
+        self._seed()
+        
+        oldest = LeaveRequest.objects.order_by('created_at').first()
+        self.assertLess(oldest.created_at, timezone.now() - timedelta(days=180))
+        log = oldest.audit_logs.get(action='CREATED')
+        self.assertEqual(log.timestamp, oldest.created_at)
+    
+    def test_benchmark_api_reports_json(self):
+        """Test the benchmark emits latency, query and throughput figures per endpoint."""
+        self._seed()
+        out = StringIO()
+        
+        call_command(
+            'benchmark_api', requests=2, warmup=0, include_writes=True,
+            endpoint=['leaves_list_manager', 'employee_stats', 'leave_create'], stdout=out,
+        )
+        
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['meta']['dataset']['leave_requests'], 48)
+        self.assertEqual(set(report['endpoints']), {'leaves_list_manager', 'employee_stats', 'leave_create'})
+        for result in report['endpoints'].values():
+            self.assertEqual(result['requests'], 2)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['throughput_rps'], 0)
+            self.assertGreater(result['queries_per_request'], 0)
+        self.assertEqual(report['endpoints']['leaves_list_manager']['status_codes'], {'200': 2})
+        self.assertEqual(report['endpoints']['leave_create']['status_codes'], {'201': 2})
+        # Write benchmarks are rolled back
+        self.assertEqual(LeaveRequest.objects.count(), 48)
+
+
+class TestRequestMetrics(TestCase):
+    """Test the per-request timing middleware and the metrics endpoint."""
+    
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.employee = User.objects.create_user(username='employee', password='test123', role='EMPLOYEE')
+        self.staff = User.objects.create_user(username='ops', password='test123', role='HR', is_staff=True)
+        self.leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+    
+    def _create_leave(self, weeks_ahead=1):
+        self.client.force_authenticate(user=self.employee)
+        return self.client.post('/api/leaves/', {
+            'leave_type_id': self.leave_type.id,
+            'start_date': date.today() + timedelta(weeks=weeks_ahead),
+            'end_date': date.today() + timedelta(weeks=weeks_ahead, days=1),
+            'reason': 'Metrics',
+        }, format='json')
+    
+    def test_server_timing_header(self):
+        """Test responses report wall time, DB time/queries and notification/webhook time."""
+        response = self._create_leave()
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('notify;dur=', timing)
+        self.assertIn('webhook;dur=', timing)
+    
+    def test_metrics_aggregate_by_route(self):
+        """Test requests are aggregated per method and route name, not per path."""
+        self._create_leave()
+        self._create_leave(weeks_ahead=2)
+        self.client.get('/api/leaves/')
+        
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get('/api/internal/metrics/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        routes = response.data['routes']
+        create = routes['POST leave-list']
+        self.assertEqual(create['requests'], 2)
+        self.assertEqual(create['status_codes'], {'201': 2})
+        self.assertEqual(sum(create['duration_ms']['buckets'].values()), 2)
+        self.assertGreater(create['queries']['mean'], 0)
+        self.assertEqual(create['sections_ms']['notify']['count'], 2)
+        self.assertEqual(routes['GET leave-list']['requests'], 1)
+    
+    def test_metrics_endpoint_is_staff_only(self):
+        """Test non-staff users cannot read or reset the metrics."""
+        self.client.force_authenticate(user=self.employee)
+        
+        self.assertEqual(self.client.get('/api/internal/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.delete('/api/internal/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_reset(self):
+        """Test DELETE clears the histograms."""
+        self._create_leave()
+        self.client.force_authenticate(user=self.staff)
+        
+        self.assertEqual(self.client.delete('/api/internal/metrics/').status_code, status.HTTP_204_NO_CONTENT)
+        # Only the reset request itself is recorded afterwards
+        self.assertEqual(list(registry.snapshot()['routes']), ['DELETE request-metrics'])
+
+
+class TestBulkLeaveAction(TestCase):
+    """Test the batch approve/reject endpoint."""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(username='manager', email='manager@test.com', password='test123', role='MANAGER')
+        self.other_manager = User.objects.create_user(username='other', email='other@test.com', password='test123', role='MANAGER')
+        self.employees = [
+            User.objects.create_user(username=f'employee{i}', email=f'employee{i}@test.com',
+                                     password='test123', role='EMPLOYEE', manager=self.manager)
+            for i in range(3)
+        ]
+        self.outsider = User.objects.create_user(username='outsider', email='outsider@test.com',
+                                                 password='test123', role='EMPLOYEE', manager=self.other_manager)
+        self.leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        Webhook.objects.create(name='Hook', url='http://127.0.0.1:9/', secret='s', events=['leave_approved', 'leave_rejected'])
+    
+    def _leaves(self, count, user=None):
+        # One week apart so an employee's leaves never overlap
+        start = date(timezone.now().year, 1, 1) + timedelta(weeks=LeaveRequest.objects.count())
+        return [
+            LeaveRequest.objects.create(
+                user=user or self.employees[i % len(self.employees)], leave_type=self.leave_type,
+                start_date=start + timedelta(weeks=i), end_date=start + timedelta(weeks=i, days=1),
+                reason='Test', status='PENDING'
+            )
+            for i in range(count)
+        ]
+    
+    def _bulk(self, ids, action='approve', user=None):
+        self.client.force_authenticate(user=user or self.manager)
+        return self.client.post('/api/leaves/bulk-action/', {
+            'ids': ids, 'action': action, 'comment': 'Batch'
+        }, format='json')
+    
+    def test_bulk_approve(self):
+        """Test pending team leaves are approved with audit logs, ledger, emails and webhooks."""
+        leaves = self._leaves(4)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._bulk([leave.id for leave in leaves])
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], [leave.id for leave in leaves])
+        self.assertEqual(response.data['skipped'], [])
+        self.assertEqual(LeaveRequest.objects.filter(status='APPROVED', manager_comment='Batch').count(), 4)
+        self.assertEqual(LeaveAuditLog.objects.filter(action='APPROVE', action_by=self.manager).count(), 4)
+        self.assertEqual(Notification.objects.filter(subject='Leave Request Approved').count(), 4)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(WebhookDelivery.objects.filter(event_type='leave_approved').count(), 4)
+        # employee0 has two 2-day leaves, the others one each
+        self.assertEqual(
+            sorted(LeaveBalance.objects.values_list('used_days', flat=True)), [2, 2, 4]
+        )
+        balances = {(b.user_id, b.leave_type_id, b.year): b.used_days for b in LeaveBalance.objects.all()}
+        rebuild_balances()
+        self.assertEqual(
+            balances,
+            {(b.user_id, b.leave_type_id, b.year): b.used_days for b in LeaveBalance.objects.all()},
+        )
+    
+    def test_bulk_reject_leaves_ledger_untouched(self):
+        """Test rejecting does not record usage."""
+        leaves = self._leaves(2)
+        
+        response = self._bulk([leave.id for leave in leaves], action='reject')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(LeaveRequest.objects.filter(status='REJECTED').count(), 2)
+        self.assertFalse(LeaveBalance.objects.exists())
+        self.assertEqual(WebhookDelivery.objects.filter(event_type='leave_rejected').count(), 2)
+    
+    def test_reads_back_only_its_own_updates(self):
+        """Test a row another request changed in the same tick isn't reported or logged."""
+        pending = self._leaves(1)[0]
+        foreign = self._leaves(1, user=self.outsider)[0]
+        now = timezone.now()
+        LeaveRequest.objects.filter(pk=foreign.pk).update(status='APPROVED', updated_at=now)
+        
+        with patch('leaves.views.timezone.now', return_value=now):
+            response = self._bulk([pending.id, foreign.id])
+        
+        self.assertEqual(response.data['updated'], [pending.id])
+        self.assertEqual(response.data['skipped'], [foreign.id])
+        self.assertFalse(LeaveAuditLog.objects.filter(leave=foreign).exists())
+    
+    def test_skips_decided_and_foreign_leaves(self):
+        """Test only pending leaves in the caller's scope are changed."""
+        pending, decided = self._leaves(2)
+        decided.status = 'REJECTED'
+        decided.save()
+        foreign = self._leaves(1, user=self.outsider)[0]
+        
+        response = self._bulk([pending.id, decided.id, foreign.id, 999999])
+        
+        self.assertEqual(response.data['updated'], [pending.id])
+        self.assertEqual(response.data['skipped'], sorted([decided.id, foreign.id, 999999]))
+        decided.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual(decided.status, 'REJECTED')
+        self.assertEqual(foreign.status, 'PENDING')
+        self.assertEqual(LeaveAuditLog.objects.count(), 1)
+    
+    def test_query_count_does_not_grow_with_batch_size(self):
+        """Test a 20-leave batch costs the same number of queries as a 2-leave batch."""
+        small = [leave.id for leave in self._leaves(2)]
+        large = [leave.id for leave in self._leaves(20)]
+        self.client.force_authenticate(user=self.manager)
+        
+        with CaptureQueriesContext(connection) as small_queries:
+            self._bulk(small)
+        with CaptureQueriesContext(connection) as large_queries:
+            self._bulk(large)
+        
+        self.assertEqual(len(large_queries), len(small_queries))
+    
+    def test_permissions_and_validation(self):
+        """Test employees are rejected and malformed bodies return 400."""
+        leave = self._leaves(1)[0]
+        
+        self.assertEqual(self._bulk([leave.id], user=self.employees[0]).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self._bulk([], action='approve').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._bulk([leave.id], action='cancel').status_code, status.HTTP_400_BAD_REQUEST)
+        leave.refresh_from_db()
+        self.assertEqual(leave.status, 'PENDING')
+    
+    def test_invalidates_manager_stats(self):
+        """Test cached dashboard counters reflect the batch."""
+        leaves = self._leaves(3)
+        self.assertEqual(get_manager_stats(self.manager)['pending'], 3)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._bulk([leave.id for leave in leaves])
+        
+        stats = get_manager_stats(self.manager)
+        self.assertEqual(stats['pending'], 0)
+        self.assertEqual(stats['approved_today'], 3)
+
+
+class TestLeaveImport(TestCase):
+    """Test bulk import of leave history from CSV and JSON-lines."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.hr = User.objects.create_user(username='hr', email='hr@test.com', password='test123', role='HR')
+        self.manager = User.objects.create_user(username='manager', email='manager@test.com', password='test123', role='MANAGER')
+        self.employee = User.objects.create_user(username='employee', email='Employee@Test.com', password='test123',
+                                                 role='EMPLOYEE', manager=self.manager)
+        self.leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        Webhook.objects.create(name='Hook', url='http://127.0.0.1:9/', secret='s', events=['leave_created'])
+        self.csv = (
+            'username,email,leave_type,start_date,end_date,reason,status,created_at\n'
+            'employee,,Sick Leave,2024-03-04,2024-03-06,Flu,APPROVED,2024-03-01T09:00:00\n'
+            ',employee@test.com,sick leave,2024-05-01,2024-05-01,Dentist,rejected,\n'
+            'ghost,,Sick Leave,2024-05-01,2024-05-01,,APPROVED,\n'
+            'employee,,Sick Leave,2024-05-03,2024-05-01,,APPROVED,\n'
+            'employee,,Vacation,2024-05-01,2024-05-01,,APPROVED,\n'
+            'employee,,Sick Leave,05/01/2024,2024-05-01,,APPROVED,\n'
+        )
+    
+    def _import_file(self, content, name='leaves.csv', **options):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, name)
+            with open(path, 'w') as f:
+                f.write(content)
+            call_command('import_leaves', path, stdout=out, **options)
+        return out.getvalue()
+    
+    def test_command_imports_valid_rows_and_reports_errors(self):
+        """Test valid rows are inserted with audit logs and bad rows are reported by line."""
+        output = self._import_file(self.csv, actor='hr')
+        
+        self.assertIn('Imported 2 of 6 rows (4 failed)', output)
+        self.assertEqual(LeaveRequest.objects.count(), 2)
+        self.assertEqual(LeaveRequest.objects.filter(status='REJECTED').count(), 1)
+        self.assertEqual(LeaveAuditLog.objects.filter(action='IMPORTED', action_by=self.hr).count(), 2)
+        report = json.loads(output[:output.rindex('}') + 1])
+        self.assertEqual([error['line'] for error in report['errors']], [4, 5, 6, 7])
+    
+    def test_import_preserves_history_and_suppresses_side_effects(self):
+        """Test original timestamps are kept, the ledger is updated and nothing is sent."""
+        self._import_file(self.csv)
+        
+        leave = LeaveRequest.objects.get(status='APPROVED')
+        self.assertEqual(leave.created_at.date(), date(2024, 3, 1))
+        self.assertEqual(leave.audit_logs.get().timestamp, leave.created_at)
+        self.assertEqual(leave.updated_at, leave.created_at)
+        self.assertEqual(
+            LeaveBalance.objects.get(user=self.employee, leave_type=self.leave_type, year=2024).used_days, 3
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(WebhookDelivery.objects.exists())
+    
+    def test_other_writes_keep_auto_timestamps(self):
+        """Test leaves saved elsewhere while an import runs still get their timestamps."""
+        bulk_create = LeaveAuditLog.objects.bulk_create
+        
+        def bulk_create_during_request(*args, **kwargs):
+            # Another request creating a leave in the middle of the import
+            LeaveRequest.objects.create(
+                user=self.employee, leave_type=self.leave_type, reason='Concurrent',
+                start_date=date(2024, 6, 3), end_date=date(2024, 6, 3),
+            )
+            return bulk_create(*args, **kwargs)
+        
+        with patch.object(LeaveAuditLog.objects, 'bulk_create', side_effect=bulk_create_during_request):
+            self._import_file(self.csv)
+        
+        self.assertIsNotNone(LeaveRequest.objects.get(reason='Concurrent').created_at)
+        self.assertEqual(LeaveRequest.objects.get(status='APPROVED').created_at.date(), date(2024, 3, 1))
+    
+    def test_chunked_import(self):
+        """Test rows spanning several chunks are all imported."""
+        rows = ''.join(
+            f'employee,,Sick Leave,2024-01-{day:02d},2024-01-{day:02d},,APPROVED,\n' for day in range(1, 8)
+        )
+        output = self._import_file('username,email,leave_type,start_date,end_date,reason,status,created_at\n' + rows, chunk_size=3)
+        
+        self.assertIn('Imported 7 of 7 rows', output)
+        self.assertEqual(
+            LeaveBalance.objects.get(user=self.employee, leave_type=self.leave_type, year=2024).used_days, 7
+        )
+    
+    def test_dry_run_writes_nothing(self):
+        """Test --dry-run validates without inserting."""
+        output = self._import_file(self.csv, dry_run=True)
+        
+        self.assertIn('Validated 2 of 6 rows', output)
+        self.assertFalse(LeaveRequest.objects.exists())
+    
+    def test_endpoint_accepts_raw_ndjson(self):
+        """Test HR can stream JSON-lines in the request body."""
+        body = (
+            json.dumps({'username': 'employee', 'leave_type_id': self.leave_type.id,
+                        'start_date': '2024-02-01', 'end_date': '2024-02-02', 'status': 'APPROVED'}) + '\n'
+            + '\n'
+            + '[1, 2]\n'
+            + json.dumps({'email': 'EMPLOYEE@test.com', 'leave_type': 'Sick Leave',
+                          'start_date': '2024-02-05', 'end_date': '2024-02-05'}) + '\n'
+        )
+        self.client.force_authenticate(user=self.hr)
+        
+        response = self.client.post('/api/leaves/import/', body, content_type='application/x-ndjson')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(response.data['errors'], [{'line': 3, 'error': 'Expected an object, got [1, 2]'}])
+        self.assertEqual(LeaveRequest.objects.filter(status='PENDING').count(), 1)
+    
+    def test_email_lookup_is_case_insensitive(self):
+        """Test rows can identify employees by email in any case."""
+        output = self._import_file(
+            'email,leave_type,start_date,end_date\nEMPLOYEE@test.com,Sick Leave,2024-05-01,2024-05-01\n'
+        )
+        
+        self.assertIn('Imported 1 of 1 rows', output)
+        self.assertEqual(LeaveRequest.objects.get().user, self.employee)
+    
+    def test_endpoint_accepts_multipart_upload(self):
+        """Test HR can upload a CSV file."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        self.client.force_authenticate(user=self.hr)
+        
+        response = self.client.post('/api/leaves/import/', {
+            'file': SimpleUploadedFile('legacy.csv', self.csv.encode('utf-8'), content_type='text/csv'),
+        }, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rows'], 6)
+        self.assertEqual(response.data['imported'], 2)
+    
+    def test_endpoint_is_hr_only(self):
+        """Test managers and employees cannot import."""
+        for user in (self.manager, self.employee):
+            self.client.force_authenticate(user=user)
+            response = self.client.post('/api/leaves/import/', self.csv, content_type='text/csv')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(LeaveRequest.objects.exists())
+
+
+class TestStreamingExport(TestCase):
+    """Test HR's streaming CSV / JSON-lines exports."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.hr = User.objects.create_user(username='hr', email='hr@test.com', password='test123', role='HR')
+        self.employee = User.objects.create_user(username='employee', email='employee@test.com', password='test123', role='EMPLOYEE')
+        self.sick = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        self.casual = LeaveType.objects.create(name='Casual Leave', days_allowed=12)
+        self.march = LeaveRequest.objects.create(
+            user=self.employee, leave_type=self.sick, start_date=date(2024, 3, 4), end_date=date(2024, 3, 6),
+            reason='Flu, "bad"', status='APPROVED'
+        )
+        self.june = LeaveRequest.objects.create(
+            user=self.employee, leave_type=self.casual, start_date=date(2024, 6, 10), end_date=date(2024, 6, 10),
+            reason='Errand', status='PENDING'
+        )
+        LeaveAuditLog.objects.create(leave=self.march, action_by=self.employee, action='CREATED', new_status='PENDING')
+        LeaveAuditLog.objects.create(leave=self.march, action_by=self.hr, action='APPROVE',
+                                     previous_status='PENDING', new_status='APPROVED')
+        self.client.force_authenticate(user=self.hr)
+    
+    def _rows(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+    
+    def test_csv_export(self):
+        """Test the leave export streams a CSV with a header row."""
+        import csv
+        response = self.client.get('/api/export/leaves/', HTTP_ACCEPT='text/csv')
+        
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="leaves-', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(self._rows(response))))
+        self.assertEqual([row['id'] for row in rows], [str(self.march.id), str(self.june.id)])
+        self.assertEqual(rows[0]['reason'], 'Flu, "bad"')
+        self.assertEqual(rows[0]['username'], 'employee')
+        self.assertEqual(rows[0]['leave_type'], 'Sick Leave')
+        self.assertEqual(rows[0]['start_date'], '2024-03-04')
+    
+    def test_ndjson_export_with_filters(self):
+        """Test date-range, status and leave-type filters on the leave export."""
+        def ids(query):
+            content = self._rows(self.client.get(f'/api/export/leaves/?file_format=ndjson&{query}'))
+            return [json.loads(line)['id'] for line in content.splitlines()]
+        
+        self.assertEqual(ids(''), [self.march.id, self.june.id])
+        self.assertEqual(ids('from=2024-03-06&to=2024-03-31'), [self.march.id])
+        self.assertEqual(ids('from=2024-03-07'), [self.june.id])
+        self.assertEqual(ids('status=pending'), [self.june.id])
+        self.assertEqual(ids(f'leave_type={self.sick.id}'), [self.march.id])
+    
+    def test_audit_log_export(self):
+        """Test the audit export filters on timestamp, new status and leave type."""
+        today = timezone.localdate().isoformat()
+        content = self._rows(self.client.get(
+            f'/api/export/audit-logs/?file_format=ndjson&from={today}&to={today}&status=approved&leave_type={self.sick.id}'
+        ))
+        
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['action'], 'APPROVE')
+        self.assertEqual(rows[0]['action_by'], 'hr')
+        self.assertEqual(rows[0]['leave_id'], self.march.id)
+        
+        yesterday = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(self._rows(self.client.get(f'/api/export/audit-logs/?file_format=ndjson&to={yesterday}')), '')
+    
+    def test_export_streams_in_blocks(self):
+        """Test large exports are flushed in several chunks rather than one document."""
+        from leaves import exports
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(user=self.employee, leave_type=self.sick, start_date=date(2024, 1, 1),
+                         end_date=date(2024, 1, 1), reason='x' * 200, status='APPROVED')
+            for _ in range(1000)
+        ])
+        
+        response = self.client.get('/api/export/leaves/')
+        chunks = list(response.streaming_content)
+        
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) < 2 * exports.FLUSH_BYTES for chunk in chunks))
+        self.assertEqual(b''.join(chunks).count(b'\n'), 1003)
+    
+    def test_export_is_hr_only_and_validates_params(self):
+        """Test non-HR users are refused and bad parameters return 400."""
+        self.assertEqual(self.client.get('/api/export/leaves/?from=03/01/2024').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/export/leaves/?file_format=xml').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/export/leaves/?leave_type=abc').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/export/audit-logs/?leave_type=abc').status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.client.force_authenticate(user=self.employee)
+        self.assertEqual(self.client.get('/api/export/leaves/').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get('/api/export/audit-logs/').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestLeaveOverlaps(TestCase):
+    """Test date validation, overlap conflicts and the team absence query."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = User.objects.create_user(username='manager', password='test123', role='MANAGER')
+        self.other_manager = User.objects.create_user(username='other', password='test123', role='MANAGER')
+        self.employee = User.objects.create_user(username='employee', password='test123', role='EMPLOYEE', manager=self.manager)
+        self.colleague = User.objects.create_user(username='colleague', password='test123', role='EMPLOYEE', manager=self.manager)
+        self.outsider = User.objects.create_user(username='outsider', password='test123', role='EMPLOYEE', manager=self.other_manager)
+        self.leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        self.start = date.today() + timedelta(days=30)
+    
+    def _leave(self, user, offset, days=1, status='PENDING'):
+        return LeaveRequest.objects.create(
+            user=user, leave_type=self.leave_type, reason='Test', status=status,
+            start_date=self.start + timedelta(days=offset),
+            end_date=self.start + timedelta(days=offset + days - 1),
+        )
+    
+    def _create(self, offset, days=1):
+        self.client.force_authenticate(user=self.employee)
+        return self.client.post('/api/leaves/', {
+            'leave_type_id': self.leave_type.id,
+            'start_date': self.start + timedelta(days=offset),
+            'end_date': self.start + timedelta(days=offset + days - 1),
+            'reason': 'Test',
+        }, format='json')
+    
+    def test_end_before_start_rejected(self):
+        """Test a reversed date range is refused."""
+        response = self._create(5, days=-1)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('end_date', response.data)
+    
+    def test_overlapping_create_rejected(self):
+        """Test a request overlapping a pending or approved leave is refused."""
+        pending = self._leave(self.employee, 0, days=3)
+        approved = self._leave(self.employee, 10, days=2, status='APPROVED')
+        
+        response = self._create(2, days=2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f'#{pending.id}', str(response.data))
+        self.assertEqual(self._create(11).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f'#{approved.id}', str(self._create(9, days=2).data))
+    
+    def test_non_overlapping_create_allowed(self):
+        """Test adjacent dates, rejected leaves and other users' leaves don't block a request."""
+        self._leave(self.employee, 0, days=3)
+        self._leave(self.employee, 5, status='REJECTED')
+        self._leave(self.colleague, 3)
+        
+        self.assertEqual(self._create(3, days=3).status_code, status.HTTP_201_CREATED)
+    
+    def test_update_ignores_itself(self):
+        """Test editing a leave doesn't conflict with its own dates."""
+        leave = self._leave(self.employee, 0, days=3)
+        self.client.force_authenticate(user=self.employee)
+        
+        response = self.client.patch(f'/api/leaves/{leave.id}/', {
+            'end_date': self.start + timedelta(days=3)
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_approve_conflict_returns_409(self):
+        """Test approving a leave that overlaps an approved one is refused."""
+        approved = self._leave(self.employee, 0, days=3, status='APPROVED')
+        # Legacy rows can overlap; the serializer would refuse this one
+        pending = self._leave(self.employee, 2)
+        self.client.force_authenticate(user=self.manager)
+        
+        response = self.client.post(f'/api/leaves/{pending.id}/action/', {'action': 'approve'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['conflicting_leave'], approved.id)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'PENDING')
+        # Rejecting is always allowed
+        response = self.client.post(f'/api/leaves/{pending.id}/action/', {'action': 'reject'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_conflict_checked_after_competing_approval(self):
+        """Test the overlap check sees an approval that committed while waiting for the lock."""
+        first = self._leave(self.employee, 0, days=3)
+        second = self._leave(self.employee, 2)
+        
+        def competing_approval(user_ids):
+            # Another manager approved the overlapping leave and committed first
+            LeaveRequest.objects.filter(pk=first.pk).update(status='APPROVED')
+            lock_blocking_leaves(user_ids)
+        
+        self.client.force_authenticate(user=self.manager)
+        with patch('leaves.views.lock_blocking_leaves', side_effect=competing_approval):
+            response = self.client.post(f'/api/leaves/{second.id}/action/', {'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['conflicting_leave'], first.id)
+        
+        LeaveRequest.objects.filter(pk=first.pk).update(status='PENDING')
+        with patch('leaves.views.lock_blocking_leaves', side_effect=competing_approval):
+            response = self.client.post('/api/leaves/bulk-action/', {
+                'ids': [second.id], 'action': 'approve'
+            }, format='json')
+        self.assertEqual(response.data['conflicts'], {str(second.id): first.id})
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'PENDING')
+    
+    def test_bulk_approve_reports_conflicts(self):
+        """Test bulk approval skips leaves overlapping approved ones, including within the batch."""
+        approved = self._leave(self.employee, 0, days=3, status='APPROVED')
+        against_existing = self._leave(self.employee, 1)
+        first = self._leave(self.employee, 10, days=2)
+        against_batch = self._leave(self.employee, 11)
+        clear = self._leave(self.colleague, 1)
+        self.client.force_authenticate(user=self.manager)
+        
+        response = self.client.post('/api/leaves/bulk-action/', {
+            'ids': [against_existing.id, first.id, against_batch.id, clear.id], 'action': 'approve'
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], [first.id, clear.id])
+        self.assertEqual(response.data['conflicts'], {
+            str(against_existing.id): approved.id, str(against_batch.id): first.id
+        })
+        self.assertEqual(response.data['skipped'], [])
+        self.assertEqual(LeaveRequest.objects.filter(status='PENDING').count(), 2)
+    
+    def test_team_absences(self):
+        """Test managers see their team's pending and approved leaves overlapping the range."""
+        approved = self._leave(self.employee, 0, days=5, status='APPROVED')
+        pending = self._leave(self.colleague, 4)
+        self._leave(self.colleague, 0, status='REJECTED')
+        self._leave(self.colleague, 20)
+        self._leave(self.outsider, 2)
+        self.client.force_authenticate(user=self.manager)
+        url = '/api/team-absences/'
+        
+        response = self.client.get(url, {'from': self.start + timedelta(days=3), 'to': self.start + timedelta(days=6)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([leave['id'] for leave in response.data['leaves']], [approved.id, pending.id])
+        
+        response = self.client.get(url, {'from': self.start, 'to': self.start + timedelta(days=6), 'status': 'approved'})
+        self.assertEqual([leave['id'] for leave in response.data['leaves']], [approved.id])
+        
+        # Checking a request before approving it: its own dates, itself excluded
+        response = self.client.get(url, {'leave': pending.id})
+        self.assertEqual(response.data['from'], pending.start_date)
+        self.assertEqual([leave['id'] for leave in response.data['leaves']], [approved.id])
+    
+    def test_team_absences_validation(self):
+        """Test employees are refused and ranges are validated."""
+        self.client.force_authenticate(user=self.employee)
+        self.assertEqual(self.client.get('/api/team-absences/').status_code, status.HTTP_403_FORBIDDEN)
+        
+        self.client.force_authenticate(user=self.manager)
+        self.assertEqual(self.client.get('/api/team-absences/').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.get('/api/team-absences/', {'leave': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        hr = User.objects.create_user(username='hr_user', password='test123', role='HR')
+        self.client.force_authenticate(user=hr)
+        self.assertEqual(
+            self.client.get('/api/team-absences/', {'from': '2025-01-01', 'to': '2025-01-02', 'manager': 'abc'}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.client.force_authenticate(user=self.manager)
+        self.assertEqual(
+            self.client.get('/api/team-absences/', {'from': '2025-02-01', 'to': '2025-01-01'}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.client.get('/api/team-absences/', {'from': '2024-01-01', 'to': '2025-06-01'}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        outsider_leave = self._leave(self.outsider, 0)
+        self.assertEqual(
+            self.client.get('/api/team-absences/', {'leave': outsider_leave.id}).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+
+class TestConcurrentAction(TestCase):
+    """Test the approve/reject transition is applied once under concurrent requests."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.employee = User.objects.create_user(username='employee', email='employee@test.com',
+                                                 password='test123', role='EMPLOYEE')
+        self.manager = User.objects.create_user(username='manager', password='test123', role='MANAGER')
+        self.other_manager = User.objects.create_user(username='other', password='test123', role='MANAGER')
+        self.leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        self.leave = LeaveRequest.objects.create(
+            user=self.employee, leave_type=self.leave_type, reason='Test',
+            start_date=date.today() + timedelta(days=7), end_date=date.today() + timedelta(days=8),
+        )
+    
+    def _act(self, user, action):
+        self.client.force_authenticate(user=user)
+        return self.client.post(f'/api/leaves/{self.leave.id}/action/', {'action': action}, format='json')
+    
+    def test_stale_read_loses(self):
+        """Test a request that read PENDING after another manager decided gets 409 and no side effects."""
+        stale = LeaveRequest.objects.get(pk=self.leave.pk)
+        self.assertEqual(self._act(self.manager, 'approve').status_code, status.HTTP_200_OK)
+        mail.outbox.clear()
+        
+        with patch('leaves.views.LeaveViewSet.get_object', return_value=stale):
+            response = self._act(self.other_manager, 'reject')
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['status'], 'APPROVED')
+        self.leave.refresh_from_db()
+        self.assertEqual(self.leave.status, 'APPROVED')
+        self.assertEqual(LeaveAuditLog.objects.filter(leave=self.leave, action='REJECT').count(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(LeaveBalance.objects.get(user=self.employee).used_days, 2)
+    
+    def test_repeated_decision_is_conflict(self):
+        """Test approving an already approved leave doesn't duplicate the audit log or emails."""
+        self._act(self.manager, 'approve')
+        mail.outbox.clear()
+        
+        response = self._act(self.other_manager, 'approve')
+        
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(LeaveAuditLog.objects.filter(leave=self.leave, action='APPROVE').count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+    
+    def test_status_not_writable_through_update(self):
+        """Test the owner can't approve their own leave by editing it."""
+        self.client.force_authenticate(user=self.employee)
+        response = self.client.patch(f'/api/leaves/{self.leave.id}/', {
+            'status': 'APPROVED', 'manager_comment': 'Self-approved'
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.leave.refresh_from_db()
+        self.assertEqual(self.leave.status, 'PENDING')
+        self.assertIsNone(self.leave.manager_comment)
+        self.assertFalse(LeaveBalance.objects.exists())
+    
+    def test_only_changed_fields_written(self):
+        """Test the transition is one conditional UPDATE of status, comment and updated_at."""
+        self.client.force_authenticate(user=self.manager)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(f'/api/leaves/{self.leave.id}/action/', {'action': 'approve'}, format='json')
+        
+        updates = [q['sql'] for q in ctx.captured_queries
+                   if q['sql'].startswith('UPDATE "leaves_leaverequest"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"status" = \'PENDING\'', updates[0].split('WHERE')[1])
+        self.assertNotIn('"reason"', updates[0])
+
+
+class TestTeamCalendar(TestCase):
+    """Test the DailyAbsence table and the team calendar endpoint."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = User.objects.create_user(username='manager', password='test123', role='MANAGER')
+        self.other_manager = User.objects.create_user(username='other', password='test123', role='MANAGER')
+        self.hr = User.objects.create_user(username='hr', password='test123', role='HR', manager=self.other_manager)
+        self.alice = User.objects.create_user(username='alice', first_name='Alice', last_name='Smith',
+                                              password='test123', role='EMPLOYEE', manager=self.manager)
+        self.bob = User.objects.create_user(username='bob', password='test123', role='EMPLOYEE', manager=self.manager)
+        self.outsider = User.objects.create_user(username='outsider', password='test123', role='EMPLOYEE', manager=self.other_manager)
+        self.leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        self.start = date(2030, 3, 4)
+    
+    def _leave(self, user, offset, days=1, status='PENDING'):
+        return LeaveRequest.objects.create(
+            user=user, leave_type=self.leave_type, reason='Test', status=status,
+            start_date=self.start + timedelta(days=offset),
+            end_date=self.start + timedelta(days=offset + days - 1),
+        )
+    
+    def _act(self, leave, action):
+        self.client.force_authenticate(user=self.manager)
+        response = self.client.post(f'/api/leaves/{leave.id}/action/', {'action': action}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def _calendar(self, user=None, days=7, **params):
+        self.client.force_authenticate(user=user or self.manager)
+        return self.client.get('/api/team-calendar/', {
+            'from': self.start, 'to': self.start + timedelta(days=days - 1), **params
+        })
+    
+    def test_approve_and_reject_maintain_days(self):
+        """Test approving adds a row per day and rejecting an approved leave removes them."""
+        leave = self._leave(self.alice, 0, days=3)
+        
+        self._act(leave, 'approve')
+        self.assertEqual(
+            list(DailyAbsence.objects.filter(leave=leave).order_by('date').values_list('date', flat=True)),
+            [self.start, self.start + timedelta(days=1), self.start + timedelta(days=2)],
+        )
+        
+        self._act(leave, 'reject')
+        self.assertFalse(DailyAbsence.objects.exists())
+    
+    def test_bulk_approve_maintains_days(self):
+        """Test the batch endpoint records days for every approved leave."""
+        leaves = [self._leave(self.alice, 0, days=2), self._leave(self.bob, 1, days=3)]
+        self.client.force_authenticate(user=self.manager)
+        
+        self.client.post('/api/leaves/bulk-action/', {
+            'ids': [leave.id for leave in leaves], 'action': 'approve'
+        }, format='json')
+        
+        self.assertEqual(DailyAbsence.objects.count(), 5)
+    
+    def test_calendar_counts_and_names(self):
+        """Test per-day counts and names for the manager's team, with empty days included."""
+        for leave in (self._leave(self.alice, 0, days=3), self._leave(self.bob, 2, days=2)):
+            self._act(leave, 'approve')
+        self._leave(self.bob, 5)  # Pending leaves aren't counted
+        outsider_leave = self._leave(self.outsider, 0, status='APPROVED')
+        record_absence_days([outsider_leave])
+        
+        with self.assertNumQueries(1):
+            days = team_calendar(
+                User.objects.filter(manager=self.manager), self.start, self.start + timedelta(days=6)
+            )
+        self.assertEqual([day['count'] for day in days], [1, 1, 2, 1, 0, 0, 0])
+        
+        response = self._calendar()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['days']), 7)
+        third = response.data['days'][2]
+        self.assertEqual(third['date'], self.start + timedelta(days=2))
+        self.assertEqual([person['name'] for person in third['people']], ['Alice Smith', 'bob'])
+        self.assertEqual(third['people'][0]['leave_type'], 'Sick Leave')
+    
+    def test_hr_sees_everyone_or_one_team(self):
+        """Test HR gets the whole company by default and can narrow to a manager's team."""
+        record_absence_days([self._leave(self.alice, 0, status='APPROVED'), self._leave(self.outsider, 0, status='APPROVED')])
+        
+        self.assertEqual(self._calendar(user=self.hr, days=1).data['days'][0]['count'], 2)
+        self.assertEqual(self._calendar(user=self.hr, days=1, manager=self.other_manager.id).data['days'][0]['count'], 1)
+    
+    def test_rebuild_matches_incremental(self):
+        """Test the rebuild command reproduces the incrementally maintained table."""
+        self._act(self._leave(self.alice, 0, days=3), 'approve')
+        self._act(self._leave(self.bob, 1, days=2), 'approve')
+        before = sorted(DailyAbsence.objects.values_list('leave_id', 'user_id', 'date'))
+        
+        call_command('rebuild_absence_calendar', stdout=StringIO())
+        
+        self.assertEqual(sorted(DailyAbsence.objects.values_list('leave_id', 'user_id', 'date')), before)
+    
+    def test_validation(self):
+        """Test employees are refused and the range is required and bounded."""
+        self.assertEqual(self._calendar(user=self.alice).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.manager)
+        self.assertEqual(self.client.get('/api/team-calendar/').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._calendar(days=400).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._calendar(user=self.hr, manager='abc').status_code, status.HTTP_400_BAD_REQUEST)
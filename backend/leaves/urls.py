@@ -1,6 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import LeaveViewSet, ManagerQueueView, HRSummaryView, LeaveTypeViewSet, ManagerStatsView, EmployeeStatsView
+from .views import (
+    LeaveViewSet, ManagerQueueView, HRSummaryView, LeaveTypeViewSet, ManagerStatsView, EmployeeStatsView,
+    LeaveBalanceListView, LeaveExportView, AuditLogExportView, TeamAbsenceView,
+    TeamCalendarView
+)
 
 router = DefaultRouter()
 router.register(r'leaves', LeaveViewSet, basename='leave')
@@ -11,5 +15,10 @@ urlpatterns = [
     path('manager-queue/', ManagerQueueView.as_view(), name='manager-queue'),
     path('manager-stats/', ManagerStatsView.as_view(), name='manager-stats'),
     path('hr-summary/', HRSummaryView.as_view(), name='hr-summary'),
+    path('team-absences/', TeamAbsenceView.as_view(), name='team-absences'),
+    path('team-calendar/', TeamCalendarView.as_view(), name='team-calendar'),
+    path('leave-balances/', LeaveBalanceListView.as_view(), name='leave-balances'),
+    path('export/leaves/', LeaveExportView.as_view(), name='export-leaves'),
+    path('export/audit-logs/', AuditLogExportView.as_view(), name='export-audit-logs'),
     path('', include(router.urls)),
 ]
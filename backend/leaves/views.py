@@ -1,9 +1,31 @@
+from datetime import date, datetime, time, timedelta
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.views import APIView
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from .models import LeaveRequest, LeaveType, LeaveAuditLog
-from .serializers import LeaveRequestSerializer, LeaveTypeSerializer
+from users.models import team_q
+from .models import LeaveRequest, LeaveType, LeaveAuditLog, LeaveBalance
+from .serializers import (
+    LeaveRequestSerializer, LeaveRequestListSerializer, LeaveAuditLogSerializer, LeaveTypeSerializer,
+    LeaveBalanceSerializer, LeaveBulkActionSerializer
+)
+from .pagination import LeaveCursorPagination, LeaveBalanceCursorPagination
+from .absences import apply_absence_change, record_absence_days, team_calendar
+from .conflicts import approval_conflicts, lock_blocking_leaves
+from .balances import apply_status_change, record_bulk_leave_usage
+from .exports import AUDIT_LOG_COLUMNS, CONTENT_TYPES, FORMATS as EXPORT_FORMATS, LEAVE_COLUMNS, stream_rows
+from .importer import FORMATS, LeaveImporter, detect_format, iter_rows
+from .cache import get_manager_stats, invalidate_manager_stats, invalidate_manager_stats_for
+
+User = get_user_model()
 
 class LeaveViewSet(viewsets.ModelViewSet):
     """
@@ -11,50 +33,230 @@ class LeaveViewSet(viewsets.ModelViewSet):
     
     Provides standard CRUD operations plus a custom action for approval/rejection.
     Access control is handled via permission_classes and get_queryset.
+    
+    Lists use the compact LeaveRequestListSerializer; the audit trail is only
+    included on retrieve and on the dedicated /audit/ endpoint.
     """
     serializer_class = LeaveRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LeaveCursorPagination
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return LeaveRequestListSerializer
+        return LeaveRequestSerializer
 
     def get_queryset(self):
         """
         Filter leaves based on user role:
         - HR: Can see ALL leaves.
-        - MANAGER: Can see ALL leaves when viewing details or performing actions.
+        - MANAGER: Can see their team's leaves (and their own) when viewing details or performing actions.
         - EMPLOYEE: Can only see their OWN leaves.
         """
         user = self.request.user
         if user.role == 'HR':
-            return LeaveRequest.objects.all()
-        # Allow Managers to access any leave for detail views and custom actions
-        if user.role == 'MANAGER' and self.action in ['retrieve', 'action']:
-            return LeaveRequest.objects.all()
-        return LeaveRequest.objects.filter(user=user)
+            queryset = LeaveRequest.objects.all()
+        # Allow Managers to access their team's leaves for detail views and custom actions
+        elif user.role == 'MANAGER' and self.action in ['retrieve', 'action', 'audit', 'bulk_action']:
+            queryset = LeaveRequest.objects.for_manager(user) | LeaveRequest.objects.filter(user=user)
+        else:
+            queryset = LeaveRequest.objects.filter(user=user)
+        
+        if self.action == 'retrieve':
+            return queryset.with_details()
+        # Lists don't render audit logs; the action adds one, so a prefetch would be stale
+        return queryset.for_list()
 
     def perform_create(self, serializer):
         """
         Custom create logic to handle side effects:
         1. Set the user to the current logged-in user.
         2. Create an initial Audit Log entry.
-        3. Trigger Email Notifications.
-        4. Trigger Webhooks.
+        3. Record notifications; emails are sent once the transaction commits.
+        4. Queue Webhooks in the delivery outbox.
+        
+        All writes share one transaction, so the request commits once.
+        """
+        with transaction.atomic():
+            leave = serializer.save(user=self.request.user)
+            # Create audit log for creation
+            LeaveAuditLog.objects.create(
+                leave=leave,
+                action_by=self.request.user,
+                action='CREATED',
+                new_status='PENDING',
+                comment='Leave request created'
+            )
+            
+            # Queue webhook in the same transaction (delivered by the outbox worker)
+            from notifications.webhooks import send_leave_created_webhook
+            send_leave_created_webhook(leave)
+            
+            # Notification records commit with the leave; emails go out after commit
+            from notifications.utils import send_leave_created_notification
+            send_leave_created_notification(leave)
+            
+            transaction.on_commit(lambda: invalidate_manager_stats(leave))
+
+    def perform_update(self, serializer):
         """
-        leave = serializer.save(user=self.request.user)
-        # Create audit log for creation
-        LeaveAuditLog.objects.create(
-            leave=leave,
-            action_by=self.request.user,
-            action='CREATED',
-            new_status='PENDING',
-            comment='Leave request created'
+        Save an edit. For an approved leave, its days move in the ledger and the
+        absence calendar from the old dates and leave type to the new ones.
+        """
+        instance = serializer.instance
+        previous = LeaveRequest(
+            id=instance.id,
+            user_id=instance.user_id,
+            leave_type=instance.leave_type,
+            start_date=instance.start_date,
+            end_date=instance.end_date,
         )
+        with transaction.atomic():
+            leave = serializer.save()
+            if leave.status == 'APPROVED':
+                apply_status_change(previous, 'APPROVED', 'PENDING')
+                apply_status_change(leave, 'PENDING', 'APPROVED')
+                apply_absence_change(previous, 'APPROVED', 'PENDING')
+                apply_absence_change(leave, 'PENDING', 'APPROVED')
+            
+            transaction.on_commit(lambda: invalidate_manager_stats(leave))
+
+    def perform_destroy(self, instance):
+        """Delete a leave, giving an approved leave's days back to the ledger (calendar rows cascade)."""
+        with transaction.atomic():
+            apply_status_change(instance, instance.status, None)
+            instance.delete()
+            transaction.on_commit(lambda: invalidate_manager_stats(instance))
+
+    @action(detail=True, methods=['get'])
+    def audit(self, request, pk=None):
+        """
+        Full audit trail for a single leave.
+        URL: GET /api/leaves/{id}/audit/
+        """
+        leave = self.get_object()
+        logs = leave.audit_logs.select_related('action_by').order_by('timestamp', 'id')
+        return Response(LeaveAuditLogSerializer(logs, many=True).data)
+
+    @action(detail=False, methods=['post'], url_path='bulk-action')
+    def bulk_action(self, request):
+        """
+        Approve or reject many pending leaves at once.
+        URL: POST /api/leaves/bulk-action/
+        Body: { "ids": [1, 2, ...], "action": "approve" | "reject", "comment": "..." }
+        
+        Status changes are applied with one conditional UPDATE limited to PENDING
+        leaves the caller may act on; any other ids are reported as skipped.
+        Approvals that would overlap an approved leave of the same employee
+        are left pending and reported under `conflicts`; the check runs under a
+        lock on those employees' approved and pending leaves.
+        Audit logs, ledger updates, notification records and webhooks are
+        batched in the same transaction; employee emails go out as one batch
+        after it commits.
+        """
+        if request.user.role not in ['MANAGER', 'HR']:
+            return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = LeaveBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data['ids'])
+        action_type = serializer.validated_data['action']
+        comment = serializer.validated_data['comment']
+        new_status = 'APPROVED' if action_type == 'approve' else 'REJECTED'
+        now = timezone.now()
+        
+        with transaction.atomic():
+            conflicts = {}
+            update_ids = ids
+            if new_status == 'APPROVED':
+                # Leaves that would overlap an approved leave (or one approved earlier in this batch)
+                candidates = list(
+                    self.get_queryset().filter(id__in=ids, status='PENDING')
+                    .values_list('id', 'user_id', 'start_date', 'end_date').order_by('id')
+                )
+                lock_blocking_leaves({candidate[1] for candidate in candidates})
+                conflicts = approval_conflicts(candidates)
+                update_ids = ids - set(conflicts)
+            
+            # Lock the pending leaves the caller may act on, so the UPDATE changes
+            # exactly these rows and they can be read back by id
+            update_ids = list(
+                LeaveRequest.objects.select_for_update()
+                .filter(id__in=self.get_queryset().filter(id__in=update_ids).values('id'), status='PENDING')
+                .order_by('id').values_list('id', flat=True)
+            )
+            LeaveRequest.objects.filter(id__in=update_ids).update(
+                status=new_status, manager_comment=comment, updated_at=now
+            )
+            leaves = list(LeaveRequest.objects.for_list().filter(id__in=update_ids).order_by('id'))
+            
+            LeaveAuditLog.objects.bulk_create([
+                LeaveAuditLog(
+                    leave=leave,
+                    action_by=request.user,
+                    action=action_type.upper(),
+                    previous_status='PENDING',
+                    new_status=new_status,
+                    comment=comment
+                )
+                for leave in leaves
+            ])
+            
+            if new_status == 'APPROVED':
+                record_bulk_leave_usage(leaves)
+                record_absence_days(leaves)
+            
+            from notifications.webhooks import send_leave_status_changed_webhooks
+            send_leave_status_changed_webhooks(leaves, action_type, request.user)
+            
+            from notifications.utils import send_leave_status_changed_notifications
+            send_leave_status_changed_notifications(leaves, action_type, request.user)
+            
+            transaction.on_commit(lambda: invalidate_manager_stats_for(leaves))
         
-        # Send notification
-        from notifications.utils import send_leave_created_notification
-        send_leave_created_notification(leave)
+        updated_ids = [leave.id for leave in leaves]
+        return Response({
+            'action': action_type,
+            'updated': updated_ids,
+            'conflicts': {str(leave_id): other_id for leave_id, other_id in sorted(conflicts.items())},
+            'skipped': sorted(ids - set(updated_ids) - set(conflicts)),
+        })
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_leaves(self, request):
+        """
+        Bulk import leave history (HR only).
+        URL: POST /api/leaves/import/?file_format=csv|ndjson&dry_run=1
+        Body: a multipart upload in `file`, or the raw CSV / JSON-lines body.
+        
+        Rows are validated and inserted in chunks without emails or webhooks;
+        see leaves/importer.py for the columns. Returns the import report.
+        """
+        if request.user.role != 'HR':
+            return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        
+        fmt = request.query_params.get('file_format')
+        if fmt and fmt not in FORMATS:
+            return Response({'error': f"file_format must be one of {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+            stream = upload
+            fmt = fmt or detect_format(upload.name, upload.content_type)
+        else:
+            # Read the raw body incrementally instead of loading it into memory
+            stream = request.stream
+            if stream is None:
+                return Response({'error': 'Empty body'}, status=status.HTTP_400_BAD_REQUEST)
+            fmt = fmt or detect_format(content_type=request.content_type)
         
-        # Send webhook
-        from notifications.webhooks import send_leave_created_webhook
-        send_leave_created_webhook(leave)
+        importer = LeaveImporter(
+            actor=request.user,
+            dry_run=request.query_params.get('dry_run') in ('1', 'true'),
+        )
+        return Response(importer.run(iter_rows(stream, fmt)))
 
     @action(detail=True, methods=['post'])
     def action(self, request, pk=None):
@@ -62,6 +264,12 @@ class LeaveViewSet(viewsets.ModelViewSet):
         Custom endpoint for Managers/HR to Approve or Reject a leave.
         URL: POST /api/leaves/{id}/action/
         Body: { "action": "approve" | "reject", "comment": "..." }
+        
+        The transition is a conditional UPDATE on the status that was read, so
+        when two people act on the same leave at once only one of them wins;
+        the other gets 409 and no audit log, webhook or email is produced for it.
+        Approvals are checked for overlaps in the same transaction, under a lock
+        on the employee's approved and pending leaves.
         """
         leave = self.get_object()
         action_type = request.data.get('action')
@@ -80,64 +288,114 @@ class LeaveViewSet(viewsets.ModelViewSet):
         else:
             return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
         
-        leave.status = new_status
-        leave.manager_comment = comment
-        leave.save()
-
-        # Create audit log
-        LeaveAuditLog.objects.create(
-            leave=leave,
-            action_by=request.user,
-            action=action_type.upper(),
-            previous_status=previous_status,
-            new_status=new_status,
-            comment=comment
-        )
-        
-        # Send notification
-        from notifications.utils import send_leave_status_changed_notification
-        send_leave_status_changed_notification(leave, action_type, request.user)
+        if new_status == previous_status:
+            return Response({
+                'error': f'Leave is already {previous_status.lower()}',
+                'status': previous_status,
+            }, status=status.HTTP_409_CONFLICT)
         
-        # Send webhook
-        from notifications.webhooks import send_leave_status_changed_webhook
-        send_leave_status_changed_webhook(leave, action_type, request.user)
+        with transaction.atomic():
+            if new_status == 'APPROVED':
+                # Checked under lock, so a concurrent overlapping approval can't slip in
+                lock_blocking_leaves([leave.user_id])
+                conflict = (
+                    LeaveRequest.objects.filter(user_id=leave.user_id, status='APPROVED')
+                    .overlapping(leave.start_date, leave.end_date)
+                    .exclude(pk=leave.pk)
+                    .first()
+                )
+                if conflict:
+                    return Response({
+                        'error': f'Overlaps approved leave #{conflict.id} ({conflict.start_date} to {conflict.end_date})',
+                        'conflicting_leave': conflict.id,
+                    }, status=status.HTTP_409_CONFLICT)
+            
+            now = timezone.now()
+            # Compare-and-set: succeeds only if nobody changed the status since we read it
+            updated = LeaveRequest.objects.filter(pk=leave.pk, status=previous_status).update(
+                status=new_status, manager_comment=comment, updated_at=now
+            )
+            if not updated:
+                current = LeaveRequest.objects.filter(pk=leave.pk).values_list('status', flat=True).first()
+                return Response({
+                    'error': 'Leave was changed by someone else, reload and try again',
+                    'status': current,
+                }, status=status.HTTP_409_CONFLICT)
+            leave.status = new_status
+            leave.manager_comment = comment
+            leave.updated_at = now
+            
+            # Keep the balance ledger and absence calendar in step with the approval
+            apply_status_change(leave, previous_status, new_status)
+            apply_absence_change(leave, previous_status, new_status)
 
-        return Response(LeaveRequestSerializer(leave).data)
+            # Create audit log
+            LeaveAuditLog.objects.create(
+                leave=leave,
+                action_by=request.user,
+                action=action_type.upper(),
+                previous_status=previous_status,
+                new_status=new_status,
+                comment=comment
+            )
+            
+            # Queue webhook in the same transaction (delivered by the outbox worker)
+            from notifications.webhooks import send_leave_status_changed_webhook
+            send_leave_status_changed_webhook(leave, action_type, request.user)
+            
+            # Notification record commits with the change; the email goes out after commit
+            from notifications.utils import send_leave_status_changed_notification
+            send_leave_status_changed_notification(leave, action_type, request.user)
+            
+            transaction.on_commit(lambda: invalidate_manager_stats(leave))
 
+        return Response(LeaveRequestSerializer(leave).data)
 
-from django.utils import timezone
-from django.db.models import Count, Q, Sum
 
 class EmployeeStatsView(APIView):
     """
     Dashboard statistics for Employees.
-    Returns total allowance, used leaves, available balance, and pending requests.
+    Returns this year's total allowance, used leaves, available balance, pending
+    requests and a per-leave-type breakdown. Allowance and usage are read from
+    the LeaveBalance ledger, using a fixed number of queries.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         user = request.user
+        year = timezone.now().year
         
-        # Get total allowance from user model (default 24 if not set)
-        total_allowance = getattr(user, 'annual_leave_allowance', 24)
+        # This year's ledger rows, keyed by leave type (one indexed lookup)
+        balances = {
+            balance.leave_type_id: balance
+            for balance in LeaveBalance.objects.filter(user=user, year=year)
+        }
         
-        # Calculate used leaves (approved leaves only)
-        approved_leaves = LeaveRequest.objects.filter(
-            user=user,
-            status='APPROVED'
+        # Pending requests per leave type
+        pending = dict(
+            LeaveRequest.objects.filter(user=user, status='PENDING')
+            .values_list('leave_type_id')
+            .annotate(count=Count('id'))
+            .order_by()
         )
         
-        used_leaves = 0
-        for leave in approved_leaves:
-            # Calculate days between start_date and end_date (inclusive)
-            days = (leave.end_date - leave.start_date).days + 1
-            used_leaves += days
+        by_leave_type = []
+        for leave_type in LeaveType.objects.order_by('name'):
+            balance = balances.get(leave_type.id)
+            allowed_days = balance.allowed_days if balance else leave_type.days_allowed
+            used_days = balance.used_days if balance else 0
+            by_leave_type.append({
+                'leave_type_id': leave_type.id,
+                'leave_type': leave_type.name,
+                'allowed_days': allowed_days,
+                'used_days': used_days,
+                'remaining_days': allowed_days - used_days,
+                'pending_requests': pending.get(leave_type.id, 0),
+            })
         
-        # Count pending requests
-        pending_requests = LeaveRequest.objects.filter(
-            user=user,
-            status='PENDING'
-        ).count()
+        total_allowance = sum(row['allowed_days'] for row in by_leave_type)
+        used_leaves = sum(row['used_days'] for row in by_leave_type)
+        pending_requests = sum(pending.values())
         
         # Calculate available balance
         available_balance = total_allowance - used_leaves
@@ -145,7 +403,7 @@ class EmployeeStatsView(APIView):
         # Get recent activity (last 5 leave requests)
         recent_leaves = LeaveRequest.objects.filter(
             user=user
-        ).order_by('-created_at')[:5]
+        ).select_related('leave_type').order_by('-created_at')[:5]
         
         recent_activity = []
         for leave in recent_leaves:
@@ -166,6 +424,7 @@ class EmployeeStatsView(APIView):
             'used_leaves': used_leaves,
             'available_balance': available_balance,
             'pending_requests': pending_requests,
+            'by_leave_type': by_leave_type,
             'recent_activity': recent_activity
         })
 
@@ -174,7 +433,9 @@ class EmployeeStatsView(APIView):
 class ManagerStatsView(APIView):
     """
     Dashboard statistics for Managers.
-    Returns counts of Pending, Approved (Today), and Rejected leaves.
+    Returns counts of Pending, Approved (Today), and Rejected leaves for the manager's team.
+    Counters are cached per manager (see leaves.cache), so dashboard polling
+    rarely reaches the database.
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -182,26 +443,19 @@ class ManagerStatsView(APIView):
         if request.user.role != 'MANAGER':
              return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
-        today = timezone.now().date()
-        
-        # Aggregate queries for efficiency
-        stats = LeaveRequest.objects.aggregate(
-            pending=Count('id', filter=Q(status='PENDING')),
-            approved_today=Count('id', filter=Q(status='APPROVED', updated_at__date=today)),
-            rejected_total=Count('id', filter=Q(status='REJECTED'))
-        )
-        
-        return Response(stats)
+        # Served from the cache; invalidated when leaves are created or actioned
+        return Response(get_manager_stats(request.user))
 
 class ManagerQueueView(generics.ListAPIView):
-    serializer_class = LeaveRequestSerializer
+    serializer_class = LeaveRequestListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LeaveCursorPagination
 
     def get_queryset(self):
         if self.request.user.role != 'MANAGER':
             return LeaveRequest.objects.none()
             
-        queryset = LeaveRequest.objects.all()
+        queryset = LeaveRequest.objects.for_manager(self.request.user)
         status_param = self.request.query_params.get('status')
         
         if status_param:
@@ -211,16 +465,249 @@ class ManagerQueueView(generics.ListAPIView):
             if self.request.query_params.get('all') != 'true':
                  queryset = queryset.filter(status='PENDING')
                  
-        return queryset.order_by('-created_at')
+        # Ordering is applied by LeaveCursorPagination
+        return queryset.for_list()
 
 class HRSummaryView(generics.ListAPIView):
-    serializer_class = LeaveRequestSerializer
+    serializer_class = LeaveRequestListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LeaveCursorPagination
 
     def get_queryset(self):
         if self.request.user.role != 'HR':
             return LeaveRequest.objects.none()
-        return LeaveRequest.objects.all()
+        return LeaveRequest.objects.for_list()
+
+def _int_param(params, name):
+    """Optional integer query parameter; anything else is a 400."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Must be an integer.'})
+
+class TeamAbsenceView(APIView):
+    """
+    Who is out between two dates: the approved and pending leaves of a
+    manager's team (every employee for HR) that overlap the range.
+    URL: GET /api/team-absences/?from=YYYY-MM-DD&to=YYYY-MM-DD
+    
+    ?leave=<id> takes the range from that leave and leaves it out of the
+    result, for checking a request before approving it. ?status=APPROVED
+    restricts to approved leaves; HR can pass ?manager=<id>.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_DAYS = 366
+
+    def get(self, request):
+        user = request.user
+        params = request.query_params
+        if user.role == 'MANAGER':
+            queryset = LeaveRequest.objects.for_manager(user)
+        elif user.role == 'HR':
+            queryset = LeaveRequest.objects.all()
+            manager_id = _int_param(params, 'manager')
+            if manager_id is not None:
+                queryset = queryset.filter(user__manager_id=manager_id)
+        else:
+            return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            date_from = date.fromisoformat(params['from']) if params.get('from') else None
+            date_to = date.fromisoformat(params['to']) if params.get('to') else None
+        except ValueError:
+            return Response({'error': 'from and to must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        leave_id = _int_param(params, 'leave')
+        if leave_id is not None:
+            leave = queryset.filter(pk=leave_id).only('start_date', 'end_date').first()
+            if leave is None:
+                return Response({'error': 'Leave not found'}, status=status.HTTP_404_NOT_FOUND)
+            date_from = date_from or leave.start_date
+            date_to = date_to or leave.end_date
+            queryset = queryset.exclude(pk=leave.pk)
+        
+        if date_from is None or date_to is None:
+            return Response({'error': 'from and to are required'}, status=status.HTTP_400_BAD_REQUEST)
+        if date_to < date_from or (date_to - date_from).days >= self.MAX_DAYS:
+            return Response({'error': f'Range must be 1 to {self.MAX_DAYS} days'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if params.get('status', '').upper() == 'APPROVED':
+            queryset = queryset.filter(status='APPROVED')
+        else:
+            queryset = queryset.blocking()
+        leaves = queryset.overlapping(date_from, date_to).for_list().order_by('start_date', 'user__username', 'id')
+        
+        return Response({
+            'from': date_from,
+            'to': date_to,
+            'leaves': LeaveRequestListSerializer(leaves, many=True).data,
+        })
+
+class TeamCalendarView(APIView):
+    """
+    Daily coverage for a team: how many people are out on each day, and who.
+    URL: GET /api/team-calendar/?from=YYYY-MM-DD&to=YYYY-MM-DD
+    
+    Counts approved leaves only and is read from the DailyAbsence table.
+    Managers see their team; HR sees everyone, or one team with ?manager=<id>.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_DAYS = 366
+
+    def get(self, request):
+        user = request.user
+        params = request.query_params
+        if user.role == 'MANAGER':
+            # Same scope as LeaveRequest.objects.for_manager
+            users = User.objects.filter(team_q(user))
+        elif user.role == 'HR':
+            users = User.objects.all()
+            manager_id = _int_param(params, 'manager')
+            if manager_id is not None:
+                users = users.filter(manager_id=manager_id)
+        else:
+            return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            date_from = date.fromisoformat(params.get('from', ''))
+            date_to = date.fromisoformat(params.get('to', ''))
+        except ValueError:
+            return Response({'error': 'from and to are required (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+        if date_to < date_from or (date_to - date_from).days >= self.MAX_DAYS:
+            return Response({'error': f'Range must be 1 to {self.MAX_DAYS} days'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'from': date_from,
+            'to': date_to,
+            'days': team_calendar(users, date_from, date_to),
+        })
+
+class LeaveBalanceListView(generics.ListAPIView):
+    """
+    Leave balances from the LeaveBalance ledger.
+    
+    HR can query the whole company; everyone else sees their own balances.
+    Filters: ?year=, ?leave_type=, ?user= (HR only).
+    """
+    serializer_class = LeaveBalanceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LeaveBalanceCursorPagination
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = LeaveBalance.objects.select_related('user', 'leave_type')
+        
+        user_id = _int_param(params, 'user')
+        year = _int_param(params, 'year')
+        leave_type_id = _int_param(params, 'leave_type')
+        
+        if self.request.user.role == 'HR':
+            if user_id is not None:
+                queryset = queryset.filter(user_id=user_id)
+        else:
+            queryset = queryset.filter(user=self.request.user)
+        
+        if year is not None:
+            queryset = queryset.filter(year=year)
+        if leave_type_id is not None:
+            queryset = queryset.filter(leave_type_id=leave_type_id)
+        return queryset
+
+class IgnoreAcceptNegotiation(BaseContentNegotiation):
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+class ExportView(APIView):
+    """
+    Base for HR's streaming exports.
+    
+    Query params: ?file_format=csv|ndjson (default csv), ?from= and ?to=
+    (YYYY-MM-DD, inclusive), ?status=, ?leave_type=<id>.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    # Clients may ask for text/csv; the body is streamed regardless of Accept
+    content_negotiation_class = IgnoreAcceptNegotiation
+    columns = ()
+    filename = 'export'
+    leave_type_lookup = 'leave_type_id'
+
+    def get_queryset(self, date_from, date_to, params):
+        raise NotImplementedError
+
+    def get(self, request):
+        if request.user.role != 'HR':
+            return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        
+        params = request.query_params
+        fmt = params.get('file_format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return Response({'error': f"file_format must be one of {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            date_from = date.fromisoformat(params['from']) if params.get('from') else None
+            date_to = date.fromisoformat(params['to']) if params.get('to') else None
+        except ValueError:
+            return Response({'error': 'from and to must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        leave_type_id = _int_param(params, 'leave_type')
+        
+        queryset = self.get_queryset(date_from, date_to, params)
+        if leave_type_id is not None:
+            queryset = queryset.filter(**{self.leave_type_lookup: leave_type_id})
+        
+        response = StreamingHttpResponse(
+            stream_rows(queryset.order_by('id'), self.columns, fmt),
+            content_type=CONTENT_TYPES[fmt],
+        )
+        extension = 'csv' if fmt == 'csv' else 'jsonl'
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.filename}-{timezone.localdate():%Y%m%d}.{extension}"'
+        )
+        return response
+
+class LeaveExportView(ExportView):
+    """
+    Stream leave requests. ?from/?to select leaves overlapping the range.
+    URL: GET /api/export/leaves/
+    """
+    columns = LEAVE_COLUMNS
+    filename = 'leaves'
+    leave_type_lookup = 'leave_type_id'
+
+    def get_queryset(self, date_from, date_to, params):
+        queryset = LeaveRequest.objects.all()
+        if date_from:
+            queryset = queryset.filter(end_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(start_date__lte=date_to)
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'].upper())
+        return queryset
+
+class AuditLogExportView(ExportView):
+    """
+    Stream audit history. ?from/?to filter on the log timestamp and ?status on
+    the status the action moved the leave to.
+    URL: GET /api/export/audit-logs/
+    """
+    columns = AUDIT_LOG_COLUMNS
+    filename = 'audit-logs'
+    leave_type_lookup = 'leave__leave_type_id'
+
+    def get_queryset(self, date_from, date_to, params):
+        queryset = LeaveAuditLog.objects.all()
+        # Range filters on the timestamp itself so its index can be used
+        if date_from:
+            queryset = queryset.filter(timestamp__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+        if date_to:
+            queryset = queryset.filter(timestamp__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)))
+        if params.get('status'):
+            queryset = queryset.filter(new_status=params['status'].upper())
+        return queryset
 
 class LeaveTypeViewSet(viewsets.ModelViewSet):
     queryset = LeaveType.objects.all()
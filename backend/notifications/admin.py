@@ -1,11 +1,13 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import Notification, Webhook, WebhookDelivery
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ['user', 'notification_type', 'subject', 'is_read', 'created_at']
-    list_filter = ['notification_type', 'is_read', 'created_at']
+    list_filter = ['notification_type', 'template', 'is_read', 'created_at']
     search_fields = ['user__username', 'subject', 'message']
+    readonly_fields = ['body']
 
 @admin.register(Webhook)
 class WebhookAdmin(admin.ModelAdmin):
@@ -15,8 +17,16 @@ class WebhookAdmin(admin.ModelAdmin):
     
 @admin.register(WebhookDelivery)
 class WebhookDeliveryAdmin(admin.ModelAdmin):
-    list_display = ['webhook', 'event_type', 'success', 'response_status', 'delivered_at']
-    list_filter = ['success', 'event_type', 'delivered_at']
+    list_display = ['webhook', 'event_type', 'status', 'attempts', 'response_status', 'next_attempt_at', 'delivered_at']
+    list_filter = ['status', 'event_type', 'created_at']
     search_fields = ['webhook__name', 'event_type']
-    readonly_fields = ['webhook', 'event_type', 'payload', 'response_status', 'response_body', 'delivered_at', 'success', 'error_message']
+    readonly_fields = ['webhook', 'event_type', 'payload', 'status', 'attempts', 'next_attempt_at', 'response_status', 'response_body', 'created_at', 'claimed_at', 'delivered_at', 'success', 'error_message']
+    actions = ['requeue_deliveries']
+
+    @admin.action(description='Requeue selected deliveries')
+    def requeue_deliveries(self, request, queryset):
+        updated = queryset.exclude(status='PROCESSING').update(
+            status='PENDING', attempts=0, next_attempt_at=timezone.now(), claimed_at=None
+        )
+        self.message_user(request, f'{updated} deliveries requeued.')
 
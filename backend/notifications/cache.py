@@ -0,0 +1,57 @@
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import Notification
+
+"""
+Cached per-user unread notification counters.
+
+The count is computed with one indexed COUNT on a cache miss and then kept
+current by incrementing it when notifications are created and decrementing it
+by the number of rows a mark-read UPDATE actually changed. Adjustments are made
+after the transaction commits, so rolled-back writes never skew the counter.
+A counter that isn't cached is simply left alone and recomputed on the next
+read; NOTIFICATION_UNREAD_CACHE_TIMEOUT bounds any drift.
+"""
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def get_unread_count(user):
+    """Return the user's unread count, counting in the database only on a cache miss."""
+    key = _unread_key(user.id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user=user, is_read=False).count()
+        cache.set(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def _adjust(deltas):
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        try:
+            if delta > 0:
+                cache.incr(_unread_key(user_id), delta)
+            else:
+                cache.decr(_unread_key(user_id), -delta)
+        except ValueError:
+            # Not cached: the next read counts from the database
+            pass
+
+
+def notifications_created(notifications):
+    """Count new unread notifications once the current transaction commits."""
+    deltas = Counter(n.user_id for n in notifications if not n.is_read)
+    if deltas:
+        transaction.on_commit(lambda: _adjust(deltas))
+
+
+def notifications_read(user_id, count):
+    """Take `count` newly read notifications off the user's counter after commit."""
+    if count:
+        transaction.on_commit(lambda: _adjust({user_id: -count}))
@@ -0,0 +1,137 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from .webhooks import sign_body
+
+"""
+Pooled HTTP delivery engine for webhooks.
+
+Keeps one keep-alive `requests.Session` per target host so repeated deliveries
+reuse TCP/TLS connections, and sends a batch of deliveries concurrently while
+capping the number of in-flight requests to any single host.
+
+The engine never touches the database: it takes WebhookDelivery objects (with
+their webhook loaded) and returns the fields to record for each one.
+"""
+
+USER_AGENT = 'LeaveManagementSystem-Webhook/1.0'
+
+
+class WebhookDeliveryEngine:
+    """Concurrent webhook sender with per-host connection reuse."""
+
+    def __init__(self, max_workers=None, per_host_limit=None, timeout=None):
+        self.max_workers = max_workers or settings.WEBHOOK_WORKERS
+        self.per_host_limit = per_host_limit or settings.WEBHOOK_PER_HOST_LIMIT
+        self.timeout = timeout or settings.WEBHOOK_TIMEOUT
+        self._sessions = {}
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _host_for(self, url):
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}'
+
+    def _session_for(self, host):
+        """Return the shared session and concurrency slot for a host."""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.per_host_limit,
+                    pool_block=True,
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = USER_AGENT
+                self._sessions[host] = session
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return session, self._host_slots[host]
+
+    def post(self, delivery):
+        """
+        Send a single delivery and return the fields to record on it.
+
+        The exact bytes that are signed are the bytes that are sent, so
+        receivers can verify the signature against the raw request body.
+        """
+        webhook = delivery.webhook
+        try:
+            body = json.dumps(delivery.payload, sort_keys=True).encode('utf-8')
+            headers = {
+                'Content-Type': 'application/json',
+                'X-Webhook-Signature': sign_body(body, webhook.secret),
+                'X-Webhook-Event': delivery.event_type,
+            }
+
+            session, slot = self._session_for(self._host_for(webhook.url))
+            with slot:
+                response = session.post(
+                    webhook.url,
+                    data=body,
+                    headers=headers,
+                    timeout=self.timeout,
+                )
+
+            return {
+                'response_status': response.status_code,
+                'response_body': response.text[:1000],  # Limit to 1000 chars
+                'error_message': '',
+                'success': 200 <= response.status_code < 300,
+            }
+
+        except requests.exceptions.Timeout:
+            return self._failure("Request timeout")
+
+        except requests.exceptions.RequestException as e:
+            return self._failure(str(e)[:500])
+
+        except Exception as e:
+            return self._failure(f"Unexpected error: {str(e)[:500]}")
+
+    def _failure(self, error_message):
+        return {
+            'response_status': None,
+            'response_body': '',
+            'error_message': error_message,
+            'success': False,
+        }
+
+    def send(self, deliveries):
+        """Send deliveries concurrently; results are returned in input order."""
+        if not deliveries:
+            return []
+        if len(deliveries) == 1:
+            return [self.post(deliveries[0])]
+
+        workers = min(self.max_workers, len(deliveries))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.post, deliveries))
+
+    def close(self):
+        """Close all pooled connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._host_slots.clear()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide engine so connections are reused across batches."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = WebhookDeliveryEngine()
+        return _engine
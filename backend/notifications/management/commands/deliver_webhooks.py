@@ -0,0 +1,57 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifications.delivery import WebhookDeliveryEngine
+from notifications.webhooks import claim_pending_deliveries, deliver_webhooks
+
+class Command(BaseCommand):
+    help = 'Deliver queued webhook events from the WebhookDelivery outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.WEBHOOK_BATCH_SIZE,
+            help='Number of deliveries to claim per batch',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.WEBHOOK_WORKERS,
+            help='Number of concurrent HTTP requests per batch',
+        )
+        parser.add_argument(
+            '--per-host', type=int, default=settings.WEBHOOK_PER_HOST_LIMIT,
+            help='Max concurrent requests (and pooled connections) per target host',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help='Seconds to sleep when the queue is empty',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the queue and exit instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # One engine for the life of the worker so keep-alive connections are reused
+        engine = WebhookDeliveryEngine(
+            max_workers=options['workers'],
+            per_host_limit=options['per_host'],
+        )
+
+        try:
+            while True:
+                deliveries = claim_pending_deliveries(batch_size)
+                if deliveries:
+                    deliver_webhooks(deliveries, engine=engine)
+                    sent = sum(1 for d in deliveries if d.success)
+                    self.stdout.write(
+                        f'Delivered {sent}/{len(deliveries)} webhook events'
+                    )
+                    continue
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping webhook worker')
+        finally:
+            engine.close()
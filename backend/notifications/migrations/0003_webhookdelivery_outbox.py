@@ -0,0 +1,53 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_outbox_fields(apps, schema_editor):
+    """
+    Rows written before the outbox were sent inline, so they are already final:
+    carry their timestamp over to created_at and derive status from success.
+    """
+    WebhookDelivery = apps.get_model('notifications', 'WebhookDelivery')
+    WebhookDelivery.objects.filter(delivered_at__isnull=False).update(created_at=models.F('delivered_at'))
+    WebhookDelivery.objects.filter(success=True).update(status='SUCCESS')
+    WebhookDelivery.objects.filter(success=False).update(status='FAILED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_webhook_webhookdelivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('SUCCESS', 'Success'), ('FAILED', 'Failed')], default='PENDING', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='webhookdelivery',
+            name='delivered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterModelOptions(
+            name='webhookdelivery',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.RunPython(backfill_outbox_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['status', 'id'], name='webhookdelivery_status_idx'),
+        ),
+    ]
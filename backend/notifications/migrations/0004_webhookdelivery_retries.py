@@ -0,0 +1,43 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def dead_letter_failed(apps, schema_editor):
+    """Failures recorded before retries existed were never retried; dead-letter them."""
+    WebhookDelivery = apps.get_model('notifications', 'WebhookDelivery')
+    WebhookDelivery.objects.filter(status='FAILED').update(status='DEAD', attempts=1)
+    WebhookDelivery.objects.filter(status='SUCCESS').update(attempts=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_webhookdelivery_outbox'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='webhookdelivery',
+            name='webhookdelivery_status_idx',
+        ),
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='webhookdelivery',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('SUCCESS', 'Success'), ('DEAD', 'Dead letter')], default='PENDING', max_length=20),
+        ),
+        migrations.RunPython(dead_letter_failed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='webhookdelivery_due_idx'),
+        ),
+    ]
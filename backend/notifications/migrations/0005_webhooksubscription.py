@@ -0,0 +1,37 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_subscriptions(apps, schema_editor):
+    Webhook = apps.get_model('notifications', 'Webhook')
+    WebhookSubscription = apps.get_model('notifications', 'WebhookSubscription')
+    WebhookSubscription.objects.bulk_create(
+        [
+            WebhookSubscription(webhook_id=webhook.id, event_type=event)
+            for webhook in Webhook.objects.only('id', 'events').iterator()
+            for event in set(webhook.events or [])
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_webhookdelivery_retries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=50)),
+                ('webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to='notifications.webhook')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('event_type', 'webhook'), name='unique_webhook_event')],
+            },
+        ),
+        migrations.RunPython(populate_subscriptions, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,15 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Notification(models.Model):
+    """
+    A message sent to a user.
+    
+    Templated notifications store the template id and its context instead of
+    the rendered text (see notifications/rendering.py); `message` is only
+    filled in for free-text notifications. Use `body` to get the text either way.
+    """
     NOTIFICATION_TYPES = (
         ('EMAIL', 'Email'),
         ('SYSTEM', 'System'),
@@ -10,15 +18,29 @@ class Notification(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES, default='EMAIL')
     subject = models.CharField(max_length=255)
-    message = models.TextField()
+    message = models.TextField(blank=True)
+    template = models.CharField(max_length=100, blank=True)
+    context = models.JSONField(default=dict, blank=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A user's notifications, newest first
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.notification_type} - {self.subject} for {self.user.username}"
+    
+    @property
+    def body(self):
+        """The message text, rendered from the template if stored by reference."""
+        if self.template:
+            from .rendering import render_message
+            return render_message(self.template, self.context)
+        return self.message
 
 class Webhook(models.Model):
     name = models.CharField(max_length=255, help_text="Webhook identifier")
@@ -33,22 +55,87 @@ class Webhook(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.url}"
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.sync_subscriptions()
+    
+    def sync_subscriptions(self):
+        """
+        Mirror `events` into WebhookSubscription rows.
+        
+        Called on every save; bulk `QuerySet.update(events=...)` bypasses it and
+        must call this explicitly.
+        """
+        events = set(self.events or [])
+        self.subscriptions.exclude(event_type__in=events).delete()
+        WebhookSubscription.objects.bulk_create(
+            [WebhookSubscription(webhook=self, event_type=event) for event in events],
+            ignore_conflicts=True,
+        )
+
+class WebhookSubscription(models.Model):
+    """
+    Normalized (webhook, event type) pair derived from `Webhook.events`.
+    
+    The JSON list can't be filtered efficiently (or at all on SQLite), so
+    selecting the hooks for an event is an indexed lookup on this table instead.
+    """
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='subscriptions')
+    event_type = models.CharField(max_length=50)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event_type', 'webhook'], name='unique_webhook_event'),
+        ]
+    
+    def __str__(self):
+        return f"{self.webhook.name} -> {self.event_type}"
 
 class WebhookDelivery(models.Model):
+    """
+    Outbox row for a single webhook event.
+
+    Rows are written as PENDING in the same transaction as the change that
+    triggered them and are sent later by the `deliver_webhooks` worker, so
+    API requests never wait on subscriber endpoints.
+    
+    Failed attempts go back to PENDING with a later `next_attempt_at`
+    (exponential backoff); after WEBHOOK_MAX_ATTEMPTS the row is moved to the
+    terminal DEAD (dead-letter) state and can be requeued from the admin.
+    """
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
+        ('SUCCESS', 'Success'),
+        ('DEAD', 'Dead letter'),
+    )
+
     webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='deliveries')
     event_type = models.CharField(max_length=50)
     payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     response_status = models.IntegerField(null=True, blank=True)
     response_body = models.TextField(blank=True)
-    delivered_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when a worker claims the row; used to recover claims from crashed workers
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
     success = models.BooleanField(default=False)
     error_message = models.TextField(blank=True)
     
     class Meta:
-        ordering = ['-delivered_at']
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='webhookdelivery_due_idx'),
+            # Default ordering (admin delivery log)
+            models.Index(fields=['-created_at'], name='webhookdelivery_created_idx'),
+        ]
     
     def __str__(self):
         status = "✓" if self.success else "✗"
-        return f"{status} {self.event_type} to {self.webhook.name} at {self.delivered_at}"
+        return f"{status} {self.event_type} to {self.webhook.name} ({self.status})"
 
 
@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+class NotificationCursorPagination(CursorPagination):
+    """
+    Keyset pagination for a user's inbox, newest first.
+    
+    Pages are fetched with `WHERE user_id = ... AND created_at < <cursor>` on the
+    (user, created_at) index, so deep pages cost the same as the first one.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,40 @@
+from functools import lru_cache
+from django.template.loader import get_template
+
+"""
+Notification templates.
+
+Email bodies live in notifications/templates/notifications/email/<id>.txt and
+are compiled once per process. A message is a per-recipient greeting followed
+by the body, and the body only depends on the event, so senders render it once
+and reuse it for every recipient.
+
+Notification rows store the template id and its (JSON) context rather than the
+rendered text; `Notification.body` renders it again when the text is needed.
+"""
+
+SUBJECTS = {
+    'leave_created_employee': 'Leave Request Submitted',
+    'leave_created_manager': 'New Leave Request Pending',
+}
+
+
+@lru_cache(maxsize=None)
+def _template(template_id):
+    return get_template(f'notifications/email/{template_id}.txt')
+
+
+def display_name(user):
+    return user.get_full_name() or user.username
+
+
+def render_body(template_id, context):
+    """Render the shared part of a message (everything after the greeting)."""
+    return _template(template_id).render(context)
+
+
+def render_message(template_id, context, body=None):
+    """Full message for one recipient; pass `body` to reuse an already rendered body."""
+    if body is None:
+        body = render_body(template_id, context)
+    return f"Hello {context['name']},\n\n{body}"
@@ -0,0 +1,25 @@
+from rest_framework import serializers
+from .models import Notification
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Inbox entry; `body` is rendered from the template for templated rows."""
+    body = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'notification_type', 'subject', 'body', 'is_read', 'created_at']
+        read_only_fields = fields
+
+class NotificationMarkReadSerializer(serializers.Serializer):
+    """Body of POST /api/notifications/mark-read/: either `ids` or `all`."""
+    MAX_IDS = 500
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=MAX_IDS
+    )
+    all = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, data):
+        if not data.get('ids') and not data['all']:
+            raise serializers.ValidationError('Provide "ids" or "all": true')
+        return data
@@ -1,14 +1,94 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
 from notifications.models import Webhook, WebhookDelivery, Notification
 from leaves.models import LeaveType, LeaveRequest
-from notifications.webhooks import generate_signature, send_webhook
+from notifications.webhooks import (
+    generate_signature, sign_body, send_webhook, claim_pending_deliveries, deliver_webhooks,
+    retry_delay,
+)
+from notifications.delivery import WebhookDeliveryEngine
+from notifications.utils import (
+    send_emails, send_leave_created_notification, send_leave_status_changed_notification
+)
+from notifications.rendering import _template, render_body
+from notifications.cache import get_unread_count
+from django.core.cache import cache
+from django.template.loader import get_template
+from unittest.mock import patch
+from config.executors import ThreadExecutor, get_executor, run_on_commit
 from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
 import json
+import threading
+import time
 
 User = get_user_model()
 
 
+class StubWebhookHandler(BaseHTTPRequestHandler):
+    """
+    Records every POST; paths starting with /fail answer 500 and paths
+    starting with /slow hold the request briefly to expose concurrency.
+    """
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is observable
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.inflight += 1
+            self.server.max_inflight = max(self.server.max_inflight, self.server.inflight)
+        if self.path.startswith('/slow'):
+            time.sleep(0.1)
+        with self.server.lock:
+            self.server.inflight -= 1
+        self.server.received.append({
+            'path': self.path,
+            'headers': dict(self.headers),
+            'body': body,
+            'client_port': self.client_address[1],
+        })
+        self.send_response(500 if self.path.startswith('/fail') else 200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServerMixin:
+    """Runs a local HTTP server that stands in for webhook subscribers."""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubWebhookHandler)
+        cls.server.received = []
+        cls.server.lock = threading.Lock()
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        super().setUp()
+        self.server.received.clear()
+        self.server.inflight = 0
+        self.server.max_inflight = 0
+
+
 class TestWebhookSignature(TestCase):
     """Test HMAC signature generation."""
     
@@ -60,6 +140,7 @@ class TestWebhookDelivery(TestCase):
         delivery = deliveries.first()
         self.assertEqual(delivery.event_type, 'test_event')
         self.assertEqual(delivery.payload, payload)
+        self.assertEqual(delivery.status, 'PENDING')
     
     def test_inactive_webhook_not_triggered(self):
         """Test inactive webhooks are not triggered."""
@@ -81,6 +162,487 @@ class TestWebhookDelivery(TestCase):
         self.assertEqual(deliveries.count(), 0)
 
 
+class TestWebhookSubscriptions(TestCase):
+    """Test the normalized event subscription table."""
+    
+    def test_subscriptions_follow_events(self):
+        """Test saving a webhook keeps its subscription rows in sync."""
+        webhook = Webhook.objects.create(
+            name='Hook', url='http://127.0.0.1:9/', secret='s', events=['leave_created', 'leave_approved']
+        )
+        self.assertEqual(
+            set(webhook.subscriptions.values_list('event_type', flat=True)),
+            {'leave_created', 'leave_approved'}
+        )
+        
+        webhook.events = ['leave_rejected']
+        webhook.save()
+        
+        self.assertEqual(
+            list(webhook.subscriptions.values_list('event_type', flat=True)),
+            ['leave_rejected']
+        )
+    
+    def test_fan_out_lookup_is_constant(self):
+        """Test selecting hooks costs the same queries however many are registered."""
+        for i in range(20):
+            Webhook.objects.create(
+                name=f'Hook {i}', url='http://127.0.0.1:9/', secret='s',
+                events=['test_event'] if i % 2 else ['other_event']
+            )
+        
+        # One indexed SELECT plus one bulk INSERT
+        with self.assertNumQueries(2):
+            send_webhook('test_event', {'event': 'test_event'})
+        
+        self.assertEqual(WebhookDelivery.objects.count(), 10)
+
+
+class TestWebhookOutbox(TestCase):
+    """Test webhooks are queued in the outbox instead of sent inline."""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.employee = User.objects.create_user(
+            username='employee',
+            email='employee@test.com',
+            password='test123',
+            role='EMPLOYEE'
+        )
+        self.leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        self.webhook = Webhook.objects.create(
+            name='Unreachable',
+            url='http://127.0.0.1:9/unreachable',
+            secret='secret',
+            events=['leave_created', 'test_event'],
+        )
+    
+    def test_leave_creation_queues_pending_delivery(self):
+        """Test creating a leave writes a PENDING delivery without calling the subscriber."""
+        self.client.force_authenticate(user=self.employee)
+        
+        response = self.client.post('/api/leaves/', {
+            'leave_type_id': self.leave_type.id,
+            'start_date': str(date.today()),
+            'end_date': str(date.today() + timedelta(days=1)),
+            'reason': 'Test'
+        }, format='json')
+        
+        self.assertEqual(response.status_code, 201)
+        delivery = WebhookDelivery.objects.get(webhook=self.webhook)
+        self.assertEqual(delivery.event_type, 'leave_created')
+        self.assertEqual(delivery.status, 'PENDING')
+        self.assertEqual(delivery.payload['data']['leave_id'], response.data['id'])
+    
+    def test_delivery_rolled_back_with_transaction(self):
+        """Test queued deliveries are discarded when the surrounding transaction rolls back."""
+        try:
+            with transaction.atomic():
+                send_webhook('test_event', {'event': 'test_event'})
+                raise RuntimeError('abort')
+        except RuntimeError:
+            pass
+        
+        self.assertFalse(WebhookDelivery.objects.exists())
+    
+    def test_claimed_deliveries_not_claimed_twice(self):
+        """Test a claimed batch is invisible to other workers."""
+        send_webhook('test_event', {'event': 'test_event'})
+        
+        first = claim_pending_deliveries(10)
+        second = claim_pending_deliveries(10)
+        
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first[0].status, 'PROCESSING')
+        self.assertEqual(second, [])
+    
+    def test_stale_claims_are_released(self):
+        """Test deliveries abandoned by a crashed worker are claimed again."""
+        send_webhook('test_event', {'event': 'test_event'})
+        WebhookDelivery.objects.update(
+            status='PROCESSING',
+            claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        
+        claimed = claim_pending_deliveries(10)
+        
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(claimed[0].attempts, 1)
+    
+    @override_settings(WEBHOOK_MAX_ATTEMPTS=3)
+    def test_stale_claims_count_towards_retry_limit(self):
+        """Test a delivery that keeps crashing its worker is dead-lettered."""
+        send_webhook('test_event', {'event': 'test_event'})
+        
+        for _ in range(3):
+            WebhookDelivery.objects.update(
+                status='PROCESSING',
+                claimed_at=timezone.now() - timedelta(hours=1)
+            )
+            claimed = claim_pending_deliveries(10)
+        
+        self.assertEqual(claimed, [])
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts), ('DEAD', 3))
+
+
+class TestDeliverWebhooksCommand(StubServerMixin, TestCase):
+    """Test the outbox worker delivers queued events."""
+    
+    def test_worker_delivers_pending_webhooks(self):
+        """Test the worker posts signed payloads and marks deliveries successful."""
+        webhook = Webhook.objects.create(
+            name='Stub', url=f'{self.base_url}/hook', secret='secret', events=['test_event']
+        )
+        payload = {'event': 'test_event', 'data': {'value': 1}}
+        send_webhook('test_event', payload)
+        
+        call_command('deliver_webhooks', '--once', stdout=StringIO())
+        
+        delivery = WebhookDelivery.objects.get(webhook=webhook)
+        self.assertEqual(delivery.status, 'SUCCESS')
+        self.assertTrue(delivery.success)
+        self.assertEqual(delivery.response_status, 200)
+        self.assertIsNotNone(delivery.delivered_at)
+        
+        self.assertEqual(len(self.server.received), 1)
+        request = self.server.received[0]
+        self.assertEqual(request['headers']['X-Webhook-Event'], 'test_event')
+        self.assertEqual(
+            request['headers']['X-Webhook-Signature'],
+            generate_signature(payload, 'secret')
+        )
+    
+    def test_worker_schedules_retry_on_failure(self):
+        """Test non-2xx responses are rescheduled with backoff instead of dropped."""
+        webhook = Webhook.objects.create(
+            name='Broken', url=f'{self.base_url}/fail', secret='secret', events=['test_event']
+        )
+        send_webhook('test_event', {'event': 'test_event'})
+        
+        call_command('deliver_webhooks', '--once', stdout=StringIO())
+        
+        delivery = WebhookDelivery.objects.get(webhook=webhook)
+        self.assertEqual(delivery.status, 'PENDING')
+        self.assertFalse(delivery.success)
+        self.assertEqual(delivery.response_status, 500)
+        self.assertEqual(delivery.attempts, 1)
+        self.assertGreater(delivery.next_attempt_at, timezone.now())
+        # Not due yet, so the same run did not retry it
+        self.assertEqual(len(self.server.received), 1)
+    
+    @override_settings(WEBHOOK_MAX_ATTEMPTS=2)
+    def test_delivery_dead_lettered_after_max_attempts(self):
+        """Test a delivery that keeps failing ends in the DEAD state."""
+        webhook = Webhook.objects.create(
+            name='Broken', url=f'{self.base_url}/fail', secret='secret', events=['test_event']
+        )
+        send_webhook('test_event', {'event': 'test_event'})
+        
+        for _ in range(2):
+            WebhookDelivery.objects.update(next_attempt_at=timezone.now())
+            call_command('deliver_webhooks', '--once', stdout=StringIO())
+        
+        delivery = WebhookDelivery.objects.get(webhook=webhook)
+        self.assertEqual(delivery.status, 'DEAD')
+        self.assertEqual(delivery.attempts, 2)
+        self.assertEqual(claim_pending_deliveries(10), [])
+
+
+class TestWebhookRetrySchedule(TestCase):
+    """Test retry scheduling."""
+    
+    def setUp(self):
+        Webhook.objects.create(name='Hook', url='http://127.0.0.1:9/', secret='s', events=['test_event'])
+    
+    def test_future_retries_not_claimed(self):
+        """Test deliveries scheduled in the future are skipped until due."""
+        send_webhook('test_event', {'event': 'test_event'})
+        WebhookDelivery.objects.update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        
+        self.assertEqual(claim_pending_deliveries(10), [])
+        
+        WebhookDelivery.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(claim_pending_deliveries(10)), 1)
+    
+    @override_settings(WEBHOOK_RETRY_BASE_DELAY=30, WEBHOOK_RETRY_MAX_DELAY=300)
+    def test_retry_delay_is_exponential_and_capped(self):
+        """Test backoff doubles per attempt (plus jitter) up to the cap."""
+        for attempts, base in [(1, 30), (2, 60), (3, 120), (4, 240), (10, 300)]:
+            delay = retry_delay(attempts)
+            self.assertGreaterEqual(delay, base)
+            self.assertLessEqual(delay, base * 1.1)
+
+
+class TestWebhookDeliveryEngine(StubServerMixin, TestCase):
+    """Test the pooled, concurrent delivery engine against a local stub server."""
+    
+    def _queue(self, path, count):
+        for i in range(count):
+            Webhook.objects.create(
+                name=f'Hook {i}', url=f'{self.base_url}{path}', secret='secret', events=['test_event']
+            )
+        send_webhook('test_event', {'event': 'test_event'})
+        return claim_pending_deliveries(count)
+    
+    def test_connections_reused_per_host(self):
+        """Test deliveries to the same host share one keep-alive connection."""
+        engine = WebhookDeliveryEngine(max_workers=4, per_host_limit=1)
+        self.addCleanup(engine.close)
+        
+        deliver_webhooks(self._queue('/hook', 5), engine=engine)
+        
+        self.assertEqual(len(self.server.received), 5)
+        self.assertEqual(len({r['client_port'] for r in self.server.received}), 1)
+        self.assertEqual(WebhookDelivery.objects.filter(status='SUCCESS').count(), 5)
+    
+    def test_per_host_concurrency_capped(self):
+        """Test no more than per_host_limit requests are in flight to one host."""
+        engine = WebhookDeliveryEngine(max_workers=6, per_host_limit=2)
+        self.addCleanup(engine.close)
+        
+        deliver_webhooks(self._queue('/slow', 6), engine=engine)
+        
+        self.assertEqual(len(self.server.received), 6)
+        self.assertLessEqual(self.server.max_inflight, 2)
+    
+    def test_signature_matches_raw_body(self):
+        """Test the signature header verifies against the exact bytes sent."""
+        engine = WebhookDeliveryEngine()
+        self.addCleanup(engine.close)
+        
+        deliver_webhooks(self._queue('/hook', 1), engine=engine)
+        
+        request = self.server.received[0]
+        self.assertEqual(
+            request['headers']['X-Webhook-Signature'],
+            sign_body(request['body'], 'secret')
+        )
+    
+    @override_settings(WEBHOOK_INLINE_DELIVERY=True)
+    def test_inline_delivery_after_commit(self):
+        """Test helpers can deliver through the engine once the transaction commits."""
+        Webhook.objects.create(
+            name='Inline', url=f'{self.base_url}/hook', secret='secret', events=['test_event']
+        )
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            send_webhook('test_event', {'event': 'test_event'})
+            self.assertEqual(self.server.received, [])
+        
+        self.assertEqual(len(self.server.received), 1)
+        self.assertEqual(WebhookDelivery.objects.get().status, 'SUCCESS')
+
+
+class TestLeaveCreatedNotificationFanOut(TestCase):
+    """Test manager fan-out is batched."""
+    
+    def setUp(self):
+        self.employee = User.objects.create_user(
+            username='employee', email='employee@test.com', password='test123', role='EMPLOYEE'
+        )
+        leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        self.leave = LeaveRequest.objects.create(
+            user=self.employee,
+            leave_type=leave_type,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=1),
+            reason='Test'
+        )
+    
+    def _add_managers(self, count):
+        User.objects.bulk_create([
+            User(username=f'manager{User.objects.count()}_{i}', email=f'm{i}@test.com', role='MANAGER')
+            for i in range(count)
+        ])
+    
+    def _load_leave(self):
+        mail.outbox = []
+        return LeaveRequest.objects.select_related('user', 'leave_type').get(pk=self.leave.pk)
+    
+    def test_query_count_constant_in_number_of_managers(self):
+        """Test one manager SELECT and one bulk INSERT regardless of manager count."""
+        self._add_managers(3)
+        leave = self._load_leave()
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(2):
+            send_leave_created_notification(leave)
+        self.assertEqual(len(mail.outbox), 4)
+        
+        self._add_managers(30)
+        leave = self._load_leave()
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(2):
+            send_leave_created_notification(leave)
+        self.assertEqual(len(mail.outbox), 34)
+    
+    def test_every_manager_gets_a_notification(self):
+        """Test the bulk insert writes one record per recipient."""
+        self._add_managers(5)
+        send_leave_created_notification(self._load_leave())
+        
+        self.assertEqual(
+            Notification.objects.filter(user__role='MANAGER', subject='New Leave Request Pending').count(),
+            5
+        )
+        self.assertEqual(Notification.objects.filter(user=self.employee).count(), 1)
+
+
+class TestNotificationTemplates(TestCase):
+    """Test notification bodies come from cached templates and are stored by reference."""
+    
+    def setUp(self):
+        self.employee = User.objects.create_user(
+            username='employee', email='employee@test.com', first_name='Ada', last_name='Lovelace',
+            password='test123', role='EMPLOYEE'
+        )
+        self.leave = LeaveRequest.objects.create(
+            user=self.employee,
+            leave_type=LeaveType.objects.create(name='Sick Leave', days_allowed=10),
+            start_date=date(2030, 1, 7),
+            end_date=date(2030, 1, 8),
+            reason='Flu & fever'
+        )
+        for i in range(5):
+            User.objects.create_user(username=f'manager{i}', email=f'm{i}@test.com', role='MANAGER')
+    
+    def _send(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            send_leave_created_notification(self.leave)
+    
+    def test_rows_store_reference(self):
+        """Test rows keep the template id and context, and render to the emailed text."""
+        self._send()
+        
+        notification = Notification.objects.get(user=self.employee)
+        self.assertEqual(notification.template, 'leave_created_employee')
+        self.assertEqual(notification.message, '')
+        self.assertEqual(notification.context['start_date'], '2030-01-07')
+        email = next(m for m in mail.outbox if m.to == ['employee@test.com'])
+        self.assertEqual(notification.body, email.body)
+        self.assertTrue(email.body.startswith('Hello Ada Lovelace,\n\nYour leave request'))
+        self.assertIn('- Reason: Flu & fever', email.body)
+        
+        manager_copy = Notification.objects.get(user__username='manager3')
+        self.assertTrue(manager_copy.body.startswith('Hello manager3,'))
+        self.assertIn('Employee: Ada Lovelace', manager_copy.body)
+    
+    def test_body_rendered_once_per_event(self):
+        """Test the shared body is rendered once, however many managers are notified."""
+        with patch('notifications.utils.render_body', wraps=render_body) as render:
+            self._send()
+        
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(len(mail.outbox), 6)
+    
+    def test_templates_compiled_once(self):
+        """Test templates are loaded once per process and then reused."""
+        _template.cache_clear()
+        with patch('notifications.rendering.get_template', wraps=get_template) as load:
+            self._send()
+            self._send()
+        
+        self.assertEqual(load.call_count, 2)
+    
+    def test_status_change_template(self):
+        """Test the approval email renders the manager and default comment."""
+        manager = User.objects.get(username='manager0')
+        self.leave.status = 'APPROVED'
+        with self.captureOnCommitCallbacks(execute=True):
+            send_leave_status_changed_notification(self.leave, 'approve', manager)
+        
+        notification = Notification.objects.get(template='leave_status_changed')
+        self.assertEqual(notification.subject, 'Leave Request Approved')
+        self.assertIn('has been approved by manager0', notification.body)
+        self.assertIn('- Manager Comment: No comment provided', notification.body)
+        self.assertEqual(mail.outbox[0].body, notification.body)
+    
+    def test_free_text_notification(self):
+        """Test notifications without a template still return their message."""
+        notification = Notification.objects.create(user=self.employee, subject='Hi', message='Plain text')
+        self.assertEqual(notification.body, 'Plain text')
+
+
+class RecordingExecutor:
+    """Executor that only records what it was given (for SIDE_EFFECT_EXECUTOR tests)."""
+    
+    submitted = []
+    
+    def submit(self, func, *args, **kwargs):
+        self.submitted.append((func, args))
+
+
+class TestSideEffectExecutor(TestCase):
+    """Test emails wait for the commit and run on the configured executor."""
+    
+    def setUp(self):
+        self.employee = User.objects.create_user(
+            username='employee', email='employee@test.com', password='test123', role='EMPLOYEE'
+        )
+        User.objects.create_user(username='manager', email='manager@test.com', role='MANAGER')
+        leave_type = LeaveType.objects.create(name='Sick Leave', days_allowed=10)
+        self.leave = LeaveRequest.objects.create(
+            user=self.employee,
+            leave_type=leave_type,
+            start_date=date.today(),
+            end_date=date.today() + timedelta(days=1),
+            reason='Test'
+        )
+    
+    def test_emails_sent_after_commit(self):
+        """Test records are written in the transaction and mail goes out only on commit."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            send_leave_created_notification(self.leave)
+            self.assertEqual(Notification.objects.count(), 2)
+        
+        self.assertEqual(len(mail.outbox), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(mail.outbox), 2)
+    
+    def test_rollback_sends_nothing(self):
+        """Test a rolled-back transaction leaves no records and sends no email."""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    send_leave_created_notification(self.leave)
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+        
+        self.assertEqual(callbacks, [])
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+    
+    @override_settings(SIDE_EFFECT_EXECUTOR='thread')
+    def test_thread_executor(self):
+        """Test the thread executor runs side effects off the calling thread."""
+        future = get_executor().submit(threading.current_thread)
+        
+        self.assertIsInstance(get_executor(), ThreadExecutor)
+        self.assertIsNot(future.result(timeout=5), threading.current_thread())
+    
+    @override_settings(SIDE_EFFECT_EXECUTOR='notifications.tests.RecordingExecutor')
+    def test_custom_executor(self):
+        """Test a dotted path selects a custom executor that receives plain data."""
+        RecordingExecutor.submitted = []
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            send_leave_created_notification(self.leave)
+        
+        self.assertEqual(len(mail.outbox), 0)
+        [(func, (emails,))] = RecordingExecutor.submitted
+        self.assertIs(func, send_emails)
+        self.assertEqual(sorted(recipients[0] for *_, recipients in emails), ['employee@test.com', 'manager@test.com'])
+    
+    def test_failure_is_logged_not_raised(self):
+        """Test a failing side effect can't turn a committed request into an error."""
+        def fail():
+            raise ConnectionError('mail server down')
+        
+        with self.assertLogs('config.executors', level='ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                run_on_commit(fail)
+
+
 class TestNotifications(TestCase):
     """Test notification system."""
     
@@ -104,3 +666,113 @@ class TestNotifications(TestCase):
         self.assertEqual(notification.user, self.user)
         self.assertEqual(notification.is_read, False)
         self.assertIsNotNone(notification.created_at)
+
+
+class TestNotificationInbox(TestCase):
+    """Test the inbox endpoints and the cached unread counter."""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='employee', email='employee@test.com', role='EMPLOYEE')
+        self.other = User.objects.create_user(username='other', email='other@test.com', role='EMPLOYEE')
+        self.notifications = Notification.objects.bulk_create([
+            Notification(user=self.user, subject=f'Message {i}', message=f'Body {i}') for i in range(5)
+        ])
+        self.foreign = Notification.objects.create(user=self.other, subject='Private', message='Not yours')
+        self.client.force_authenticate(user=self.user)
+    
+    def _unread(self):
+        return self.client.get('/api/notifications/unread-count/').data['unread_count']
+    
+    def test_list_own_newest_first(self):
+        """Test the inbox lists only the caller's notifications, paginated by cursor."""
+        response = self.client.get('/api/notifications/?page_size=3')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([n['subject'] for n in response.data['results']], ['Message 4', 'Message 3', 'Message 2'])
+        self.assertEqual(response.data['results'][0]['body'], 'Body 4')
+        
+        following = self.client.get(response.data['next'])
+        self.assertEqual([n['subject'] for n in following.data['results']], ['Message 1', 'Message 0'])
+        self.assertIsNone(following.data['next'])
+    
+    def test_list_query_count(self):
+        """Test a page costs one query however many notifications it holds."""
+        with self.assertNumQueries(1):
+            self.client.get('/api/notifications/')
+    
+    def test_mark_one_read(self):
+        """Test marking one notification read updates it and the counter."""
+        self.assertEqual(self._unread(), 5)
+        target = self.notifications[0]
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/notifications/{target.id}/read/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_read'])
+        self.assertEqual(self._unread(), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/notifications/{target.id}/read/')
+        self.assertEqual(self._unread(), 4)
+        self.assertEqual(
+            self.client.post(f'/api/notifications/{self.foreign.id}/read/').status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual(self.client.post('/api/notifications/abc/read/').status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_bulk_mark_read(self):
+        """Test marking several, then all, as read and filtering unread ones."""
+        self.assertEqual(self._unread(), 5)
+        ids = [n.id for n in self.notifications[:2]] + [self.foreign.id]
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/notifications/mark-read/', {'ids': ids}, format='json')
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(self._unread(), 3)
+        self.assertFalse(Notification.objects.get(pk=self.foreign.pk).is_read)
+        self.assertEqual(len(self.client.get('/api/notifications/?unread=true').data['results']), 3)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/notifications/mark-read/', {'all': True}, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(self._unread(), 0)
+        
+        response = self.client.post('/api/notifications/mark-read/', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_counter_cached_and_incremented(self):
+        """Test the count is served from cache and kept current when notifications are sent."""
+        self.assertEqual(self._unread(), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user), 5)
+        
+        leave = LeaveRequest.objects.create(
+            user=self.user, leave_type=LeaveType.objects.create(name='Sick Leave', days_allowed=10),
+            start_date=date(2030, 1, 7), end_date=date(2030, 1, 8), reason='Test'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            send_leave_created_notification(leave)
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user), 6)
+        self.assertEqual(Notification.objects.filter(user=self.user, is_read=False).count(), 6)
+    
+    def test_rollback_leaves_counter_alone(self):
+        """Test counters only move when the write commits."""
+        self.assertEqual(self._unread(), 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.client.post('/api/notifications/mark-read/', {'all': True}, format='json')
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+        
+        self.assertEqual(get_unread_count(self.user), 5)
+    
+    def test_requires_authentication(self):
+        """Test anonymous users can't read an inbox."""
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/api/notifications/').status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,125 +1,160 @@
-from django.core.mail import send_mail
+from django.core.mail import send_mass_mail
 from django.conf import settings
+from config.executors import run_on_commit
+from config.metrics import timed
+from .cache import notifications_created
 from .models import Notification
+from .rendering import SUBJECTS, display_name, render_body, render_message
 
 """
 Utility functions for sending email notifications.
 These functions decouple the email sending logic from the views,
 making the code cleaner and easier to test.
-"""
 
-def send_leave_created_notification(leave_request):
-    """Send notification when a new leave request is created."""
-    # Notify the employee
-    employee_subject = "Leave Request Submitted"
-    employee_message = f"""
-Hello {leave_request.user.get_full_name() or leave_request.user.username},
+Notification records are written in the caller's transaction; the emails
+themselves are handed to `run_on_commit` and only go out once that
+transaction has committed.
+"""
 
-Your leave request has been successfully submitted.
 
-Details:
-- Leave Type: {leave_request.leave_type.name}
-- Start Date: {leave_request.start_date}
-- End Date: {leave_request.end_date}
-- Reason: {leave_request.reason}
-- Status: {leave_request.status}
+@timed('notify')
+def send_emails(messages):
+    """Send (subject, message, from_email, recipient_list) tuples over one mail connection."""
+    send_mass_mail(messages, fail_silently=True)
 
-You will be notified once your manager reviews your request.
 
-Best regards,
-Leave Management System
+@timed('notify')
+def send_leave_created_notification(leave_request):
     """
+    Send notification when a new leave request is created.
     
-    # Send email to employee
-    send_mail(
-        subject=employee_subject,
-        message=employee_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[leave_request.user.email],
-        fail_silently=True,
-    )
+    The employee and their manager (or every manager, if an employee has no
+    manager assigned) are notified in one batch: all emails go
+    out over a single pooled mail connection and all Notification rows are
+    written with one bulk INSERT, so the cost in queries and SMTP sessions
+    doesn't grow with the number of managers. The emails are sent after the
+    caller's transaction commits.
     
-    # Create notification record
-    Notification.objects.create(
-        user=leave_request.user,
-        notification_type='EMAIL',
-        subject=employee_subject,
-        message=employee_message,
-    )
+    Each message body is rendered once for the event; only the greeting differs
+    per recipient, and the rows store the template reference, not the text.
+    """
+    employee = leave_request.user
+    details = _leave_context(leave_request)
     
-    # Notify managers (get all users with MANAGER role)
-    from users.models import CustomUser
-    managers = CustomUser.objects.filter(role='MANAGER')
+    # Notify the employee
+    employee_context = {**details, 'name': display_name(employee)}
+    employee_subject = SUBJECTS['leave_created_employee']
+    employee_message = render_message('leave_created_employee', employee_context)
+    
+    emails = [(employee_subject, employee_message, settings.DEFAULT_FROM_EMAIL, [employee.email])]
+    notifications = [
+        Notification(
+            user=employee,
+            notification_type='EMAIL',
+            subject=employee_subject,
+            template='leave_created_employee',
+            context=employee_context,
+        )
+    ]
+    
+    # Notify the managers who can act on it (same scope as LeaveRequest.for_manager)
+    from users.models import managers_of
+    managers = managers_of(employee).only('id', 'username', 'email', 'first_name', 'last_name')
     
+    manager_subject = SUBJECTS['leave_created_manager']
+    manager_details = {**details, 'employee_name': employee_context['name']}
+    manager_body = render_body('leave_created_manager', manager_details)
     for manager in managers:
-        manager_subject = "New Leave Request Pending"
-        manager_message = f"""
-Hello {manager.get_full_name() or manager.username},
+        context = {**manager_details, 'name': display_name(manager)}
+        emails.append((
+            manager_subject,
+            render_message('leave_created_manager', context, body=manager_body),
+            settings.DEFAULT_FROM_EMAIL,
+            [manager.email],
+        ))
+        notifications.append(
+            Notification(
+                user=manager,
+                notification_type='EMAIL',
+                subject=manager_subject,
+                template='leave_created_manager',
+                context=context,
+            )
+        )
+    
+    # One INSERT for all notification records
+    Notification.objects.bulk_create(notifications)
+    notifications_created(notifications)
+    
+    # One SMTP connection for the whole batch, once the records are committed
+    run_on_commit(send_emails, emails)
 
-A new leave request has been submitted and requires your review.
 
-Employee: {leave_request.user.get_full_name() or leave_request.user.username}
-Leave Type: {leave_request.leave_type.name}
-Start Date: {leave_request.start_date}
-End Date: {leave_request.end_date}
-Reason: {leave_request.reason}
+def _leave_context(leave_request):
+    """Template context shared by every message about a leave (JSON-serializable)."""
+    return {
+        'leave_type': leave_request.leave_type.name,
+        'start_date': str(leave_request.start_date),
+        'end_date': str(leave_request.end_date),
+        'reason': leave_request.reason,
+        'status': leave_request.status,
+    }
 
-Please log in to review and approve/reject this request.
 
-Best regards,
-Leave Management System
-        """
-        
-        send_mail(
-            subject=manager_subject,
-            message=manager_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[manager.email],
-            fail_silently=True,
-        )
-        
-        Notification.objects.create(
-            user=manager,
-            notification_type='EMAIL',
-            subject=manager_subject,
-            message=manager_message,
-        )
+def _status_changed_notification(leave_request, action, manager_name):
+    """Return the (email, Notification) pair for one approved/rejected leave."""
+    action_text = "approved" if action == 'approve' else "rejected"
+    subject = f"Leave Request {action_text.capitalize()}"
+    context = {
+        **_leave_context(leave_request),
+        'name': display_name(leave_request.user),
+        'action_text': action_text,
+        'manager_name': manager_name,
+        'manager_comment': leave_request.manager_comment or '',
+    }
+    message = render_message('leave_status_changed', context)
+    email = (subject, message, settings.DEFAULT_FROM_EMAIL, [leave_request.user.email])
+    notification = Notification(
+        user=leave_request.user,
+        notification_type='EMAIL',
+        subject=subject,
+        template='leave_status_changed',
+        context=context,
+    )
+    return email, notification
 
 
+@timed('notify')
 def send_leave_status_changed_notification(leave_request, action, manager):
     """Send notification when leave status is changed (approved/rejected)."""
-    action_text = "approved" if action == 'approve' else "rejected"
+    email, notification = _status_changed_notification(leave_request, action, display_name(manager))
     
-    subject = f"Leave Request {action_text.capitalize()}"
-    message = f"""
-Hello {leave_request.user.get_full_name() or leave_request.user.username},
-
-Your leave request has been {action_text} by {manager.get_full_name() or manager.username}.
+    # Create notification record
+    notification.save()
+    notifications_created([notification])
+    
+    # Send email after commit
+    run_on_commit(send_emails, [email])
 
-Details:
-- Leave Type: {leave_request.leave_type.name}
-- Start Date: {leave_request.start_date}
-- End Date: {leave_request.end_date}
-- Status: {leave_request.status}
-- Manager Comment: {leave_request.manager_comment or 'No comment provided'}
 
-Best regards,
-Leave Management System
+@timed('notify')
+def send_leave_status_changed_notifications(leave_requests, action, manager):
     """
+    Notify the employees of a batch of approved/rejected leaves.
     
-    # Send email
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[leave_request.user.email],
-        fail_silently=True,
-    )
+    All Notification rows are written with one INSERT and, after commit, all
+    emails go out over one mail connection. `leave_requests` must have user and
+    leave_type loaded.
+    """
+    manager_name = display_name(manager)
+    emails = []
+    notifications = []
+    for leave_request in leave_requests:
+        email, notification = _status_changed_notification(leave_request, action, manager_name)
+        emails.append(email)
+        notifications.append(notification)
     
-    # Create notification record
-    Notification.objects.create(
-        user=leave_request.user,
-        notification_type='EMAIL',
-        subject=subject,
-        message=message,
-    )
+    Notification.objects.bulk_create(notifications)
+    notifications_created(notifications)
+    if emails:
+        run_on_commit(send_emails, emails)
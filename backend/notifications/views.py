@@ -1,3 +1,64 @@
-from django.shortcuts import render
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .cache import get_unread_count, notifications_read
+from .models import Notification
+from .pagination import NotificationCursorPagination
+from .serializers import NotificationMarkReadSerializer, NotificationSerializer
 
-# Create your views here.
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The current user's notification inbox.
+    
+    GET  /api/notifications/                 list, newest first (?unread=true)
+    GET  /api/notifications/{id}/            one notification
+    POST /api/notifications/{id}/read/       mark one as read
+    POST /api/notifications/mark-read/       mark many (`ids`) or `all` as read
+    GET  /api/notifications/unread-count/    cached unread counter
+    
+    Marking read is a conditional UPDATE on unread rows, and the number of rows
+    it changed is taken off the cached counter.
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user).only(
+            'id', 'notification_type', 'subject', 'message', 'template', 'context', 'is_read', 'created_at'
+        )
+        if self.action == 'list' and self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+    def _mark_read(self, queryset):
+        updated = queryset.filter(is_read=False).update(is_read=True)
+        notifications_read(self.request.user.id, updated)
+        return updated
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        notification = self.get_object()
+        self._mark_read(self.get_queryset().filter(pk=notification.pk))
+        notification.is_read = True
+        return Response({
+            **NotificationSerializer(notification).data,
+            'unread_count': get_unread_count(request.user),
+        })
+
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        serializer = NotificationMarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = self.get_queryset()
+        if not serializer.validated_data['all']:
+            queryset = queryset.filter(id__in=serializer.validated_data['ids'])
+        updated = self._mark_read(queryset)
+        return Response({
+            'updated': updated,
+            'unread_count': get_unread_count(request.user),
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        return Response({'unread_count': get_unread_count(request.user)})
@@ -1,79 +1,169 @@
 import hmac
 import hashlib
 import json
-import requests
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
 from django.utils import timezone
+from config.executors import run_on_commit
+from config.metrics import timed
 from .models import Webhook, WebhookDelivery
 
-def generate_signature(payload, secret):
-    """Generate HMAC SHA256 signature for webhook payload."""
-    message = json.dumps(payload, sort_keys=True).encode('utf-8')
-    signature = hmac.new(
+def sign_body(body, secret):
+    """Generate HMAC SHA256 signature for an encoded request body."""
+    return hmac.new(
         secret.encode('utf-8'),
-        message,
+        body,
         hashlib.sha256
     ).hexdigest()
-    return signature
+
+def generate_signature(payload, secret):
+    """Generate HMAC SHA256 signature for webhook payload."""
+    message = json.dumps(payload, sort_keys=True).encode('utf-8')
+    return sign_body(message, secret)
 
 def send_webhook(event_type, payload):
     """
-    Send webhook to all active webhooks subscribed to the event type.
+    Queue a webhook delivery for all active webhooks subscribed to the event type.
+    
+    Deliveries are written to the WebhookDelivery outbox as PENDING rows, so they
+    commit (or roll back) together with the caller's transaction. The HTTP calls
+    are made later by the `deliver_webhooks` management command, or by the
+    side-effect executor after the transaction commits when
+    WEBHOOK_INLINE_DELIVERY is enabled.
     
     Args:
         event_type: Type of event (e.g., 'leave_created', 'leave_approved')
         payload: Dictionary containing event data
     """
-    # Get all active webhooks and filter in Python (SQLite doesn't support contains on JSONField)
-    all_webhooks = Webhook.objects.filter(is_active=True)
-    webhooks = [w for w in all_webhooks if event_type in w.events]
+    send_webhooks(event_type, [payload])
+
+@timed('webhook')
+def send_webhooks(event_type, payloads):
+    """Queue one delivery per subscriber and payload, in one subscriber lookup and one INSERT."""
+    # Indexed lookup on the normalized subscription table
+    webhooks = list(Webhook.objects.filter(
+        is_active=True, subscriptions__event_type=event_type
+    ).only('id'))
+    
+    deliveries = WebhookDelivery.objects.bulk_create([
+        WebhookDelivery(webhook=webhook, event_type=event_type, payload=payload)
+        for payload in payloads
+        for webhook in webhooks
+    ])
+    
+    if settings.WEBHOOK_INLINE_DELIVERY and deliveries:
+        run_on_commit(deliver_queued_webhooks, [delivery.id for delivery in deliveries])
+
+def deliver_queued_webhooks(ids):
+    """Claim and send specific queued deliveries (used for inline delivery after commit)."""
+    deliver_webhooks(claim_pending_deliveries(ids=ids))
+
+def claim_pending_deliveries(batch_size=50, ids=None):
+    """
+    Claim a batch of due PENDING deliveries for the calling worker.
+    
+    New deliveries are due immediately; failed ones become due again at their
+    backoff time. The lookup walks the (status, next_attempt_at) index, so its
+    cost depends on the batch size rather than on how many rows are queued.
+    
+    If `ids` is given only those deliveries are considered, whether due or not.
+    Claimed rows are moved to PROCESSING so concurrent workers never send the
+    same delivery twice. Claims older than WEBHOOK_CLAIM_TIMEOUT (left behind by
+    a crashed worker) are released back to PENDING first. They count as a
+    failed attempt, so a payload that keeps crashing the worker is still
+    dead-lettered after WEBHOOK_MAX_ATTEMPTS.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.WEBHOOK_CLAIM_TIMEOUT)
     
-    for webhook in webhooks:
-        delivery = WebhookDelivery.objects.create(
-            webhook=webhook,
-            event_type=event_type,
-            payload=payload
+    with transaction.atomic():
+        stale = WebhookDelivery.objects.filter(status='PROCESSING', claimed_at__lt=stale_before)
+        stale.filter(attempts__gte=settings.WEBHOOK_MAX_ATTEMPTS - 1).update(
+            status='DEAD', attempts=F('attempts') + 1, claimed_at=None,
+            error_message='Worker did not finish the delivery',
         )
+        stale.update(status='PENDING', attempts=F('attempts') + 1, claimed_at=None)
         
-        try:
-            # Generate HMAC signature
-            signature = generate_signature(payload, webhook.secret)
-            
-            # Prepare headers
-            headers = {
-                'Content-Type': 'application/json',
-                'X-Webhook-Signature': signature,
-                'X-Webhook-Event': event_type,
-                'User-Agent': 'LeaveManagementSystem-Webhook/1.0'
-            }
-            
-            # Send POST request
-            response = requests.post(
-                webhook.url,
-                json=payload,
-                headers=headers,
-                timeout=10
-            )
-            
-            # Update delivery record
-            delivery.response_status = response.status_code
-            delivery.response_body = response.text[:1000]  # Limit to 1000 chars
-            delivery.success = 200 <= response.status_code < 300
-            delivery.save()
-            
-        except requests.exceptions.Timeout:
-            delivery.error_message = "Request timeout"
-            delivery.success = False
-            delivery.save()
-            
-        except requests.exceptions.RequestException as e:
-            delivery.error_message = str(e)[:500]
-            delivery.success = False
-            delivery.save()
-            
-        except Exception as e:
-            delivery.error_message = f"Unexpected error: {str(e)[:500]}"
-            delivery.success = False
-            delivery.save()
+        queryset = WebhookDelivery.objects.filter(status='PENDING')
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+            batch_size = len(ids)
+        else:
+            queryset = queryset.filter(next_attempt_at__lte=now)
+        queryset = queryset.order_by('next_attempt_at')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        
+        WebhookDelivery.objects.filter(id__in=ids, status='PENDING').update(
+            status='PROCESSING', claimed_at=now
+        )
+    
+    return list(
+        WebhookDelivery.objects.select_related('webhook')
+        .filter(id__in=ids, status='PROCESSING', claimed_at=now)
+        .order_by('id')
+    )
+
+def retry_delay(attempts):
+    """
+    Seconds to wait before the next attempt after `attempts` failures.
+    
+    Exponential backoff (base, 2x base, 4x base, ...) capped at
+    WEBHOOK_RETRY_MAX_DELAY, plus up to 10% jitter so a recovering subscriber
+    isn't hit by every queued retry at the same instant.
+    """
+    delay = min(
+        settings.WEBHOOK_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.WEBHOOK_RETRY_MAX_DELAY
+    )
+    return delay + random.uniform(0, delay * 0.1)
+
+@timed('webhook')
+def deliver_webhooks(deliveries, engine=None):
+    """
+    Send claimed deliveries and record each outcome.
+    
+    HTTP requests go through the pooled delivery engine, which fans out
+    concurrently with keep-alive connections per host. Results are written back
+    from the calling thread in one bulk update, so engine threads never need a
+    DB connection.
+    
+    Failed deliveries are rescheduled with exponential backoff until they have
+    been tried WEBHOOK_MAX_ATTEMPTS times, after which they are dead-lettered.
+    """
+    if not deliveries:
+        return
+    
+    if engine is None:
+        from .delivery import get_engine
+        engine = get_engine()
+    
+    results = engine.send(deliveries)
+    now = timezone.now()
+    
+    for delivery, result in zip(deliveries, results):
+        for field, value in result.items():
+            setattr(delivery, field, value)
+        delivery.attempts += 1
+        delivery.delivered_at = now
+        delivery.claimed_at = None
+        
+        if delivery.success:
+            delivery.status = 'SUCCESS'
+        elif delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            delivery.status = 'DEAD'
+        else:
+            delivery.status = 'PENDING'
+            delivery.next_attempt_at = now + timedelta(seconds=retry_delay(delivery.attempts))
+    
+    WebhookDelivery.objects.bulk_update(deliveries, [
+        'status', 'response_status', 'response_body', 'error_message', 'success',
+        'attempts', 'next_attempt_at', 'claimed_at', 'delivered_at',
+    ])
 
 def send_leave_created_webhook(leave_request):
     """Send webhook when a leave request is created."""
@@ -98,11 +188,11 @@ def send_leave_created_webhook(leave_request):
     }
     send_webhook('leave_created', payload)
 
-def send_leave_status_changed_webhook(leave_request, action, manager):
-    """Send webhook when leave status changes (approved/rejected)."""
-    event_type = f'leave_{action}d'  # 'leave_approved' or 'leave_rejected'
-    
-    payload = {
+def _status_changed_event(action):
+    return 'leave_approved' if action == 'approve' else 'leave_rejected'
+
+def _status_changed_payload(leave_request, event_type, manager):
+    return {
         'event': event_type,
         'timestamp': timezone.now().isoformat(),
         'data': {
@@ -127,4 +217,16 @@ def send_leave_status_changed_webhook(leave_request, action, manager):
             'updated_at': leave_request.updated_at.isoformat()
         }
     }
-    send_webhook(event_type, payload)
+
+def send_leave_status_changed_webhook(leave_request, action, manager):
+    """Send webhook when leave status changes (approved/rejected)."""
+    event_type = _status_changed_event(action)
+    send_webhook(event_type, _status_changed_payload(leave_request, event_type, manager))
+
+def send_leave_status_changed_webhooks(leave_requests, action, manager):
+    """Queue status-change webhooks for a batch of leaves with a single INSERT."""
+    event_type = _status_changed_event(action)
+    send_webhooks(event_type, [
+        _status_changed_payload(leave_request, event_type, manager)
+        for leave_request in leave_requests
+    ])
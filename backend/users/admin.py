@@ -1,3 +1,13 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from .models import CustomUser
 
-# Register your models here.
+@admin.register(CustomUser)
+class CustomUserAdmin(UserAdmin):
+    list_display = ['username', 'email', 'role', 'manager', 'is_active']
+    list_filter = ['role', 'is_active']
+    list_select_related = ['manager']
+    raw_id_fields = ['manager']
+    fieldsets = UserAdmin.fieldsets + (
+        ('Organization', {'fields': ('role', 'manager')}),
+    )
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -22,5 +23,44 @@ class CustomUser(AbstractUser):
     # - HR: Has full access to all leaves and system settings.
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='EMPLOYEE')
 
+    # Reporting line: the manager who reviews this user's leave requests.
+    # Employees without a manager are visible to every manager while
+    # UNASSIGNED_EMPLOYEES_FALLBACK is on (see team_q).
+    manager = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reports',
+        limit_choices_to={'role': 'MANAGER'},
+    )
+
     def __str__(self):
         return f"{self.username} ({self.role})"
+
+
+def team_q(manager, prefix=''):
+    """
+    Q selecting the users `manager` is responsible for; `prefix` is the path to
+    the user from the queried model (e.g. 'user__' for LeaveRequest).
+    
+    That is their direct reports plus, with UNASSIGNED_EMPLOYEES_FALLBACK on,
+    employees with no manager yet. Managers and HR never fall back, so a manager
+    doesn't see a peer's own requests. Both branches are indexed lookups on
+    `manager`, so the work is bounded by team size plus the onboarding backlog.
+    """
+    q = models.Q(**{f'{prefix}manager': manager})
+    if settings.UNASSIGNED_EMPLOYEES_FALLBACK:
+        q |= models.Q(**{f'{prefix}manager__isnull': True, f'{prefix}role': 'EMPLOYEE'})
+    return q
+
+
+def managers_of(user):
+    """
+    Managers responsible for `user`: those whose team_q includes them.
+    
+    Derived from team_q (one EXISTS probe per manager row) so "who manages
+    whom" has a single definition.
+    """
+    team_member = CustomUser.objects.filter(team_q(models.OuterRef('pk')), pk=user.pk)
+    return CustomUser.objects.filter(models.Exists(team_member), role='MANAGER')
@@ -6,7 +6,8 @@ User = get_user_model()
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'role', 'first_name', 'last_name')
+        fields = ('id', 'username', 'email', 'role', 'first_name', 'last_name', 'manager')
+        read_only_fields = ('manager',)
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -2,11 +2,13 @@ import { useState, useEffect } from 'react';
 import Layout from '../components/Layout';
 import Badge from '../components/ui/Badge';
 import Card from '../components/ui/Card';
+import Button from '../components/ui/Button';
 import { api } from '../utils/api';
 import { useAuth } from '../context/AuthContext';
 
 export default function HRDashboard() {
     const [leaves, setLeaves] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const { user } = useAuth();
 
     // Get display name - prefer full name, fallback to username
@@ -15,9 +17,16 @@ export default function HRDashboard() {
         : user?.first_name || user?.username || 'HR';
 
     useEffect(() => {
-        api.getHRSummary().then(setLeaves);
+        loadLeaves();
     }, []);
 
+    // Without a URL this loads the first page; otherwise it appends the next one
+    const loadLeaves = async (url) => {
+        const data = await api.getHRSummary(url);
+        setLeaves((previous) => (url ? [...previous, ...data.results] : data.results));
+        setNextPage(data.next);
+    };
+
     return (
         <Layout>
             <div className="mb-8">
@@ -40,10 +49,10 @@ export default function HRDashboard() {
                             {leaves.map((leave) => (
                                 <tr key={leave.id} className="hover:bg-gray-50 dark:hover:bg-gray-700/50 transition-colors duration-150">
                                     <td className="px-6 py-4 whitespace-nowrap">
-                                        <div className="text-sm font-medium text-gray-900 dark:text-white">{leave.user.username}</div>
-                                        <div className="text-sm text-gray-500">{leave.user.email}</div>
+                                        <div className="text-sm font-medium text-gray-900 dark:text-white">{leave.user_name}</div>
+                                        <div className="text-sm text-gray-500">{leave.user_email}</div>
                                     </td>
-                                    <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500 dark:text-gray-400">{leave.leave_type.name}</td>
+                                    <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500 dark:text-gray-400">{leave.leave_type_name}</td>
                                     <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500 dark:text-gray-400">{leave.start_date} to {leave.end_date}</td>
                                     <td className="px-6 py-4 whitespace-nowrap">
                                         <Badge variant={leave.status === 'APPROVED' ? 'success' : leave.status === 'REJECTED' ? 'danger' : 'warning'}>
@@ -56,6 +65,13 @@ export default function HRDashboard() {
                     </table>
                 </div>
             </Card>
+            {nextPage && (
+                <div className="mt-4 flex justify-center">
+                    <Button variant="secondary" onClick={() => loadLeaves(nextPage)}>
+                        Load more
+                    </Button>
+                </div>
+            )}
         </Layout>
     );
 }
@@ -28,7 +28,7 @@ export default function ManagerDashboard() {
         try {
             const data = await api.getManagerQueue(activeTab);
             // Take only the first 5 for preview
-            const dataArray = Array.isArray(data) ? data : [];
+            const dataArray = Array.isArray(data.results) ? data.results : [];
             setRecentRequests(dataArray.slice(0, 5));
         } catch (error) {
             console.error("Failed to load dashboard data", error);
@@ -108,10 +108,10 @@ export default function ManagerDashboard() {
                                             <div className="flex items-center justify-between space-x-4">
                                                 <div className="min-w-0 flex-1">
                                                     <p className="truncate text-sm font-medium text-gray-900 dark:text-white">
-                                                        {request.user.username}
+                                                        {request.user_name}
                                                     </p>
                                                     <p className="truncate text-sm text-gray-500 dark:text-gray-400">
-                                                        {request.leave_type.name} • {request.start_date} to {request.end_date}
+                                                        {request.leave_type_name} • {request.start_date} to {request.end_date}
                                                     </p>
                                                 </div>
                                                 <div className="flex items-center space-x-2">
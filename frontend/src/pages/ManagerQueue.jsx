@@ -12,6 +12,7 @@ import { CheckIcon, XMarkIcon, FunnelIcon, ArrowLeftIcon } from '@heroicons/reac
 
 export default function ManagerQueue() {
     const [requests, setRequests] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [searchParams] = useSearchParams();
     const [activeTab, setActiveTab] = useState(searchParams.get('status') || 'PENDING');
     const [selectedRequest, setSelectedRequest] = useState(null);
@@ -30,13 +31,19 @@ export default function ManagerQueue() {
         loadRequests();
     }, [activeTab]);
 
-    const loadRequests = async () => {
+    // Without a URL this loads the first page; otherwise it appends the next one
+    const loadRequests = async (url) => {
         try {
-            const data = await api.getManagerQueue(activeTab);
-            setRequests(Array.isArray(data) ? data : []);
+            const data = await api.getManagerQueue(activeTab, url);
+            const page = Array.isArray(data.results) ? data.results : [];
+            setRequests((previous) => (url ? [...previous, ...page] : page));
+            setNextPage(data.next);
         } catch (error) {
             console.error("Failed to load requests", error);
-            setRequests([]);
+            if (!url) {
+                setRequests([]);
+                setNextPage(null);
+            }
             addToast('Failed to load requests', 'error');
         }
     };
@@ -103,10 +110,10 @@ export default function ManagerQueue() {
                             {requests.map((request) => (
                                 <tr key={request.id} className="hover:bg-gray-50 dark:hover:bg-gray-700/50 transition-colors duration-150">
                                     <td className="px-6 py-4 whitespace-nowrap">
-                                        <div className="text-sm font-medium text-gray-900 dark:text-white">{request.user.username}</div>
-                                        <div className="text-sm text-gray-500 dark:text-gray-400">{request.user.email}</div>
+                                        <div className="text-sm font-medium text-gray-900 dark:text-white">{request.user_name}</div>
+                                        <div className="text-sm text-gray-500 dark:text-gray-400">{request.user_email}</div>
                                     </td>
-                                    <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500 dark:text-gray-400">{request.leave_type.name}</td>
+                                    <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500 dark:text-gray-400">{request.leave_type_name}</td>
                                     <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500 dark:text-gray-400">{request.start_date} to {request.end_date}</td>
                                     <td className="px-6 py-4 text-sm text-gray-500 dark:text-gray-400 max-w-xs truncate" title={request.reason}>{request.reason}</td>
                                     <td className="px-6 py-4 whitespace-nowrap">
@@ -154,6 +161,13 @@ export default function ManagerQueue() {
                     </table>
                 </div>
             </Card>
+            {nextPage && (
+                <div className="mt-4 flex justify-center">
+                    <Button variant="secondary" onClick={() => loadRequests(nextPage)}>
+                        Load more
+                    </Button>
+                </div>
+            )}
 
             <ActionModal
                 isOpen={isModalOpen}
@@ -2,15 +2,24 @@ import { useState, useEffect } from 'react';
 import Layout from '../components/Layout';
 import Badge from '../components/ui/Badge';
 import Card from '../components/ui/Card';
+import Button from '../components/ui/Button';
 import { api } from '../utils/api';
 
 export default function MyRequests() {
     const [requests, setRequests] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
 
     useEffect(() => {
-        api.getLeaves().then(setRequests);
+        loadRequests();
     }, []);
 
+    // Without a URL this loads the first page; otherwise it appends the next one
+    const loadRequests = async (url) => {
+        const data = await api.getLeaves(url);
+        setRequests((previous) => (url ? [...previous, ...data.results] : data.results));
+        setNextPage(data.next);
+    };
+
     return (
         <Layout>
             <div className="mb-8">
@@ -33,7 +42,7 @@ export default function MyRequests() {
                         <tbody className="bg-white dark:bg-gray-800 divide-y divide-gray-200 dark:divide-gray-700">
                             {requests.map((request) => (
                                 <tr key={request.id} className="hover:bg-gray-50 dark:hover:bg-gray-700/50 transition-colors duration-150">
-                                    <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900 dark:text-white">{request.leave_type.name}</td>
+                                    <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900 dark:text-white">{request.leave_type_name}</td>
                                     <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500 dark:text-gray-400">{request.start_date} to {request.end_date}</td>
                                     <td className="px-6 py-4 text-sm text-gray-500 dark:text-gray-400 max-w-xs truncate">{request.reason}</td>
                                     <td className="px-6 py-4 whitespace-nowrap">
@@ -48,6 +57,13 @@ export default function MyRequests() {
                     </table>
                 </div>
             </Card>
+            {nextPage && (
+                <div className="mt-4 flex justify-center">
+                    <Button variant="secondary" onClick={() => loadRequests(nextPage)}>
+                        Load more
+                    </Button>
+                </div>
+            )}
         </Layout>
     );
 }
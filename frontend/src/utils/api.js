@@ -45,8 +45,11 @@ export const api = {
         return response.json();
     },
     // Leaves
-    getLeaves: async () => {
-        const response = await fetch(`${API_URL}/leaves/`, { headers: getAuthHeaders() });
+    // List endpoints are cursor-paginated: { next, previous, results }.
+    // Pass the previous page's `next` URL to load the following page.
+    getLeaves: async (url = `${API_URL}/leaves/`) => {
+        const response = await fetch(url, { headers: getAuthHeaders() });
+        if (!response.ok) throw new Error('Failed to load leaves');
         return response.json();
     },
     createLeave: async (data) => {
@@ -65,9 +68,22 @@ export const api = {
         return response.json();
     },
     // Manager
-    getManagerQueue: async (status = 'PENDING') => {
+    getManagerQueue: async (status = 'PENDING', url = null) => {
         const query = status === 'ALL' ? '?all=true' : `?status=${status}`;
-        const response = await fetch(`${API_URL}/manager-queue/${query}`, { headers: getAuthHeaders() });
+        const response = await fetch(url || `${API_URL}/manager-queue/${query}`, { headers: getAuthHeaders() });
+        if (!response.ok) throw new Error('Failed to load manager queue');
+        return response.json();
+    },
+    getTeamAbsences: async (params) => {
+        const query = new URLSearchParams(params).toString();
+        const response = await fetch(`${API_URL}/team-absences/?${query}`, { headers: getAuthHeaders() });
+        if (!response.ok) throw new Error('Failed to load team absences');
+        return response.json();
+    },
+    getTeamCalendar: async (params) => {
+        const query = new URLSearchParams(params).toString();
+        const response = await fetch(`${API_URL}/team-calendar/?${query}`, { headers: getAuthHeaders() });
+        if (!response.ok) throw new Error('Failed to load team calendar');
         return response.json();
     },
     getManagerStats: async () => {
@@ -83,13 +99,51 @@ export const api = {
         if (!response.ok) throw new Error('Action failed');
         return response.json();
     },
+    bulkActionLeaves: async (ids, action, comment) => {
+        const response = await fetch(`${API_URL}/leaves/bulk-action/`, {
+            method: 'POST',
+            headers: getAuthHeaders(),
+            body: JSON.stringify({ ids, action, comment })
+        });
+        if (!response.ok) throw new Error('Bulk action failed');
+        return response.json();
+    },
     // HR
-    getHRSummary: async () => {
-        const response = await fetch(`${API_URL}/hr-summary/`, { headers: getAuthHeaders() });
+    getHRSummary: async (url = `${API_URL}/hr-summary/`) => {
+        const response = await fetch(url, { headers: getAuthHeaders() });
+        if (!response.ok) throw new Error('Failed to load HR summary');
         return response.json();
     },
     getLeaveTypes: async () => {
         const response = await fetch(`${API_URL}/leave-types/`, { headers: getAuthHeaders() });
         return response.json();
+    },
+    // Notifications
+    getNotifications: async (url = `${API_URL}/notifications/`) => {
+        // Pass the previous page's `next` URL to load older notifications
+        const response = await fetch(url, { headers: getAuthHeaders() });
+        if (!response.ok) throw new Error('Failed to load notifications');
+        return response.json();
+    },
+    getUnreadNotificationCount: async () => {
+        const response = await fetch(`${API_URL}/notifications/unread-count/`, { headers: getAuthHeaders() });
+        const data = await response.json();
+        return data.unread_count;
+    },
+    markNotificationRead: async (id) => {
+        const response = await fetch(`${API_URL}/notifications/${id}/read/`, {
+            method: 'POST',
+            headers: getAuthHeaders()
+        });
+        return response.json();
+    },
+    markNotificationsRead: async (ids) => {
+        // Omit `ids` to mark everything read
+        const response = await fetch(`${API_URL}/notifications/mark-read/`, {
+            method: 'POST',
+            headers: getAuthHeaders(),
+            body: JSON.stringify(ids ? { ids } : { all: true })
+        });
+        return response.json();
     }
 };